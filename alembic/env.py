@@ -4,26 +4,21 @@ from alembic import context
 import os
 from dotenv import load_dotenv
 
-# Importa tu Base de modelos
-from app.database.connection import Base  # ⚠️ AJUSTA LA RUTA según tu proyecto
+# Metadata compartida por la app (las tablas se registran al importar tables)
+from app.database.connection import metadata, SYNC_DATABASE_URL
+import app.database.tables  # noqa: F401
 
 load_dotenv()
 
-# Configuración de BD desde variables de entorno
-DB_USER = os.getenv("DB_USER", "root")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "Ujcv2025!")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_NAME = os.getenv("DB_NAME", "ecomarketdb")
-
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Alembic es síncrono: misma BD que la app, pero con el driver pymysql
+DATABASE_URL = SYNC_DATABASE_URL
 
 config = context.config
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-target_metadata = Base.metadata
+target_metadata = metadata
 
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
@@ -0,0 +1,31 @@
+"""users token_version for session revocation
+
+Revision ID: 0b8e4a7c2d19
+Revises: f3d61b9e0a5c
+Create Date: 2026-10-18 14:02:41.516203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b8e4a7c2d19'
+down_revision: Union[str, Sequence[str], None] = 'f3d61b9e0a5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,108 @@
+"""points_history partitioned by month, idempotency keys table and monthly rollups
+
+Revision ID: 2b7d4e9a1c56
+Revises: 9c27e4b1d6f3
+Create Date: 2026-10-18 21:03:17.640915
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7d4e9a1c56'
+down_revision: Union[str, Sequence[str], None] = '9c27e4b1d6f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses por delante que se crean ya; luego los añade app/utils/history_archive.py
+MESES_FUTUROS = 3
+
+
+def _siguiente(mes: date) -> date:
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _particiones(desde: date, hasta: date) -> str:
+    """pYYYYMM por mes de `desde` a `hasta` (la primera recoge también lo anterior) + pmax."""
+    partes, mes = [], desde
+    while mes <= hasta:
+        fin = _siguiente(mes)
+        partes.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN ('{fin:%Y-%m-%d}')")
+        mes = fin
+    partes.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ",\n        ".join(partes)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('points_history_keys',
+    sa.Column('idempotency_key', sa.String(length=191), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('idempotency_key')
+    )
+    op.execute("""
+        INSERT INTO points_history_keys (idempotency_key, fecha)
+        SELECT idempotency_key, COALESCE(fecha, CURRENT_TIMESTAMP)
+        FROM points_history
+        WHERE idempotency_key IS NOT NULL
+    """)
+    op.create_table('points_history_mensual',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Date(), nullable=False),
+    sa.Column('motivo', sa.String(length=150), nullable=False),
+    sa.Column('veces', sa.Integer(), nullable=False),
+    sa.Column('ganados', sa.Integer(), nullable=False),
+    sa.Column('canjeados', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'mes', 'motivo')
+    )
+
+    # Una tabla particionada no admite FK, y toda clave única (la PK
+    # incluida) tiene que contener la columna de partición
+    op.drop_constraint('points_history_ibfk_1', 'points_history', type_='foreignkey')
+    op.drop_index('ix_points_history_idempotency_key', table_name='points_history')
+    op.drop_index('ix_points_history_user_fecha', table_name='points_history')
+    if not context.is_offline_mode():
+        # Índice que MySQL creó para la FK (solo user_id): ya no hace falta
+        for ix in sa.inspect(op.get_bind()).get_indexes('points_history'):
+            if ix['column_names'] == ['user_id']:
+                op.drop_index(ix['name'], table_name='points_history')
+    op.execute("UPDATE points_history SET fecha = CURRENT_TIMESTAMP WHERE fecha IS NULL")
+    op.alter_column('points_history', 'fecha', existing_type=sa.DateTime(), nullable=False)
+    op.execute("ALTER TABLE points_history DROP PRIMARY KEY, ADD PRIMARY KEY (id, fecha)")
+    op.create_index(
+        'ix_points_history_user_fecha_desc', 'points_history',
+        ['user_id', sa.text('fecha DESC'), 'cambio', 'motivo', 'referencia'],
+    )
+
+    este_mes = datetime.utcnow().date().replace(day=1)
+    desde = este_mes
+    if not context.is_offline_mode():
+        primera = op.get_bind().execute(sa.text("SELECT MIN(fecha) FROM points_history")).scalar()
+        if primera:
+            desde = min(primera.date().replace(day=1), este_mes)
+    hasta = este_mes
+    for _ in range(MESES_FUTUROS):
+        hasta = _siguiente(hasta)
+    op.execute(f"""
+        ALTER TABLE points_history PARTITION BY RANGE COLUMNS(fecha) (
+        {_particiones(desde, hasta)}
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Los meses ya archivados siguen en sus tablas points_history_YYYYMM
+    op.execute("ALTER TABLE points_history REMOVE PARTITIONING")
+    op.drop_index('ix_points_history_user_fecha_desc', table_name='points_history')
+    op.execute("ALTER TABLE points_history DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    op.alter_column('points_history', 'fecha', existing_type=sa.DateTime(), nullable=True)
+    op.create_index('ix_points_history_user_fecha', 'points_history', ['user_id', 'fecha'])
+    op.create_index('ix_points_history_idempotency_key', 'points_history', ['idempotency_key'], unique=True)
+    op.create_foreign_key('points_history_ibfk_1', 'points_history', 'users', ['user_id'], ['id'])
+    op.drop_table('points_history_mensual')
+    op.drop_table('points_history_keys')
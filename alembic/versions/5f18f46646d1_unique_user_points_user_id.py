@@ -0,0 +1,52 @@
+"""unique user_points.user_id
+
+Revision ID: 5f18f46646d1
+Revises: f7b4c10e7b74
+Create Date: 2026-10-18 09:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f18f46646d1'
+down_revision: Union[str, Sequence[str], None] = 'f7b4c10e7b74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fusionar saldos duplicados (creados por inserciones concurrentes) en la fila más antigua
+    op.execute(
+        """
+        UPDATE user_points up
+        JOIN (
+            SELECT user_id, MIN(id) AS keep_id, SUM(balance) AS total
+            FROM user_points
+            GROUP BY user_id
+            HAVING COUNT(*) > 1
+        ) d ON up.id = d.keep_id
+        SET up.balance = d.total
+        """
+    )
+    op.execute(
+        """
+        DELETE up FROM user_points up
+        JOIN (
+            SELECT user_id, MIN(id) AS keep_id
+            FROM user_points
+            GROUP BY user_id
+            HAVING COUNT(*) > 1
+        ) d ON up.user_id = d.user_id AND up.id <> d.keep_id
+        """
+    )
+    op.create_unique_constraint('uq_user_points_user_id', 'user_points', ['user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_user_points_user_id', 'user_points', type_='unique')
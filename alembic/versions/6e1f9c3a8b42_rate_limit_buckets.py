@@ -0,0 +1,33 @@
+"""rate_limit_buckets for the shared rate limiter
+
+Revision ID: 6e1f9c3a8b42
+Revises: 0b8e4a7c2d19
+Create Date: 2026-10-18 14:37:08.290114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1f9c3a8b42'
+down_revision: Union[str, Sequence[str], None] = '0b8e4a7c2d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_limit_buckets',
+    sa.Column('bucket_key', sa.String(length=191), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
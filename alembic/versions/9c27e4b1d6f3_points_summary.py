@@ -0,0 +1,66 @@
+"""points_summary and points_summary_motivos for the ranking
+
+Revision ID: 9c27e4b1d6f3
+Revises: 6e1f9c3a8b42
+Create Date: 2026-10-18 19:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c27e4b1d6f3'
+down_revision: Union[str, Sequence[str], None] = '6e1f9c3a8b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('points_summary',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ganados', sa.Integer(), nullable=False),
+    sa.Column('canjeados', sa.Integer(), nullable=False),
+    sa.Column('movimientos', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_points_summary_ranking', 'points_summary', ['ganados', 'user_id'], unique=False)
+    op.create_table('points_summary_motivos',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('motivo', sa.String(length=150), nullable=False),
+    sa.Column('veces', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'motivo')
+    )
+
+    # Carga inicial desde el historial (luego lo mantiene el ledger;
+    # python -m app.utils.ranking comprueba que cuadre)
+    op.execute("""
+        INSERT INTO points_summary (user_id, ganados, canjeados, movimientos, updated_at)
+        SELECT user_id,
+               COALESCE(SUM(CASE WHEN cambio >= 0 THEN cambio ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN cambio < 0 THEN -cambio ELSE 0 END), 0),
+               COUNT(*),
+               CURRENT_TIMESTAMP
+        FROM points_history
+        GROUP BY user_id
+    """)
+    op.execute("""
+        INSERT INTO points_summary_motivos (user_id, motivo, veces, total)
+        SELECT user_id, motivo, COUNT(*), SUM(cambio)
+        FROM points_history
+        GROUP BY user_id, motivo
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('points_summary_motivos')
+    op.drop_index('ix_points_summary_ranking', table_name='points_summary')
+    op.drop_table('points_summary')
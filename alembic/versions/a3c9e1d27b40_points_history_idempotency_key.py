@@ -0,0 +1,30 @@
+"""points_history idempotency_key
+
+Revision ID: a3c9e1d27b40
+Revises: 5f18f46646d1
+Create Date: 2026-10-18 10:03:12.541877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1d27b40'
+down_revision: Union[str, Sequence[str], None] = '5f18f46646d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('points_history', sa.Column('idempotency_key', sa.String(length=191), nullable=True))
+    op.create_index('ix_points_history_idempotency_key', 'points_history', ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_points_history_idempotency_key', table_name='points_history')
+    op.drop_column('points_history', 'idempotency_key')
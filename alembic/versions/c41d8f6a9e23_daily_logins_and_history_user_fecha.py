@@ -0,0 +1,46 @@
+"""daily_logins table and points_history (user_id, fecha) index
+
+Revision ID: c41d8f6a9e23
+Revises: a3c9e1d27b40
+Create Date: 2026-10-18 10:48:55.203114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8f6a9e23'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e1d27b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_logins',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+    sa.PrimaryKeyConstraint('user_id', 'fecha')
+    )
+    op.create_index('ix_points_history_user_fecha', 'points_history', ['user_id', 'fecha'])
+
+    # Rellenar con los premios de login ya registrados
+    op.execute(
+        """
+        INSERT IGNORE INTO daily_logins (user_id, fecha)
+        SELECT user_id, DATE(fecha)
+        FROM points_history
+        WHERE motivo = 'Login diario' AND fecha IS NOT NULL
+        GROUP BY user_id, DATE(fecha)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_points_history_user_fecha', table_name='points_history')
+    op.drop_table('daily_logins')
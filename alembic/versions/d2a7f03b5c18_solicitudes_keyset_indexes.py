@@ -0,0 +1,30 @@
+"""solicitudes keyset indexes
+
+Revision ID: d2a7f03b5c18
+Revises: c41d8f6a9e23
+Create Date: 2026-10-18 11:30:07.884290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f03b5c18'
+down_revision: Union[str, Sequence[str], None] = 'c41d8f6a9e23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_solicitudes_estado_id', 'solicitudes', ['estado', 'id'])
+    op.create_index('ix_solicitudes_user_id_id', 'solicitudes', ['user_id', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_solicitudes_user_id_id', table_name='solicitudes')
+    op.drop_index('ix_solicitudes_estado_id', table_name='solicitudes')
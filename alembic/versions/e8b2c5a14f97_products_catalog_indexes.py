@@ -0,0 +1,39 @@
+"""products catalog indexes
+
+Revision ID: e8b2c5a14f97
+Revises: d2a7f03b5c18
+Create Date: 2026-10-18 12:21:44.630518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2c5a14f97'
+down_revision: Union[str, Sequence[str], None] = 'd2a7f03b5c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_products_category_price': ['category', 'price', 'id'],
+    'ix_products_category_created': ['category', 'created_at', 'id'],
+    'ix_products_category_stock': ['category', 'stock', 'id'],
+    'ix_products_price': ['price', 'id'],
+    'ix_products_created': ['created_at', 'id'],
+    'ix_products_stock': ['stock', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'products', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in INDEXES:
+        op.drop_index(name, table_name='products')
@@ -0,0 +1,30 @@
+"""products fulltext index
+
+Revision ID: f3d61b9e0a5c
+Revises: e8b2c5a14f97
+Create Date: 2026-10-18 13:05:19.027744
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3d61b9e0a5c'
+down_revision: Union[str, Sequence[str], None] = 'e8b2c5a14f97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ft_products_name_description', 'products', ['name', 'description'], mysql_prefix='FULLTEXT'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ft_products_name_description', table_name='products')
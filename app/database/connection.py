@@ -1,13 +1,26 @@
 # -------------------------------
-# Conexión a MySQL
+# Conexión a MySQL (async)
 # -------------------------------
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+# Un único engine async de SQLAlchemy 2.0 sobre aiomysql para toda la app
+# y los scripts. `database` expone la misma API que usaban los routers
+# (fetch_one, fetch_all, fetch_val, execute, execute_many, iterate,
+# transaction, after_commit) y mide el uso del pool.
+import logging
 import os
+import re
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
 from dotenv import load_dotenv
+from fastapi import Depends
+from sqlalchemy import MetaData, TextClause, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configuración de BD
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "Ujcv2025!")
@@ -15,17 +28,240 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME", "ecomarketdb")
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL permite apuntar a otra BD (p. ej. sqlite+aiosqlite para benchmarks)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+)
+# URL síncrona equivalente para Alembic
+SYNC_DATABASE_URL = DATABASE_URL.replace("+aiomysql", "+pymysql").replace("+aiosqlite", "")
+
+# Pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # s esperando conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # < wait_timeout de MySQL
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# SQL compilado que guarda el engine (ver app/database/queries.py)
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+metadata = MetaData()
+
+
+def _engine_options() -> dict:
+    if DATABASE_URL.startswith("sqlite"):
+        # Varias peticiones escriben a la vez: esperar el bloqueo en vez de fallar
+        return {"connect_args": {"timeout": 30}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_async_engine(
+    DATABASE_URL, echo=False, query_cache_size=DB_QUERY_CACHE_SIZE, **_engine_options()
+)
+
+
+# text() no marca context.isinsert: se mira el propio SQL
+_ES_INSERT = re.compile(r"\s*INSERT\b", re.IGNORECASE)
+
+
+def _es_insert(stmt, result) -> bool:
+    if result.context.isinsert:
+        return True
+    return isinstance(stmt, TextClause) and bool(_ES_INSERT.match(stmt.text))
+
+
+def _statement(query, values: dict | None = None):
+    """Acepta SQL en texto (con :parametros) o construcciones de SQLAlchemy Core."""
+    if isinstance(query, str):
+        query = text(query)
+    return query, (values or {})
+
+
+class Database:
+    def __init__(self, engine):
+        self.engine = engine
+        # Conexión ligada a la transacción en curso (por tarea/petición)
+        self._conn: ContextVar[AsyncConnection | None] = ContextVar("db_conn", default=None)
+        # Acciones pendientes del commit de esa transacción (ver after_commit)
+        self._after_commit: ContextVar[list | None] = ContextVar("db_after_commit", default=None)
+        self._acquired = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---------- ciclo de vida ----------
+
+    async def connect(self) -> None:
+        """Comprueba que la BD responde (el pool abre conexiones bajo demanda)."""
+        async with self.connection() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def disconnect(self) -> None:
+        await self.engine.dispose()
+
+    async def create_all(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+
+    # ---------- conexiones ----------
+
+    @asynccontextmanager
+    async def connection(self):
+        """Reutiliza la conexión de la transacción actual o pide una al pool."""
+        current = self._conn.get()
+        if current is not None:
+            yield current
+            return
+
+        start = time.perf_counter()
+        conn = await self.engine.connect()
+        waited = time.perf_counter() - start
+        self._acquired += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        try:
+            yield conn
+            await conn.commit()
+        finally:
+            await conn.close()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Todas las consultas dentro del bloque usan una conexión y una transacción."""
+        current = self._conn.get()
+        if current is not None:
+            # Anidada: punto de guardado dentro de la transacción exterior
+            pendientes = self._after_commit.get()
+            antes = len(pendientes)
+            try:
+                async with current.begin_nested():
+                    yield current
+            except BaseException:
+                del pendientes[antes:]  # lo registrado en el savepoint deshecho no corre
+                raise
+            return
+
+        pendientes = []
+        async with self.connection() as conn:
+            token = self._conn.set(conn)
+            token_pendientes = self._after_commit.set(pendientes)
+            try:
+                async with conn.begin():
+                    yield conn
+            finally:
+                self._after_commit.reset(token_pendientes)
+                self._conn.reset(token)
+        self._run_after_commit(pendientes)
+
+    def after_commit(self, fn, *args) -> None:
+        """
+        Ejecuta fn(*args) cuando se confirme la transacción en curso (nada si
+        hace rollback), o ya mismo si no hay transacción. Para lo que vive
+        fuera de la BD (índices en memoria, cachés) y no debe ver datos sin
+        confirmar.
+        """
+        pendientes = self._after_commit.get()
+        if pendientes is None:
+            self._run_after_commit([(fn, args)])
+        else:
+            pendientes.append((fn, args))
+
+    @staticmethod
+    def _run_after_commit(pendientes: list) -> None:
+        # El commit ya está hecho: un fallo aquí no debe convertirlo en error
+        for fn, args in pendientes:
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("Fallo en after_commit (%s)", getattr(fn, "__name__", fn))
+
+    # ---------- consultas ----------
+
+    async def fetch_all(self, query, values: dict | None = None):
+        stmt, params = _statement(query, values)
+        async with self.connection() as conn:
+            result = await conn.execute(stmt, params)
+            return result.mappings().all()
+
+    async def fetch_one(self, query, values: dict | None = None):
+        stmt, params = _statement(query, values)
+        async with self.connection() as conn:
+            result = await conn.execute(stmt, params)
+            return result.mappings().first()
+
+    async def fetch_val(self, query, values: dict | None = None):
+        stmt, params = _statement(query, values)
+        async with self.connection() as conn:
+            result = await conn.execute(stmt, params)
+            return result.scalar()
+
+    async def execute(self, query, values: dict | None = None):
+        """INSERT → id generado; UPDATE/DELETE (o INSERT sin id) → filas afectadas."""
+        stmt, params = _statement(query, values)
+        async with self.connection() as conn:
+            result = await conn.execute(stmt, params)
+            if _es_insert(stmt, result) and result.lastrowid:
+                return result.lastrowid
+            return result.rowcount
+
+    async def execute_many(self, query, values: list[dict]) -> None:
+        stmt, _ = _statement(query)
+        async with self.connection() as conn:
+            await conn.execute(stmt, values)
+
+    async def iterate(self, query, values: dict | None = None):
+        """Recorre el resultado con un cursor del lado del servidor (sin cargarlo entero)."""
+        stmt, params = _statement(query, values)
+        async with self.connection() as conn:
+            result = await conn.stream(stmt, params)
+            async for row in result.mappings():
+                yield row
+
+    async def iterate_batches(self, query, values: dict | None = None, size: int = 1000):
+        """Como iterate(), pero entrega listas de hasta `size` filas (un fetchmany cada una)."""
+        stmt, params = _statement(query, values)
+        async with self.connection() as conn:
+            result = await conn.stream(stmt.execution_options(yield_per=size), params)
+            async for batch in result.mappings().partitions():
+                yield batch
+
+    # ---------- métricas ----------
+
+    def pool_stats(self) -> dict:
+        pool = self.engine.pool
+        stats = {
+            "acquired": self._acquired,
+            "wait_total": round(self._wait_total, 6),
+            "wait_max": round(self._wait_max, 6),
+            "wait_avg": round(self._wait_total / self._acquired, 6) if self._acquired else 0.0,
+        }
+        if hasattr(pool, "checkedout"):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+                max_overflow=DB_MAX_OVERFLOW,
+            )
+        return stats
+
+
+database = Database(engine)
+
+
+# -------------------------------
+# Dependencia por petición
+# -------------------------------
+async def get_db():
+    """Liga una conexión y una transacción a la petición: commit al salir, rollback si falla."""
+    async with database.transaction() as conn:
+        yield conn
 
-# Crear engine y Base
-engine = create_engine(DATABASE_URL, echo=False)
-Base = declarative_base()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Función para obtener sesión
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# scope="function": el commit ocurre antes de enviar la respuesta, no después
+request_transaction = Depends(get_db, scope="function")
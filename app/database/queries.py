@@ -0,0 +1,208 @@
+# -------------------------------
+# Consultas precompiladas (las más frecuentes)
+# -------------------------------
+# Se construyen una sola vez al importar, con parámetros ligados
+# (bindparam) en lugar de valores. Así cada petición no reconstruye la
+# expresión de SQLAlchemy y la clave de caché sale siempre igual, por lo
+# que el SQL compilado se reutiliza desde la caché del engine.
+#
+# Los nombres de parámetro de los UPDATE no coinciden con columnas de la
+# tabla (SQLAlchemy los trataría como columnas a actualizar).
+#
+#   await database.fetch_one(queries.USER_BY_USERNAME, {"usuario": username})
+from sqlalchemy import bindparam, func, select
+
+from app.database.tables import (
+    users,
+    products,
+    solicitudes,
+    user_points,
+    points_history,
+    points_history_keys,
+    points_history_mensual,
+    rewards,
+    daily_logins,
+    points_summary,
+    points_summary_motivos,
+)
+
+# ---------- usuarios ----------
+
+USER_BY_USERNAME = users.select().where(users.c.usuario == bindparam("usuario"))
+
+USER_BY_EMAIL = users.select().where(users.c.email == bindparam("email"))
+
+USER_BY_ID = users.select().where(users.c.id == bindparam("user_id"))
+
+# Rutas de admin sensibles: rol y versión vigentes del token
+USER_SESSION_CHECK = select(users.c.role, users.c.token_version).where(
+    users.c.id == bindparam("user_id")
+)
+
+# Cuáles de estos ids existen (operaciones por lotes)
+USERS_EXISTENTES = select(users.c.id).where(users.c.id.in_(bindparam("ids", expanding=True)))
+
+# INSERT IGNORE sobre (user_id, fecha): 1 fila afectada = primer login del día
+DAILY_LOGIN_INSERT = (
+    daily_logins.insert()
+    .prefix_with("IGNORE", dialect="mysql")
+    .prefix_with("OR IGNORE", dialect="sqlite")  # BD de benchmarks
+)
+
+# ---------- puntos ----------
+
+SALDO_BY_USER = select(user_points.c.balance).where(user_points.c.user_id == bindparam("user_id"))
+
+# Solo columnas de ix_points_history_user_fecha_desc (+ id, que va en la
+# PK): se resuelve en el índice y lee `limit` entradas por partición
+HISTORIAL_RECIENTE = (
+    select(
+        points_history.c.id,
+        points_history.c.cambio,
+        points_history.c.motivo,
+        points_history.c.referencia,
+        points_history.c.fecha,
+    )
+    .where(points_history.c.user_id == bindparam("user_id"))
+    .order_by(points_history.c.fecha.desc())
+    .limit(bindparam("limit"))
+)
+
+# Meses archivados del usuario (totales por mes, más reciente primero)
+HISTORIAL_MENSUAL = (
+    select(
+        points_history_mensual.c.mes,
+        func.sum(points_history_mensual.c.veces).label("movimientos"),
+        func.sum(points_history_mensual.c.ganados).label("ganados"),
+        func.sum(points_history_mensual.c.canjeados).label("canjeados"),
+    )
+    .where(points_history_mensual.c.user_id == bindparam("user_id"))
+    .group_by(points_history_mensual.c.mes)
+    .order_by(points_history_mensual.c.mes.desc())
+    .limit(bindparam("limit"))
+)
+
+# Parámetros: user_id, cambio, motivo, referencia
+HISTORY_INSERT = points_history.insert()
+
+# Claves de idempotencia ya aplicadas de una lista
+HISTORY_KEYS_IN = select(points_history_keys.c.idempotency_key).where(
+    points_history_keys.c.idempotency_key.in_(bindparam("keys", expanding=True))
+)
+
+# Saldos de varios usuarios; bloquea las filas hasta el commit
+SALDOS_FOR_UPDATE = (
+    select(user_points.c.user_id, user_points.c.balance)
+    .where(user_points.c.user_id.in_(bindparam("ids", expanding=True)))
+    .with_for_update()
+)
+
+# Los créditos usan ledger.sumar_saldos (upsert según el dialecto)
+
+# Solo descuenta si alcanza el saldo; si no, no toca ninguna fila
+SALDO_DEBIT = (
+    user_points.update()
+    .where(user_points.c.user_id == bindparam("uid"), user_points.c.balance >= bindparam("costo"))
+    .values(balance=user_points.c.balance - bindparam("costo"))
+)
+
+# ---------- ranking (points_summary) ----------
+
+# Orden del índice (ganados, user_id) recorrido al revés
+RANKING_PAGE = (
+    select(
+        points_summary.c.user_id,
+        users.c.nombre_completo,
+        points_summary.c.ganados,
+        points_summary.c.canjeados,
+    )
+    .select_from(points_summary.join(users, users.c.id == points_summary.c.user_id))
+    .order_by(points_summary.c.ganados.desc(), points_summary.c.user_id.desc())
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+
+# Puesto de competición: 1 + usuarios con más puntos ganados
+RANKING_PUESTO = select(func.count() + 1).where(points_summary.c.ganados > bindparam("ganados"))
+
+RANKING_TOTAL = select(func.count()).select_from(points_summary)
+
+RESUMEN_BY_USER = points_summary.select().where(points_summary.c.user_id == bindparam("user_id"))
+
+RESUMEN_MOTIVOS = (
+    select(points_summary_motivos.c.motivo, points_summary_motivos.c.veces, points_summary_motivos.c.total)
+    .where(points_summary_motivos.c.user_id == bindparam("user_id"))
+    .order_by(points_summary_motivos.c.veces.desc())
+)
+
+# ---------- recompensas ----------
+
+REWARDS_ACTIVOS = (
+    rewards.select().where(rewards.c.activo == True).order_by(rewards.c.puntos_necesarios)
+)
+
+REWARD_ACTIVO_BY_ID = rewards.select().where(
+    rewards.c.id == bindparam("reward_id"), rewards.c.activo == True
+)
+
+# ---------- solicitudes ----------
+
+MIS_SOLICITUDES = (
+    select(
+        solicitudes.c.id,
+        solicitudes.c.producto,
+        solicitudes.c.cantidad,
+        solicitudes.c.descripcion,
+        solicitudes.c.tipo,
+        solicitudes.c.estado,
+    )
+    .where(solicitudes.c.user_id == bindparam("user_id"))
+    .order_by(solicitudes.c.id.desc())
+)
+
+# Dueño y email de la solicitud; bloquea la fila hasta el commit
+SOLICITUD_OWNER_FOR_UPDATE = (
+    select(solicitudes.c.user_id, users.c.email)
+    .select_from(solicitudes.join(users, users.c.id == solicitudes.c.user_id))
+    .where(solicitudes.c.id == bindparam("solicitud_id"))
+    .with_for_update(of=solicitudes)
+)
+
+# Solo cuenta como cambio si el estado anterior era otro
+SOLICITUD_SET_ESTADO = (
+    solicitudes.update()
+    .where(
+        solicitudes.c.id == bindparam("solicitud_id"),
+        solicitudes.c.estado != bindparam("nuevo_estado"),
+    )
+    .values(estado=bindparam("nuevo_estado"))
+)
+
+# Lo mismo para un lote de ids (estado actual incluido)
+SOLICITUDES_OWNER_FOR_UPDATE = (
+    select(solicitudes.c.id, solicitudes.c.user_id, solicitudes.c.estado, users.c.email)
+    .select_from(solicitudes.join(users, users.c.id == solicitudes.c.user_id))
+    .where(solicitudes.c.id.in_(bindparam("ids", expanding=True)))
+    .with_for_update(of=solicitudes)
+)
+
+SOLICITUDES_SET_ESTADO = (
+    solicitudes.update()
+    .where(
+        solicitudes.c.id.in_(bindparam("ids", expanding=True)),
+        solicitudes.c.estado != bindparam("nuevo_estado"),
+    )
+    .values(estado=bindparam("nuevo_estado"))
+)
+
+# ---------- productos ----------
+
+PRODUCT_BY_ID = products.select().where(products.c.id == bindparam("product_id"))
+
+
+HOT_QUERIES = {
+    name: value
+    for name, value in globals().items()
+    if name.isupper() and name != "HOT_QUERIES" and hasattr(value, "compile")
+}
+
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import DateTime, Float, Table, Column, Integer, String, ForeignKey
+from sqlalchemy import Date, DateTime, Float, Table, Column, Integer, String, ForeignKey, Index
 from .connection import metadata
 
 users = Table(
@@ -11,6 +11,8 @@ users = Table(
     Column("email", String(100), unique=True),
     Column("password", String(255)),
     Column("role", String(20), default="user"),
+    # Se incrementa para revocar los tokens de sesión emitidos antes
+    Column("token_version", Integer, nullable=False, default=0, server_default="0"),
 )
 
 products = Table(
@@ -26,6 +28,14 @@ products = Table(
     Column("owner_id", Integer),
     Column("image_url", String(255)),
     Column("created_at", DateTime, default=datetime.utcnow),
+    # Índices del catálogo: filtro por categoría + orden keyset (columna, id)
+    Index("ix_products_category_price", "category", "price", "id"),
+    Index("ix_products_category_created", "category", "created_at", "id"),
+    Index("ix_products_category_stock", "category", "stock", "id"),
+    Index("ix_products_price", "price", "id"),
+    Index("ix_products_created", "created_at", "id"),
+    Index("ix_products_stock", "stock", "id"),
+    Index("ft_products_name_description", "name", "description", mysql_prefix="FULLTEXT"),
 )
 
 clients = Table(
@@ -59,6 +69,8 @@ solicitudes = Table(
     Column("estado", String(50), default="pendiente"),  # igual que en la BD
     # columna fecha eliminada para coincidir con la tabla real
     Column("tipo", String(20), nullable=False),
+    Index("ix_solicitudes_estado_id", "estado", "id"),
+    Index("ix_solicitudes_user_id_id", "user_id", "id"),
 )
 
 points = Table(
@@ -78,7 +90,7 @@ user_points = Table(
     "user_points",
     metadata,
     Column("id", Integer, primary_key=True),
-    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, unique=True),
     Column("balance", Integer, nullable=False, default=0),
     Column("updated_at", DateTime, default=datetime.utcnow, onupdate=datetime.utcnow),
 )
@@ -94,14 +106,93 @@ rewards = Table(
     Column("created_at", DateTime, default=datetime.utcnow),
 )
 
+# En MySQL la migración 2b7d4e9a1c56 la particiona por mes (RANGE COLUMNS
+# sobre fecha): la PK pasa a ser (id, fecha) y no lleva FK ni UNIQUE, que
+# MySQL no admite en tablas particionadas. Aquí queda la forma que crea
+# create_all (sin particiones) para desarrollo y benchmarks.
 points_history = Table(
     "points_history",
     metadata,
     Column("id", Integer, primary_key=True),
-    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("user_id", Integer, nullable=False),
     Column("cambio", Integer, nullable=False),  # positivo = gana; negativo = canjea
     Column("motivo", String(150), nullable=False),
     Column("referencia", String(100)),          # id de solicitud, etc. opcional
-    Column("fecha", DateTime, default=datetime.utcnow),
+    Column("idempotency_key", String(191)),     # la unicidad la da points_history_keys
+    Column("fecha", DateTime, nullable=False, default=datetime.utcnow),
 )
 
+# Cubre "últimos N movimientos del usuario" sin leer la fila: se recorre el
+# índice desde la fecha más reciente y se para en N
+Index(
+    "ix_points_history_user_fecha_desc",
+    points_history.c.user_id,
+    points_history.c.fecha.desc(),
+    points_history.c.cambio,
+    points_history.c.motivo,
+    points_history.c.referencia,
+)
+
+# Claves de idempotencia de points_history (evita premios duplicados). Tabla
+# aparte y sin particionar: la unicidad vale para todo el historial, también
+# para los meses ya archivados
+points_history_keys = Table(
+    "points_history_keys",
+    metadata,
+    Column("idempotency_key", String(191), primary_key=True),
+    Column("fecha", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+# Resumen mensual de los meses archivados de points_history (lo escribe
+# app/utils/history_archive.py antes de sacar la partición). Sin FK, como
+# el historial que resume
+points_history_mensual = Table(
+    "points_history_mensual",
+    metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("mes", Date, primary_key=True),  # primer día del mes
+    Column("motivo", String(150), primary_key=True),
+    Column("veces", Integer, nullable=False, default=0),
+    Column("ganados", Integer, nullable=False, default=0),
+    Column("canjeados", Integer, nullable=False, default=0),  # en positivo
+)
+
+# Un registro por usuario y día con premio de login (clave compacta)
+daily_logins = Table(
+    "daily_logins",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("fecha", Date, primary_key=True),
+)
+
+# Cubos del limitador de intentos (backend "mysql" de rate_limit)
+rate_limit_buckets = Table(
+    "rate_limit_buckets",
+    metadata,
+    Column("bucket_key", String(191), primary_key=True),  # "ip:..." / "user:..."
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),  # epoch en segundos
+)
+
+# Resumen por usuario que mantiene el ledger en la misma transacción que
+# cada movimiento (ranking y estadísticas sin agregar points_history)
+points_summary = Table(
+    "points_summary",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("ganados", Integer, nullable=False, default=0),
+    Column("canjeados", Integer, nullable=False, default=0),  # en positivo
+    Column("movimientos", Integer, nullable=False, default=0),
+    Column("updated_at", DateTime, default=datetime.utcnow),
+    # Ranking: ORDER BY ganados DESC, user_id DESC (recorrido inverso del índice)
+    Index("ix_points_summary_ranking", "ganados", "user_id"),
+)
+
+points_summary_motivos = Table(
+    "points_summary_motivos",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("motivo", String(150), primary_key=True),
+    Column("veces", Integer, nullable=False, default=0),
+    Column("total", Integer, nullable=False, default=0),
+)
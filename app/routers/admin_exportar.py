@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import os
+from contextlib import aclosing
+from datetime import date, datetime, time, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.database.connection import database
+from app.database.tables import users, points_history, solicitudes, products
+from app.utils.security import require_admin_verified
+
+router = APIRouter()
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "2000"))  # filas por fetchmany / chunk
+
+
+# -----------------------
+# Qué se puede exportar
+# -----------------------
+# columnas (nunca password), columna de fecha y columna de usuario para filtrar
+EXPORTABLES = {
+    "users": {
+        "columns": [users.c.id, users.c.nombre_completo, users.c.usuario, users.c.email, users.c.role],
+        "fecha": None,
+        "usuario": users.c.id,
+    },
+    "points_history": {
+        "columns": list(points_history.c),
+        "fecha": points_history.c.fecha,
+        "usuario": points_history.c.user_id,
+    },
+    "solicitudes": {
+        "columns": list(solicitudes.c),
+        "fecha": None,
+        "usuario": solicitudes.c.user_id,
+    },
+    "products": {
+        "columns": list(products.c),
+        "fecha": products.c.created_at,
+        "usuario": products.c.owner_id,
+    },
+}
+
+
+def _query(recurso: str, desde: date | None, hasta: date | None, user_id: int | None):
+    spec = EXPORTABLES[recurso]
+    query = select(*spec["columns"]).order_by(spec["columns"][0])  # por id: recorre la PK
+
+    if (desde or hasta) and spec["fecha"] is None:
+        raise HTTPException(status_code=400, detail=f"{recurso} no tiene fecha para filtrar")
+    if desde:
+        query = query.where(spec["fecha"] >= datetime.combine(desde, time.min))
+    if hasta:
+        # `hasta` incluye el día completo
+        query = query.where(spec["fecha"] < datetime.combine(hasta + timedelta(days=1), time.min))
+    if user_id is not None:
+        query = query.where(spec["usuario"] == user_id)
+    return query, [c.name for c in spec["columns"]]
+
+
+# -----------------------
+# Formatos (un chunk por lote de filas)
+# -----------------------
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+async def _csv_chunks(batches, columns: list[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        writer.writerows([row[c] for c in columns] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def _ndjson_chunks(batches, columns: list[str]):
+    dumps = json.JSONEncoder(ensure_ascii=False, default=_json_default).encode
+    async for batch in batches:
+        yield "".join(dumps(dict(row)) + "\n" for row in batch).encode()
+
+
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", _csv_chunks),
+    "ndjson": ("application/x-ndjson", _ndjson_chunks),
+}
+
+
+async def _stream(query, columns: list[str], formato: str):
+    # aclosing: si el cliente corta la descarga se cierra el cursor y se libera la conexión
+    async with aclosing(database.iterate_batches(query, size=EXPORT_BATCH_ROWS)) as batches:
+        async for chunk in FORMATOS[formato][1](batches, columns):
+            yield chunk
+
+
+# -----------------------
+# ADMIN - exportar (streaming, memoria constante)
+# -----------------------
+@router.get("/admin/export/{recurso}")
+async def exportar(
+    recurso: str,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    desde: date | None = None,
+    hasta: date | None = None,
+    user_id: int | None = None,
+    admin=Depends(require_admin_verified),
+):
+    if recurso not in EXPORTABLES:
+        raise HTTPException(status_code=404, detail="Recurso no exportable")
+
+    query, columns = _query(recurso, desde, hasta, user_id)
+    filename = f"{recurso}-{date.today():%Y%m%d}.{formato}"
+    return StreamingResponse(
+        _stream(query, columns, formato),
+        media_type=FORMATOS[formato][0],
+        headers={
+            "content-disposition": f'attachment; filename="{filename}"',
+            "cache-control": "no-store",
+        },
+    )
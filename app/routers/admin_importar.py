@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse
+from app.utils.importer import FORMATOS, IMPORTABLES, IMPORT_CHUNK_ROWS, ImportJob, formato_de, import_jobs
+from app.utils.security import require_admin_verified
+
+router = APIRouter()
+
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_CHUNK = 1024 * 1024
+
+
+async def _guardar(archivo: UploadFile) -> str:
+    """Copia la subida a un archivo temporal por bloques (el job lo lee después)."""
+    fd, path = tempfile.mkstemp(prefix="import-", suffix=os.path.splitext(archivo.filename or "")[1])
+    total = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while block := await archivo.read(UPLOAD_CHUNK):
+                total += len(block)
+                if total > IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Archivo demasiado grande")
+                f.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+# -----------------------
+# ADMIN - importación masiva (job en segundo plano)
+# -----------------------
+# Los jobs viven en el proceso que recibió la subida: con varios workers de
+# uvicorn, el progreso se consulta en ese mismo worker (o con la CLI).
+@router.post("/admin/import/{recurso}", status_code=202)
+async def importar(
+    recurso: str,
+    archivo: UploadFile = File(...),
+    formato: str | None = Query(None, pattern="^(csv|json)$"),
+    lote: int = Query(IMPORT_CHUNK_ROWS, ge=1, le=5000),
+    admin=Depends(require_admin_verified),
+):
+    if recurso not in IMPORTABLES:
+        raise HTTPException(status_code=404, detail="Recurso no importable")
+
+    nombre = archivo.filename or f"{recurso}.{FORMATOS[0]}"
+    path = await _guardar(archivo)
+    job = import_jobs.submit(ImportJob(recurso, path, formato_de(nombre, formato), nombre, lote))
+    return JSONResponse(
+        status_code=202,
+        content=job.to_dict(errores=False),
+        headers={"location": f"/admin/import/jobs/{job.id}"},
+    )
+
+
+@router.get("/admin/import/jobs")
+async def listar_jobs(admin=Depends(require_admin_verified)):
+    return {"jobs": [job.to_dict(errores=False) for job in import_jobs.recientes()]}
+
+
+@router.get("/admin/import/jobs/{job_id}")
+async def estado_job(job_id: str, admin=Depends(require_admin_verified)):
+    job = import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job.to_dict()
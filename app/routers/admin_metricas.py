@@ -0,0 +1,69 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.database.connection import database
+from app.utils.award_queue import award_queue
+from app.utils.metrics import metrics
+from app.utils import prometheus
+from app.utils.rate_limit import rate_limiter
+from app.utils.response_cache import response_cache
+from app.utils.security import require_admin, hash_pool_stats
+from app.utils.templates import page_cache
+
+# Si se define, /metrics exige "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+router = APIRouter()
+
+
+# -----------------------
+# ADMIN - métricas del proceso
+# -----------------------
+@router.get("/admin/metrics")
+async def ver_metricas(admin=Depends(require_admin)):
+    # Por ruta: peticiones, media, p95 y consultas por petición (N+1 salta a la vista)
+    return {
+        "routes": metrics.table(),
+        "db_pool": database.pool_stats(),
+        "hash_pool": hash_pool_stats(),
+        "award_queue": award_queue.stats(),
+        "response_cache": response_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "page_cache": page_cache.stats(),
+    }
+
+
+@router.delete("/admin/metrics")
+async def reiniciar_metricas(admin=Depends(require_admin)):
+    metrics.reset()
+    return {"message": "Métricas reiniciadas"}
+
+
+# -----------------------
+# Prometheus
+# -----------------------
+@prometheus.registry.collector
+def _estado_del_proceso():
+    pool = database.pool_stats()
+    for state in ("checked_out", "checked_in", "overflow", "size"):
+        if state in pool:
+            prometheus.DB_POOL.set(state, value=pool[state])
+    prometheus.DB_POOL_WAIT.set(value=pool["wait_total"])
+    prometheus.DB_POOL_ACQUIRED.set(value=pool["acquired"])
+
+    bcrypt = hash_pool_stats()
+    prometheus.BCRYPT_PENDING.set(value=bcrypt["pending"])
+    prometheus.BCRYPT_REJECTED.set(value=bcrypt["rejected"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metricas_prometheus(request: Request):
+    if METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="No autorizado")
+    return PlainTextResponse(
+        prometheus.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
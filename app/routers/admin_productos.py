@@ -1,6 +1,10 @@
 # admin_products.py
-from fastapi import APIRouter, Depends, HTTPException
-from app.database.connection import database
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from app.database import queries
+from app.database.connection import database, request_transaction
+from app.utils.catalog import query_catalog
+from app.utils.response_cache import response_cache
+from app.utils.search import index_product, unindex_product
 from app.utils.security import require_admin
 from pydantic import BaseModel
 from typing import Optional
@@ -24,10 +28,36 @@ class ProductBase(BaseModel):
 #  GET - todos
 # -----------------------
 @router.get("/all")
-async def get_all_products(user=Depends(require_admin)):
-    query = "SELECT * FROM products"
-    productos = await database.fetch_all(query)
-    return productos
+async def get_all_products(
+    request: Request,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: bool = False,
+    sort: str = "id",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    user=Depends(require_admin),
+):
+    async def load():
+        return await query_catalog(
+            "admin",
+            category=category,
+            status=status,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    # Una entrada por combinación de filtros/cursor
+    key = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return await response_cache.json_response(request, "products", key, load)
 
 
 # -----------------------
@@ -35,8 +65,7 @@ async def get_all_products(user=Depends(require_admin)):
 # -----------------------
 @router.get("/{id}")
 async def get_product(id: int, user=Depends(require_admin)):
-    query = "SELECT * FROM products WHERE id = :id"
-    producto = await database.fetch_one(query, values={"id": id})
+    producto = await database.fetch_one(queries.PRODUCT_BY_ID, {"product_id": id})
     if not producto:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     return producto
@@ -54,6 +83,8 @@ async def create_product(data: ProductBase, user=Depends(require_admin)):
     """
 
     new_id = await database.execute(query, data.dict())
+    index_product({**data.dict(), "id": new_id})
+    response_cache.bump("products")
 
     return {
         "msg": "Producto creado",
@@ -64,17 +95,9 @@ async def create_product(data: ProductBase, user=Depends(require_admin)):
 # -----------------------
 #  PUT - actualizar
 # -----------------------
-@router.put("/{id}")
+@router.put("/{id}", dependencies=[request_transaction])
 async def update_product(id: int, data: ProductBase, user=Depends(require_admin)):
 
-    # Verificar que exista
-    existing = await database.fetch_one(
-        "SELECT * FROM products WHERE id = :id",
-        values={"id": id}
-    )
-    if not existing:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-
     query = """
         UPDATE products
         SET 
@@ -91,7 +114,13 @@ async def update_product(id: int, data: ProductBase, user=Depends(require_admin)
     values = data.dict()
     values["id"] = id
 
-    await database.execute(query, values)
+    # Filas encontradas = 0 → no existe (sin SELECT previo)
+    if not await database.execute(query, values):
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+    # Tras el commit: el índice y la caché no deben ver datos sin confirmar
+    database.after_commit(index_product, values)
+    database.after_commit(response_cache.bump, "products")
 
     return {"msg": "Producto actualizado"}
 
@@ -99,20 +128,17 @@ async def update_product(id: int, data: ProductBase, user=Depends(require_admin)
 # -----------------------
 #  DELETE - eliminar
 # -----------------------
-@router.delete("/{id}")
+@router.delete("/{id}", dependencies=[request_transaction])
 async def delete_product(id: int, user=Depends(require_admin)):
 
-    existing = await database.fetch_one(
-        "SELECT * FROM products WHERE id = :id",
+    eliminadas = await database.execute(
+        "DELETE FROM products WHERE id = :id",
         values={"id": id}
     )
-
-    if not existing:
+    if not eliminadas:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
-    await database.execute(
-        "DELETE FROM products WHERE id = :id",
-        values={"id": id}
-    )
+    database.after_commit(unindex_product, id)
+    database.after_commit(response_cache.bump, "products")
 
     return {"msg": "Producto eliminado"}
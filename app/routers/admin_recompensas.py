@@ -1,11 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, Form
-from app.database.connection import database
-from app.database.tables import user_points, rewards, points_history, users
-from app.utils.security import require_admin
+from pydantic import BaseModel, Field
+from app.database import queries
+from app.database.connection import database, request_transaction
+from app.database.tables import rewards
+from app.utils.security import require_admin, require_admin_verified
+from app.utils import ledger
+from app.utils.response_cache import response_cache
 
 router = APIRouter()
 
 
+class Ajuste(BaseModel):
+    user_id: int
+    cambio: int
+    motivo: str = Field(min_length=1, max_length=150)
+    idempotency_key: str | None = Field(None, max_length=150)  # reintentos seguros
+
+
+class AjustesLote(BaseModel):
+    ajustes: list[Ajuste] = Field(min_length=1, max_length=ledger.ADMIN_BATCH_MAX)
+
+
 @router.get("/admin/rewards")
 async def list_rewards(admin=Depends(require_admin)):
     rows = await database.fetch_all(rewards.select().order_by(rewards.c.id.desc()))
@@ -28,10 +43,11 @@ async def create_reward(
             activo=activo,
         )
     )
+    response_cache.bump("rewards")
     return {"ok": True}
 
 
-@router.post("/admin/rewards/{reward_id}")
+@router.post("/admin/rewards/{reward_id}", dependencies=[request_transaction])
 async def update_reward(
     reward_id: int,
     nombre: str = Form(...),
@@ -40,11 +56,7 @@ async def update_reward(
     activo: bool = Form(True),
     admin=Depends(require_admin),
 ):
-    row = await database.fetch_one(rewards.select().where(rewards.c.id == reward_id))
-    if not row:
-        raise HTTPException(status_code=404, detail="Recompensa no encontrada")
-
-    await database.execute(
+    actualizadas = await database.execute(
         rewards.update()
         .where(rewards.c.id == reward_id)
         .values(
@@ -54,58 +66,48 @@ async def update_reward(
             activo=activo,
         )
     )
+    if not actualizadas:
+        raise HTTPException(status_code=404, detail="Recompensa no encontrada")
+
+    # Tras el commit, para que nadie vuelva a cachear la versión vieja
+    database.after_commit(response_cache.bump, "rewards")
     return {"ok": True}
 
 
-@router.delete("/admin/rewards/{reward_id}")
+@router.delete("/admin/rewards/{reward_id}", dependencies=[request_transaction])
 async def delete_reward(reward_id: int, admin=Depends(require_admin)):
-    row = await database.fetch_one(rewards.select().where(rewards.c.id == reward_id))
-    if not row:
+    if not await database.execute(rewards.delete().where(rewards.c.id == reward_id)):
         raise HTTPException(status_code=404, detail="Recompensa no encontrada")
 
-    await database.execute(rewards.delete().where(rewards.c.id == reward_id))
+    database.after_commit(response_cache.bump, "rewards")
     return {"ok": True}
 
 
-@router.post("/admin/users/{user_id}/ajustar-puntos")
+@router.post("/admin/users/{user_id}/ajustar-puntos", dependencies=[request_transaction])
 async def ajustar_puntos(
     user_id: int,
     cambio: int = Form(...),
     motivo: str = Form(...),
-    admin=Depends(require_admin),
+    admin=Depends(require_admin_verified),
 ):
     # comprobar usuario
-    user_row = await database.fetch_one(users.select().where(users.c.id == user_id))
+    user_row = await database.fetch_one(queries.USER_BY_ID, {"user_id": user_id})
     if not user_row:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    # saldo actual
-    saldo_row = await database.fetch_one(user_points.select().where(user_points.c.user_id == user_id))
-    balance = saldo_row["balance"] if saldo_row else 0
-    nuevo_balance = balance + cambio
-
-    if nuevo_balance < 0:
+    # saldo + historial en una sola transacción
+    try:
+        nuevo_balance = await ledger.apply_change(user_id, cambio, motivo, "ajuste_admin")
+    except ledger.SaldoInsuficiente:
         raise HTTPException(status_code=400, detail="El saldo no puede ser negativo")
 
-    if saldo_row:
-        await database.execute(
-            user_points.update()
-            .where(user_points.c.id == saldo_row["id"])
-            .values(balance=nuevo_balance)
-        )
-    else:
-        await database.execute(
-            user_points.insert().values(user_id=user_id, balance=nuevo_balance)
-        )
+    return {"ok": True, "nuevo_balance": nuevo_balance}
 
-    # historial
-    await database.execute(
-        points_history.insert().values(
-            user_id=user_id,
-            cambio=cambio,
-            motivo=motivo,
-            referencia="ajuste_admin",
-        )
-    )
 
-    return {"ok": True, "nuevo_balance": nuevo_balance}
+# Varios ajustes en una transacción (un INSERT multi-fila + un upsert por
+# usuario). Un ajuste inválido se reporta en su resultado y no frena al resto
+@router.post("/admin/users/ajustar-puntos", dependencies=[request_transaction])
+async def ajustar_puntos_lote(data: AjustesLote, admin=Depends(require_admin_verified)):
+    resultados = await ledger.adjust_batch([a.model_dump() for a in data.ajustes])
+    aplicados = sum(1 for r in resultados if r["estado"] == "aplicado")
+    return {"ok": True, "aplicados": aplicados, "resultados": resultados}
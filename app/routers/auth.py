@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Request, Form, HTTPException, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from datetime import datetime
 from starlette.status import HTTP_303_SEE_OTHER
 
+from app.database import queries
 from app.database.connection import database
-from app.database.tables import users, points_history
-from app.utils.security import hash_password, verify_password
-from app.utils.points import add_points
+from app.database.tables import users
+from app.utils.security import hash_password_async, verify_password_async
+from app.utils.award_queue import award_queue
+from app.utils.session import set_session_cookie, clear_session_cookie
+from app.utils.templates import render_page
 
 router = APIRouter(tags=["Auth"])
-templates = Jinja2Templates(directory="templates")
 
 
 # -------------------------------
@@ -18,7 +19,7 @@ templates = Jinja2Templates(directory="templates")
 # -------------------------------
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return render_page(request, "login.html")
 
 
 # -------------------------------
@@ -26,8 +27,7 @@ async def login_page(request: Request):
 # -------------------------------
 @router.post("/login")
 async def login(request: Request, username: str = Form(...), password: str = Form(...)):
-    query = users.select().where(users.c.usuario == username)
-    user = await database.fetch_one(query)
+    user = await database.fetch_one(queries.USER_BY_USERNAME, {"usuario": username})
 
     if not user:
         return RedirectResponse(
@@ -35,7 +35,7 @@ async def login(request: Request, username: str = Form(...), password: str = For
             status_code=HTTP_303_SEE_OTHER
         )
     
-    if not verify_password(password, user["password"]):
+    if not await verify_password_async(password, user["password"]):
         return RedirectResponse(
             url="/auth/login?error=ContraseñaIncorrecta",
             status_code=HTTP_303_SEE_OTHER
@@ -43,26 +43,22 @@ async def login(request: Request, username: str = Form(...), password: str = For
 
 # ➕ Puntos por login diario (+2 puntos si es su primer login del día)
     today = datetime.now().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    last_login_today = await database.fetch_one(
-        points_history.select().where(
-            (points_history.c.user_id == user["id"]) &
-            (points_history.c.motivo == "Login diario") &
-            (points_history.c.fecha >= today_start)  # ← CAMBIO AQUÍ
-        )
+
+    # INSERT IGNORE sobre la clave (user_id, fecha): 1 fila = primer login de hoy
+    first_login_today = await database.execute(
+        queries.DAILY_LOGIN_INSERT, {"user_id": user["id"], "fecha": today}
     )
-    
-    if not last_login_today:
-        await add_points(user["id"], 2, "Login diario", "login")
 
-    # Login exitoso → crear cookie
+    if first_login_today:
+        await award_queue.award(
+            user["id"], 2, "Login diario", "login", key=f"login:{user['id']}:{today}"
+        )
+
+    # Login exitoso → cookie con el token de sesión firmado
     redirect_url = "/menu" if user["role"] == "admin" else "/"
 
     response = RedirectResponse(url=redirect_url, status_code=HTTP_303_SEE_OTHER)
-    response.set_cookie(key="user_id", value=str(user["id"]), httponly=True)
-    response.set_cookie(key="user_name", value=user["usuario"], httponly=True)
-    response.set_cookie(key="role", value=user["role"], httponly=True)
+    set_session_cookie(response, user)
     return response
 
 
@@ -71,7 +67,7 @@ async def login(request: Request, username: str = Form(...), password: str = For
 # -------------------------------
 @router.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return render_page(request, "register.html")
 
 
 # -------------------------------
@@ -88,19 +84,15 @@ async def register_user(
     if password != confirmPassword:
         raise HTTPException(status_code=400, detail="Las contraseñas no coinciden")
 
-    existing_user = await database.fetch_one(
-        users.select().where(users.c.usuario == username)
-    )
+    existing_user = await database.fetch_one(queries.USER_BY_USERNAME, {"usuario": username})
     if existing_user:
         raise HTTPException(status_code=400, detail="El usuario ya existe")
     
-    existing_email = await database.fetch_one(
-        users.select().where(users.c.email == email)
-    )
+    existing_email = await database.fetch_one(queries.USER_BY_EMAIL, {"email": email})
     if existing_email:
         raise HTTPException(status_code=400, detail="El email ya está registrado")
 
-    hashed_password = hash_password(password)
+    hashed_password = await hash_password_async(password)
 
     # Guardar usuario y obtener id
     user_id = await database.execute(
@@ -114,7 +106,9 @@ async def register_user(
     )
 
     # ➕ Puntos por registro (+20 puntos)
-    await add_points(user_id, 20, "Registro de cuenta", "registro")
+    await award_queue.award(
+        user_id, 20, "Registro de cuenta", "registro", key=f"registro:{user_id}"
+    )
 
     return RedirectResponse(url="/auth/login", status_code=HTTP_303_SEE_OTHER)
 
@@ -125,7 +119,5 @@ async def register_user(
 @router.get("/logout")
 async def logout():
     redirect = RedirectResponse(url="/", status_code=303)
-    redirect.delete_cookie("user_id")
-    redirect.delete_cookie("user_name")
-    redirect.delete_cookie("role")
+    clear_session_cookie(redirect)
     return redirect
@@ -1,36 +1,81 @@
-from fastapi import APIRouter, Request, Depends
-from fastapi.templating import Jinja2Templates
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Request, Depends, Query
 from fastapi.responses import HTMLResponse
-from app.database.connection import database
+from app.utils.catalog import query_catalog
+from app.utils.search import search_products
+from app.utils.templates import templates
 from app.utils.security import get_current_user  # Importamos la función para obtener el usuario
 
 router = APIRouter(prefix="/products", tags=["Productos Usuario"])
-templates = Jinja2Templates(directory="templates")
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    offset: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=50),
+):
+    # Resultados ordenados por relevancia
+    result = await search_products(q, offset, limit)
+    return {"q": q, "offset": offset, "limit": limit, **result}
+
+
+def _precio(valor: str | None) -> float | None:
+    """Los <input type="number"> vacíos llegan como "": sin filtro."""
+    if valor is None or not valor.strip():
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        return None
 
 
 @router.get("/", response_class=HTMLResponse)
 async def list_products(
     request: Request,
     category: str = None,
+    min_price: str | None = None,
+    max_price: str | None = None,
+    in_stock: bool = False,
+    sort: str = "id",
+    order: str = "desc",
+    cursor: str = None,
     user=Depends(get_current_user)  # Obtener usuario actual
 ):
-    base_query = "SELECT * FROM products"
-    values = {}
+    min_price, max_price = _precio(min_price), _precio(max_price)
 
-    # Filtro dinámico por categoría
-    if category:
-        base_query += " WHERE category = :category"
-        values["category"] = category
+    # Página del catálogo (filtros y orden resueltos en MySQL)
+    page = await query_catalog(
+        "tienda",
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        sort=sort,
+        order=order,
+        cursor=cursor,
+    )
 
-    # Ejecutar consulta
-    productos = await database.fetch_all(base_query, values=values)
+    # Enlace a la siguiente página conservando los filtros
+    next_url = None
+    if page["next_cursor"]:
+        params = {k: v for k, v in request.query_params.items() if k != "cursor"}
+        params["cursor"] = page["next_cursor"]
+        next_url = "/products/?" + urlencode(params)
 
     return templates.TemplateResponse(
         "products.html",
         {
             "request": request,
-            "products": productos,
+            "products": page["items"],
             "category": category,
+            "min_price": min_price,
+            "max_price": max_price,
+            "in_stock": in_stock,
+            "sort": sort,
+            "order": order,
+            "next_url": next_url,
             "user": user  # Pasamos el usuario al template
         }
     )
@@ -1,15 +1,54 @@
-from fastapi import APIRouter, Form, Depends, HTTPException
+from fastapi import APIRouter, Form, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
 from app.database.connection import database
 from app.database.tables import points
+from app.utils.geo import get_point_index, point_index
+from app.utils.response_cache import response_cache
 from app.utils.security import require_admin
 
 router = APIRouter()
 
+# Mismos campos que el formulario de create_point (lo usa la importación masiva)
+class PointBase(BaseModel):
+    nombre: str
+    direccion: str
+    lat: float = Field(ge=-90, le=90)
+    lng: float = Field(ge=-180, le=180)
+
 # GET todos los puntos → usuarios y admin
 @router.get("/puntos", tags=["Puntos"])
-async def get_points():
-    result = await database.fetch_all(points.select())
-    return {"points": [dict(r) for r in result]}
+async def get_points(request: Request):
+    async def load():
+        result = await database.fetch_all(points.select())
+        return {"points": [dict(r) for r in result]}
+
+    # JSON precalculado + ETag; se invalida al crear/editar/borrar
+    return await response_cache.json_response(request, "puntos", "all", load)
+
+# GET puntos cercanos a una posición (ordenados por distancia)
+@router.get("/puntos/cercanos", tags=["Puntos"])
+async def get_nearby_points(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radio: float = Query(5.0, gt=0, le=100),  # km
+    limit: int = Query(20, ge=1, le=100),
+):
+    index = await get_point_index()
+    return {"points": index.nearby(lat, lng, radio, limit)}
+
+# GET puntos dentro del área visible del mapa
+@router.get("/puntos/bbox", tags=["Puntos"])
+async def get_points_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(500, ge=1, le=2000),
+):
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Rectángulo inválido")
+    index = await get_point_index()
+    return {"points": index.bbox(min_lat, min_lng, max_lat, max_lng, limit)}
 
 # POST crear punto → solo admin
 @router.post("/puntos", tags=["Puntos"])
@@ -22,6 +61,8 @@ async def create_point(
 ):
     query = points.insert().values(nombre=nombre, direccion=direccion, lat=lat, lng=lng)
     last_id = await database.execute(query)
+    response_cache.bump("puntos")
+    point_index.upsert({"id": last_id, "nombre": nombre, "direccion": direccion, "lat": lat, "lng": lng})
     return {"id": last_id, "nombre": nombre, "direccion": direccion, "lat": lat, "lng": lng}
 
 # PUT actualizar punto → solo admin
@@ -40,6 +81,8 @@ async def update_point(
     result = await database.execute(query)
     if not result:
         raise HTTPException(status_code=404, detail="Punto no encontrado")
+    response_cache.bump("puntos")
+    point_index.upsert({"id": point_id, "nombre": nombre, "direccion": direccion, "lat": lat, "lng": lng})
     return {"msg": "Punto actualizado"}
 
 # DELETE → solo admin
@@ -49,4 +92,6 @@ async def delete_point(point_id: int, user=Depends(require_admin)):
     result = await database.execute(query)
     if not result:
         raise HTTPException(status_code=404, detail="Punto no encontrado")
+    response_cache.bump("puntos")
+    point_index.remove(point_id)
     return {"msg": "Punto eliminado"}
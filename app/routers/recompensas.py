@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 
-from app.database.connection import database
-from app.database.tables import user_points, rewards, points_history
+from app.database import queries
+from app.database.connection import database, request_transaction
 from app.utils.security import require_login
+from app.utils import ledger, ranking
+from app.utils.response_cache import response_cache
+from app.utils.templates import render_page
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 PUNTOS_POR_SOLICITUD_APROBADA = 10  # lo usarás luego en solicitudes_admin si quieres
@@ -15,84 +16,87 @@ PUNTOS_POR_SOLICITUD_APROBADA = 10  # lo usarás luego en solicitudes_admin si q
 
 @router.get("/recompensas", response_class=HTMLResponse)
 async def recompensas_page(request: Request, user=Depends(require_login)):
-    return templates.TemplateResponse(
-        "recompensas.html",
-        {"request": request, "user": user},
-    )
+    return render_page(request, "recompensas.html", user)
 
 
-@router.get("/recompensas/mis-datos")
+@router.get("/recompensas/mis-datos", dependencies=[request_transaction])
 async def mis_datos_recompensas(user=Depends(require_login)):
     user_id = user["id"]
 
     # saldo actual
-    saldo_query = user_points.select().where(user_points.c.user_id == user_id)
-    saldo_row = await database.fetch_one(saldo_query)
-    balance = saldo_row["balance"] if saldo_row else 0
+    balance = await database.fetch_val(queries.SALDO_BY_USER, {"user_id": user_id}) or 0
 
     # historial (últimos 20 movimientos)
-    hist_query = (
-        points_history
-        .select()
-        .where(points_history.c.user_id == user_id)
-        .order_by(points_history.c.fecha.desc())
-        .limit(20)
+    historial = await database.fetch_all(
+        queries.HISTORIAL_RECIENTE, {"user_id": user_id, "limit": 20}
     )
-    historial = await database.fetch_all(hist_query)
 
-    # catálogo de recompensas activas
-    rewards_query = rewards.select().where(rewards.c.activo == True).order_by(rewards.c.puntos_necesarios)
-    catalogo = await database.fetch_all(rewards_query)
+    # catálogo de recompensas activas (igual para todos: se cachea por versión)
+    async def load_catalogo():
+        return [dict(r) for r in await database.fetch_all(queries.REWARDS_ACTIVOS)]
+
+    catalogo = await response_cache.get_or_load("rewards", "activos", load_catalogo)
 
     return {
         "balance": balance,
         "historial": [dict(r) for r in historial],
-        "rewards": [dict(r) for r in catalogo],
+        "rewards": catalogo.data,
     }
 
 
-@router.post("/recompensas/canjear/{reward_id}")
+# Meses que ya salieron de points_history (history_archive.py): totales
+# por mes desde el resumen mensual
+@router.get("/recompensas/historial-mensual")
+async def historial_mensual(
+    meses: int = Query(12, ge=1, le=120),
+    user=Depends(require_login),
+):
+    rows = await database.fetch_all(
+        queries.HISTORIAL_MENSUAL, {"user_id": user["id"], "limit": meses}
+    )
+    return {"meses": [dict(r) for r in rows]}
+
+
+# Ranking por puntos ganados. Se sirve desde response_cache sin bump en cada
+# movimiento (cambia a cada premio): la página vive RESPONSE_CACHE_TTL s
+@router.get("/recompensas/ranking")
+async def ranking_puntos(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    user=Depends(require_login),
+):
+    async def load():
+        return await ranking.pagina(limit, offset)
+
+    return await response_cache.json_response(request, "ranking", f"{limit}:{offset}", load)
+
+
+@router.get("/recompensas/ranking/yo")
+async def mi_ranking(user=Depends(require_login)):
+    return await ranking.mi_puesto(user["id"])
+
+
+@router.post("/recompensas/canjear/{reward_id}", dependencies=[request_transaction])
 async def canjear_recompensa(reward_id: int, user=Depends(require_login)):
     user_id = user["id"]
 
     # verificar recompensa
-    reward_row = await database.fetch_one(
-        rewards.select().where(rewards.c.id == reward_id, rewards.c.activo == True)
-    )
+    reward_row = await database.fetch_one(queries.REWARD_ACTIVO_BY_ID, {"reward_id": reward_id})
     if not reward_row:
         raise HTTPException(status_code=404, detail="Recompensa no encontrada")
 
     puntos_necesarios = reward_row["puntos_necesarios"]
 
-    # saldo actual
-    saldo_row = await database.fetch_one(user_points.select().where(user_points.c.user_id == user_id))
-    balance = saldo_row["balance"] if saldo_row else 0
-
-    if balance < puntos_necesarios:
-        raise HTTPException(status_code=400, detail="No tienes puntos suficientes")
-
-    # restar puntos (transacción simple)
-    nuevo_balance = balance - puntos_necesarios
-    if saldo_row:
-        await database.execute(
-            user_points.update()
-            .where(user_points.c.id == saldo_row["id"])
-            .values(balance=nuevo_balance)
+    # descontar puntos + historial en una sola transacción (sin sobregiro)
+    try:
+        nuevo_balance = await ledger.debit(
+            user_id,
+            puntos_necesarios,
+            f"Canje de recompensa #{reward_id}",
+            str(reward_id),
         )
-    else:
-        # por seguridad, aunque si no hay fila no debería tener puntos
-        await database.execute(
-            user_points.insert().values(user_id=user_id, balance=nuevo_balance)
-        )
-
-    # guardar en historial
-    await database.execute(
-        points_history.insert().values(
-            user_id=user_id,
-            cambio=-puntos_necesarios,
-            motivo=f"Canje de recompensa #{reward_id}",
-            referencia=str(reward_id),
-        )
-    )
+    except ledger.SaldoInsuficiente:
+        raise HTTPException(status_code=400, detail="No tienes puntos suficientes")
 
     return {"ok": True, "nuevo_balance": nuevo_balance}
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from app.database.connection import database
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select
+from app.database import queries
+from app.database.connection import database, request_transaction
 from app.database.tables import solicitudes, users
 from app.utils.security import require_login, require_admin
-from app.utils.points import add_points
+from app.utils.award_queue import award_queue
+from app.utils import ledger
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.prometheus import SOLICITUDES_CREATED, SOLICITUDES_APPROVED, record_points
 
 
 router = APIRouter(tags=["Solicitudes"])
@@ -16,18 +21,21 @@ class SolicitudCreate(BaseModel):
     tipo: str  # donar, intercambiar, comprar
 
 
+class EstadoLote(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=ledger.ADMIN_BATCH_MAX)
+    estado: str
+
+
+ESTADOS = ["pendiente", "aprobado", "rechazado"]
+PUNTOS_APROBADA = 10
+
+
 # -----------------------
 # GET mis solicitudes
 # -----------------------
 @router.get("/mis-solicitudes")
 async def mis_solicitudes(user=Depends(require_login)):
-    query = """
-        SELECT id, producto, cantidad, descripcion, tipo, estado
-        FROM solicitudes
-        WHERE user_id = :user_id
-        ORDER BY id DESC
-    """
-    result = await database.fetch_all(query, values={"user_id": user["id"]})
+    result = await database.fetch_all(queries.MIS_SOLICITUDES, {"user_id": user["id"]})
     return result
 
 
@@ -57,8 +65,13 @@ async def crear_solicitud(
         )
     )
 
+    SOLICITUDES_CREATED.inc(solicitud_data.tipo)
+
     # ➕ Puntos por crear solicitud (+5 puntos)
-    await add_points(user["id"], 5, "Creación de solicitud", str(solicitud_id))
+    await award_queue.award(
+        user["id"], 5, "Creación de solicitud", str(solicitud_id),
+        key=f"solicitud:{solicitud_id}",
+    )
 
     return {
         "message": "Solicitud enviada",
@@ -68,66 +81,176 @@ async def crear_solicitud(
 
 
 # -----------------------
-# ADMIN - listar solicitudes
+# ADMIN - listar solicitudes (paginación por cursor)
 # -----------------------
+def _cursor_id(cursor: str) -> int:
+    try:
+        return int(decode_cursor(cursor)["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
 @router.get("/admin/all")
-async def todas_solicitudes_admin(admin=Depends(require_admin)):
-    query = """
-        SELECT s.id, u.email, s.producto, s.cantidad, s.descripcion, s.tipo, s.estado
-        FROM solicitudes s
-        JOIN users u ON u.id = s.user_id
-        ORDER BY s.id DESC
-    """
-    return await database.fetch_all(query)
+async def todas_solicitudes_admin(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    estado: str | None = None,
+    tipo: str | None = None,
+    email: str | None = None,
+    admin=Depends(require_admin),
+):
+    # Filtros comunes a la página y a los totales
+    filtros = []
+    if tipo:
+        filtros.append(solicitudes.c.tipo == tipo)
+    if email:
+        # El comodín va en el valor ligado, así el prefijo puede usar el índice de email
+        prefijo = email.replace("/", "//").replace("%", "/%").replace("_", "/_")
+        filtros.append(users.c.email.like(prefijo + "%", escape="/"))
+
+    origen = solicitudes.join(users, users.c.id == solicitudes.c.user_id)
+
+    page_query = (
+        select(
+            solicitudes.c.id,
+            users.c.email,
+            solicitudes.c.producto,
+            solicitudes.c.cantidad,
+            solicitudes.c.descripcion,
+            solicitudes.c.tipo,
+            solicitudes.c.estado,
+        )
+        .select_from(origen)
+        .where(*filtros)
+        .order_by(solicitudes.c.id.desc())
+        .limit(limit + 1)  # una fila extra para saber si hay siguiente página
+    )
+    if estado:
+        page_query = page_query.where(solicitudes.c.estado == estado)
+    if cursor:
+        page_query = page_query.where(solicitudes.c.id < _cursor_id(cursor))
+
+    rows = await database.fetch_all(page_query)
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = encode_cursor({"id": items[-1]["id"]}) if len(rows) > limit else None
+
+    # Totales por estado (solo en la primera página, en una sola consulta)
+    totales = None
+    if not cursor:
+        totales_query = (
+            select(solicitudes.c.estado, func.count().label("total"))
+            .select_from(origen if email else solicitudes)
+            .where(*filtros)
+            .group_by(solicitudes.c.estado)
+        )
+        totales = {r["estado"]: r["total"] for r in await database.fetch_all(totales_query)}
+
+    return {"items": items, "next_cursor": next_cursor, "totales": totales}
 
 
 # -----------------------
 # ADMIN - cambiar estado (+10 puntos si se aprueba)
 # -----------------------
-@router.put("/admin/estado/{id}")
+@router.put("/admin/estado/{id}", dependencies=[request_transaction])
 async def cambiar_estado(id: int, data: dict, admin=Depends(require_admin)):
     nuevo_estado = data.get("estado")
-    if nuevo_estado not in ["pendiente", "aprobado", "rechazado"]:
+    if nuevo_estado not in ESTADOS:
         raise HTTPException(status_code=400, detail="Estado inválido")
 
-    # Obtener solicitud actual (con user_id y estado anterior)
+    # Dueño y email en una sola consulta (bloquea la fila hasta el commit)
     solicitud_actual = await database.fetch_one(
-        solicitudes.select().where(solicitudes.c.id == id)
+        queries.SOLICITUD_OWNER_FOR_UPDATE, {"solicitud_id": id}
     )
     if not solicitud_actual:
         raise HTTPException(status_code=404, detail="Solicitud no encontrada")
 
-    # Obtener email del usuario
-    q_user = """
-        SELECT u.email
-        FROM solicitudes s
-        JOIN users u ON s.user_id = u.id
-        WHERE s.id = :id
-    """
-    result = await database.fetch_one(q_user, {"id": id})
-    if not result:
-        raise HTTPException(status_code=404, detail="Solicitud no encontrada")
-
-    # Cambiar estado
-    await database.execute(
-        solicitudes.update().where(solicitudes.c.id == id).values(estado=nuevo_estado)
+    # Solo cuenta como cambio si el estado anterior era otro
+    cambiadas = await database.execute(
+        queries.SOLICITUD_SET_ESTADO, {"solicitud_id": id, "nuevo_estado": nuevo_estado}
     )
 
-    # ➕ Puntos solo si se APRUEBA (y no estaba aprobada antes)
+    # ➕ Puntos solo si se APRUEBA (y no estaba aprobada antes). Se escriben
+    # en la misma transacción que el cambio de estado: si no hay commit, no
+    # hay puntos (la cola de premios los aplicaría aunque hubiera rollback)
     puntos_ganados = 0
-    if nuevo_estado == "aprobado" and solicitud_actual["estado"] != "aprobado":
-        await add_points(
-            solicitud_actual["user_id"],
-            10,
-            "Solicitud aprobada",
-            str(id)
-        )
-        puntos_ganados = 10
+    if nuevo_estado == "aprobado" and cambiadas:
+        aplicados = await ledger.apply_batch([{
+            "user_id": solicitud_actual["user_id"],
+            "cambio": PUNTOS_APROBADA,
+            "motivo": "Solicitud aprobada",
+            "referencia": str(id),
+            "idempotency_key": f"aprobada:{id}",
+        }])
+        for m in aplicados:
+            record_points(m["cambio"], m["motivo"], m["referencia"])
+            puntos_ganados = PUNTOS_APROBADA
+        SOLICITUDES_APPROVED.inc()
 
     return {
         "message": "Estado actualizado",
         "solicitud_id": id,
         "nuevo_estado": nuevo_estado,
         "puntos_ganados": puntos_ganados,
-        "usuario_email": result["email"]
+        "usuario_email": solicitud_actual["email"]
+    }
+
+
+# -----------------------
+# ADMIN - cambiar estado por lotes
+# -----------------------
+# Todo el lote en una transacción: un SELECT ... FOR UPDATE, un UPDATE para
+# las que cambian, un INSERT multi-fila en el historial y un upsert de saldo
+# por usuario. Misma clave de premio que cambiar_estado ("aprobada:{id}"):
+# repetir el lote, o aprobar una que ya se aprobó antes, no vuelve a dar puntos.
+@router.put("/admin/estado", dependencies=[request_transaction])
+async def cambiar_estado_lote(data: EstadoLote, admin=Depends(require_admin)):
+    if data.estado not in ESTADOS:
+        raise HTTPException(status_code=400, detail="Estado inválido")
+
+    ids = list(dict.fromkeys(data.ids))
+    actuales = {
+        r["id"]: r
+        for r in await database.fetch_all(queries.SOLICITUDES_OWNER_FOR_UPDATE, {"ids": ids})
+    }
+    cambian = [i for i in ids if i in actuales and actuales[i]["estado"] != data.estado]
+    if cambian:
+        await database.execute(
+            queries.SOLICITUDES_SET_ESTADO, {"ids": cambian, "nuevo_estado": data.estado}
+        )
+
+    cambiadas = set(cambian)
+    premiadas = set()
+    if data.estado == "aprobado" and cambian:
+        aplicados = await ledger.apply_batch([
+            {
+                "user_id": actuales[i]["user_id"],
+                "cambio": PUNTOS_APROBADA,
+                "motivo": "Solicitud aprobada",
+                "referencia": str(i),
+                "idempotency_key": f"aprobada:{i}",
+            }
+            for i in cambian
+        ])
+        premiadas = {int(m["referencia"]) for m in aplicados}
+        for m in aplicados:
+            record_points(m["cambio"], m["motivo"], m["referencia"])
+        SOLICITUDES_APPROVED.inc(amount=len(cambian))
+
+    resultados = []
+    for i in ids:
+        if i not in actuales:
+            resultados.append({"solicitud_id": i, "resultado": "no_encontrada"})
+            continue
+        resultados.append({
+            "solicitud_id": i,
+            "resultado": "actualizada" if i in cambiadas else "sin_cambios",
+            "puntos_ganados": PUNTOS_APROBADA if i in premiadas else 0,
+            "usuario_email": actuales[i]["email"],
+        })
+
+    return {
+        "nuevo_estado": data.estado,
+        "actualizadas": len(cambian),
+        "puntos_otorgados": PUNTOS_APROBADA * len(premiadas),
+        "resultados": resultados,
     }
@@ -1,20 +1,20 @@
 from fastapi import APIRouter, Request, Form, HTTPException, Depends
 from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
 
+from app.database import queries
 from app.database.connection import database
 from app.database.tables import users
-from app.utils.security import require_admin, hash_password
-from app.utils.points import add_points
+from app.utils.security import require_admin_verified, hash_password_async
+from app.utils.award_queue import award_queue
+from app.utils.templates import render_page
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 # GET /register → muestra formulario HTML
 @router.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return render_page(request, "register.html")
 
 
 # POST /register-form → procesa formulario de registro
@@ -31,9 +31,9 @@ async def register_form(
         raise HTTPException(status_code=400, detail="Las contraseñas no coinciden")
 
     # Validar duplicados
-    if await database.fetch_one(users.select().where(users.c.usuario == username)):
+    if await database.fetch_one(queries.USER_BY_USERNAME, {"usuario": username}):
         raise HTTPException(status_code=400, detail="Usuario ya existe")
-    if await database.fetch_one(users.select().where(users.c.email == email)):
+    if await database.fetch_one(queries.USER_BY_EMAIL, {"email": email}):
         raise HTTPException(status_code=400, detail="Correo ya registrado")
 
     # Guardar usuario y obtener id
@@ -42,13 +42,15 @@ async def register_form(
             nombre_completo=fullname,
             usuario=username,
             email=email,
-            password=hash_password(password),
+            password=await hash_password_async(password),
             role="user",
         )
     )
 
     # ➕ Puntos por registro
-    await add_points(user_id, 20, "Registro de cuenta", "registro")
+    await award_queue.award(
+        user_id, 20, "Registro de cuenta", "registro", key=f"registro:{user_id}"
+    )
 
     return RedirectResponse(url="/auth/login", status_code=303)
 
@@ -56,7 +58,7 @@ async def register_form(
 # ====== ADMIN: CRUD USUARIOS ======
 
 @router.get("/admin/users")
-async def admin_list_users(admin=Depends(require_admin)):
+async def admin_list_users(admin=Depends(require_admin_verified)):
     query = users.select().order_by(users.c.id.desc())
     result = await database.fetch_all(query)
     return [dict(r) for r in result]
@@ -70,12 +72,12 @@ async def admin_create_user(
     email: str = Form(...),
     password: str = Form(...),
     role: str = Form(...),
-    admin=Depends(require_admin),
+    admin=Depends(require_admin_verified),
 ):
     # Validar duplicados
-    if await database.fetch_one(users.select().where(users.c.usuario == usuario)):
+    if await database.fetch_one(queries.USER_BY_USERNAME, {"usuario": usuario}):
         raise HTTPException(status_code=400, detail="Usuario ya existe")
-    if await database.fetch_one(users.select().where(users.c.email == email)):
+    if await database.fetch_one(queries.USER_BY_EMAIL, {"email": email}):
         raise HTTPException(status_code=400, detail="Correo ya registrado")
 
     await database.execute(
@@ -83,7 +85,7 @@ async def admin_create_user(
             nombre_completo=nombre_completo,
             usuario=usuario,
             email=email,
-            password=hash_password(password),
+            password=await hash_password_async(password),
             role=role,
         )
     )
@@ -98,10 +100,10 @@ async def admin_update_user(
     email: str = Form(...),
     role: str = Form(...),
     password: str = Form(""),
-    admin=Depends(require_admin),
+    admin=Depends(require_admin_verified),
 ):
     # Comprobar que existe
-    existing = await database.fetch_one(users.select().where(users.c.id == user_id))
+    existing = await database.fetch_one(queries.USER_BY_ID, {"user_id": user_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
@@ -112,7 +114,7 @@ async def admin_update_user(
         "role": role,
     }
     if password.strip():
-        valores["password"] = hash_password(password)
+        valores["password"] = await hash_password_async(password)
 
     # Validar duplicados (usuario/email de otros ids)
     if await database.fetch_one(
@@ -124,6 +126,11 @@ async def admin_update_user(
     ):
         raise HTTPException(status_code=400, detail="Correo ya registrado")
 
+    # Cambio de rol o contraseña: los tokens emitidos antes dejan de valer
+    # en las rutas sensibles (nueva token_version)
+    if role != existing["role"] or "password" in valores:
+        valores["token_version"] = users.c.token_version + 1
+
     await database.execute(
         users.update().where(users.c.id == user_id).values(**valores)
     )
@@ -131,6 +138,8 @@ async def admin_update_user(
 
 
 @router.delete("/admin/users/{user_id}")
-async def admin_delete_user(user_id: int, admin=Depends(require_admin)):
+async def admin_delete_user(user_id: int, admin=Depends(require_admin_verified)):
+    # Sus cookies dejan de valer en cuanto la fila no existe: require_login
+    # y require_admin la comprueban en las rutas que escriben
     await database.execute(users.delete().where(users.c.id == user_id))
     return {"ok": True}
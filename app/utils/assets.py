@@ -0,0 +1,151 @@
+# -------------------------------
+# Archivos estáticos versionados
+# -------------------------------
+# `python -m app.utils.build_assets` copia static/ a static/dist/ con el
+# hash del contenido en el nombre (styles.3f2a1b9c0d.css), genera .br/.gz
+# de los archivos de texto y variantes WebP/AVIF de las imágenes, y escribe
+# static/dist/manifest.json.
+#
+# Las plantillas resuelven las rutas con static_url() / picture(): si hay
+# manifiesto devuelven la versión con hash (se cachea un año, "immutable");
+# si no, la ruta original, así que sin build todo sigue funcionando.
+#
+# StaticAssets sirve /static: elige la variante .br/.gz según
+# Accept-Encoding y añade Cache-Control. ETag, 304 y Range los resuelve
+# FileResponse de Starlette, que usa envío sin copia (http.response.pathsend)
+# cuando el servidor lo soporta; con uvicorn se lee por bloques.
+import json
+import logging
+import os
+from mimetypes import guess_type
+
+from markupsafe import Markup, escape
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
+STATIC_URL = "/static"
+STATIC_DIST = "dist"  # subdirectorio de STATIC_DIR con los archivos versionados
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "300"))  # archivos sin hash
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Solo se precomprimen los de texto; las imágenes ya van comprimidas
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".html", ".txt", ".map")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Manifiesto
+# -------------------------------
+# {"styles.css": {"file": "styles.3f2a1b9c0d.css", "width": null, "variants": {}},
+#  "images/reusar.jpg": {"file": "images/reusar.ab12cd34ef.jpg", "width": 1200,
+#                        "variants": {"webp": {"480": "images/reusar.ab12cd34ef.480w.webp", ...}}}}
+_manifest: dict[str, dict] = {}
+
+
+def load_manifest() -> int:
+    """Lee static/dist/manifest.json (si existe). Devuelve cuántos archivos lista."""
+    global _manifest
+    path = os.path.join(STATIC_DIR, STATIC_DIST, "manifest.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            _manifest = json.load(f)
+    except FileNotFoundError:
+        _manifest = {}
+    except ValueError:
+        logger.error("Manifiesto de estáticos inválido: %s", path)
+        _manifest = {}
+    return len(_manifest)
+
+
+def _dist_url(name: str) -> str:
+    return f"{STATIC_URL}/{STATIC_DIST}/{name}"
+
+
+def static_url(path: str) -> str:
+    """"images/reusar.jpg" → URL versionada (o /static/images/reusar.jpg sin build)."""
+    path = path.lstrip("/")
+    entry = _manifest.get(path)
+    if entry is None:
+        return f"{STATIC_URL}/{path}"
+    return _dist_url(entry["file"])
+
+
+def srcset(path: str, fmt: str) -> str:
+    """"url 480w, url 960w" de las variantes `fmt` (webp/avif) de una imagen."""
+    entry = _manifest.get(path.lstrip("/"))
+    variants = (entry or {}).get("variants", {}).get(fmt, {})
+    return ", ".join(f"{_dist_url(name)} {width}w" for width, name in sorted(variants.items(), key=lambda v: int(v[0])))
+
+
+def picture(path: str, alt: str = "", sizes: str = "100vw") -> Markup:
+    """<picture> con AVIF/WebP a varios anchos y la imagen original de respaldo."""
+    sources = []
+    for fmt in ("avif", "webp"):
+        candidates = srcset(path, fmt)
+        if candidates:
+            sources.append(
+                f'<source type="image/{fmt}" srcset="{escape(candidates)}" sizes="{escape(sizes)}">'
+            )
+    img = f'<img src="{escape(static_url(path))}" alt="{escape(alt)}">'
+    return Markup(f"<picture>{''.join(sources)}{img}</picture>")
+
+
+# -------------------------------
+# Handler de /static
+# -------------------------------
+def _accepted_encodings(headers: Headers) -> set[str]:
+    """Codificaciones de Accept-Encoding, sin las marcadas con q=0."""
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        if name.strip():
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticAssets(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {}
+        path, media_type = full_path, None
+
+        if full_path.endswith(COMPRESSIBLE):
+            headers["vary"] = "Accept-Encoding"
+            # Con Range se sirve el original: los rangos son sobre esos bytes
+            if "range" not in request_headers:
+                accepted = _accepted_encodings(request_headers)
+                for encoding, suffix in ENCODINGS:
+                    if encoding in accepted and os.path.isfile(full_path + suffix):
+                        path = full_path + suffix
+                        stat_result = os.stat(path)
+                        # El tipo es el del original (styles.css.br sigue siendo text/css)
+                        media_type = guess_type(full_path)[0] or "application/octet-stream"
+                        headers["content-encoding"] = encoding
+                        break
+
+        dist = os.path.join(os.path.abspath(STATIC_DIR), STATIC_DIST) + os.sep
+        if os.path.abspath(full_path).startswith(dist):
+            headers["cache-control"] = IMMUTABLE
+        else:
+            headers["cache-control"] = f"public, max-age={STATIC_MAX_AGE}"
+
+        response = FileResponse(
+            path, status_code=status_code, stat_result=stat_result, headers=headers, media_type=media_type
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+load_manifest()
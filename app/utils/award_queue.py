@@ -0,0 +1,219 @@
+# -------------------------------
+# Cola de premios de puntos (por lotes)
+# -------------------------------
+# Los premios automáticos (login, registro, solicitudes) no necesitan
+# escribirse en la misma petición: se encolan en memoria y se vuelcan en
+# lotes con un INSERT multi-fila en points_history y un upsert agregado por
+# usuario en user_points. Opcionalmente se respaldan en un archivo local
+# (spool) para no perderlos si el proceso se cae antes del volcado; el spool
+# se escribe en un hilo y los premios que llegan a la vez comparten fsync.
+#
+# Si la BD no da abasto y la cola llega a AWARD_PENDING_MAX, el premio se
+# escribe en el momento (como antes de la cola) en vez de seguir creciendo.
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+
+from app.utils import ledger
+from app.utils.prometheus import record_points
+
+logger = logging.getLogger(__name__)
+
+AWARD_FLUSH_SIZE = int(os.getenv("AWARD_FLUSH_SIZE", "200"))
+AWARD_FLUSH_INTERVAL = float(os.getenv("AWARD_FLUSH_INTERVAL", "1.0"))
+AWARD_SPOOL_PATH = os.getenv("AWARD_SPOOL_PATH", "")  # vacío = sin respaldo en disco
+AWARD_PENDING_MAX = int(os.getenv("AWARD_PENDING_MAX", "10000"))
+
+
+def idempotency_key(user_id: int, motivo: str, referencia: str | None) -> str:
+    """Clave por defecto: el mismo premio con la misma referencia solo cuenta una vez."""
+    return f"{user_id}:{motivo}:{referencia or ''}"[:191]
+
+
+class AwardQueue:
+    def __init__(
+        self,
+        flush_size: int = AWARD_FLUSH_SIZE,
+        flush_interval: float = AWARD_FLUSH_INTERVAL,
+        spool_path: str = AWARD_SPOOL_PATH,
+        pending_max: int = AWARD_PENDING_MAX,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.pending_max = pending_max
+        self._pending: dict[str, dict] = {}  # clave → evento (deduplica reintentos)
+        self._lock = asyncio.Lock()
+        self._spool_lock = asyncio.Lock()  # un solo escritor del archivo a la vez
+        self._spool_buffer: list[str] = []  # líneas aún sin escribir
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.flushed = 0
+        self.duplicates = 0
+        self.direct = 0  # escritos en el momento con la cola llena
+
+    # ---------- API ----------
+
+    async def award(
+        self,
+        user_id: int,
+        cambio: int,
+        motivo: str,
+        referencia: str | None = None,
+        key: str | None = None,
+    ) -> None:
+        """Encola un premio. `key` evita dobles premios si el evento se repite."""
+        event = {
+            "key": key or idempotency_key(user_id, motivo, referencia),
+            "user_id": user_id,
+            "cambio": cambio,
+            "motivo": motivo,
+            "referencia": referencia,
+            "fecha": datetime.utcnow().isoformat(),
+        }
+        if event["key"] in self._pending:
+            self.duplicates += 1
+            return
+
+        if len(self._pending) >= self.pending_max:
+            # Cola llena: escritura directa (si la BD falla, el error le llega
+            # al que premia en vez de acumular memoria)
+            for aplicado in await self._write_batch([event]):
+                record_points(aplicado["cambio"], aplicado["motivo"], aplicado["referencia"])
+            self.direct += 1
+            return
+
+        self._pending[event["key"]] = event
+        if self.spool_path:
+            await self._spool_append(event)
+
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        self._replay_spool()
+        self._task = asyncio.create_task(self._run())
+
+    async def drain(self) -> None:
+        """Detiene el volcado periódico y escribe todo lo pendiente."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._pending:
+            if not await self.flush():
+                logger.error("No se pudieron volcar %d premios pendientes", len(self._pending))
+                break
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "duplicates": self.duplicates,
+            "direct": self.direct,
+            "pending_max": self.pending_max,
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval,
+        }
+
+    # ---------- volcado ----------
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Escribe un lote en una sola transacción. Devuelve False si falló."""
+        async with self._lock:
+            if not self._pending:
+                return True
+
+            batch = list(self._pending.values())[: self.flush_size]
+            try:
+                aplicados = await self._write_batch(batch)
+            except Exception:
+                # Se reintenta en el siguiente ciclo; la clave impide duplicados
+                logger.exception("Error volcando %d premios", len(batch))
+                return False
+
+            for event in batch:
+                self._pending.pop(event["key"], None)
+            self.flushed += len(batch)
+            for event in aplicados:
+                record_points(event["cambio"], event["motivo"], event["referencia"])
+
+            if self.spool_path:
+                await self._spool_rewrite()
+            return True
+
+    async def _write_batch(self, batch: list[dict]) -> list[dict]:
+        """Aplica los premios que aún no estaban en el historial y los devuelve."""
+        # Descarta los ya aplicados (reintentos / spool reproducido) por la clave
+        return await ledger.apply_batch([
+            {
+                "user_id": e["user_id"],
+                "cambio": e["cambio"],
+                "motivo": e["motivo"],
+                "referencia": e["referencia"],
+                "idempotency_key": e["key"],
+                "fecha": datetime.fromisoformat(e["fecha"]),
+            }
+            for e in batch
+        ])
+
+    # ---------- spool en disco ----------
+
+    async def _spool_append(self, event: dict) -> None:
+        """Vuelve cuando el evento está en disco (fsync en un hilo)."""
+        self._spool_buffer.append(json.dumps(event) + "\n")
+        async with self._spool_lock:
+            if not self._spool_buffer:
+                return  # lo escribió quien tenía el turno, junto con los suyos
+            lines, self._spool_buffer = self._spool_buffer, []
+            await asyncio.to_thread(self._write_lines, self.spool_path, "a", lines)
+
+    async def _spool_rewrite(self) -> None:
+        async with self._spool_lock:
+            # Lo pendiente incluye lo que esperaba en el buffer
+            lines = [json.dumps(event) + "\n" for event in self._pending.values()]
+            self._spool_buffer = []
+            tmp = self.spool_path + ".tmp"
+            await asyncio.to_thread(self._write_lines, tmp, "w", lines)
+            await asyncio.to_thread(os.replace, tmp, self.spool_path)
+
+    @staticmethod
+    def _write_lines(path: str, mode: str, lines: list[str]) -> None:
+        with open(path, mode, encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_spool(self) -> None:
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # línea cortada por una caída a mitad de escritura
+                self._pending.setdefault(event["key"], event)
+        if self._pending:
+            logger.info("Recuperados %d premios del spool", len(self._pending))
+
+
+award_queue = AwardQueue()
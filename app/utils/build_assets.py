@@ -0,0 +1,158 @@
+# -------------------------------
+# Build de archivos estáticos
+# -------------------------------
+# Regenera static/dist/ a partir de static/:
+#   - copia cada archivo con el hash del contenido en el nombre
+#   - .gz (y .br si está instalado `brotli`) de los archivos de texto
+#   - variantes WebP/AVIF a varios anchos de las imágenes (necesita Pillow;
+#     AVIF solo si Pillow lo soporta)
+#   - manifest.json con las rutas originales → versionadas
+#
+# Se corre en el deploy, antes de arrancar uvicorn:
+#
+#   pip install Pillow brotli   # opcionales
+#   python -m app.utils.build_assets --anchos 480 960 1600
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from app.utils.assets import COMPRESSIBLE, STATIC_DIR, STATIC_DIST
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se genera .gz
+    brotli = None
+
+try:
+    from PIL import Image, features
+except ImportError:  # opcional: sin Pillow no hay variantes de imagen
+    Image = None
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+ANCHOS = (480, 960, 1600)
+CALIDAD = {"webp": 80, "avif": 55}
+
+
+def _hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            h.update(block)
+    return h.hexdigest()[:10]
+
+
+def _fuentes(src: str):
+    """Rutas relativas de static/ sin lo ya generado (dist/)."""
+    for root, dirs, files in os.walk(src):
+        if os.path.abspath(root) == os.path.abspath(src):
+            dirs[:] = [d for d in dirs if d != STATIC_DIST]
+        for name in sorted(files):
+            yield os.path.relpath(os.path.join(root, name), src).replace(os.sep, "/")
+
+
+def _precomprimir(path: str) -> None:
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0: el .gz sale igual en cada build (mismo ETag entre máquinas)
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def _formatos() -> list[str]:
+    formatos = ["webp"] if features.check("webp") else []
+    if features.check("avif"):
+        formatos.append("avif")
+    return formatos
+
+
+def _variantes(path: str, base: str, out: str, anchos) -> tuple[int, dict]:
+    """Genera las variantes redimensionadas; devuelve (ancho original, variantes)."""
+    variantes: dict[str, dict[str, str]] = {}
+    with Image.open(path) as img:
+        img.load()
+        ancho = img.width
+        if img.mode not in ("RGB", "RGBA"):
+            alpha = img.mode in ("LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if alpha else "RGB")
+        # Nunca agrandar; el original solo si no pasa del ancho máximo pedido
+        tamanos = {a for a in anchos if a < ancho}
+        if ancho <= max(anchos):
+            tamanos.add(ancho)
+        for w in sorted(tamanos):
+            alto = round(img.height * w / ancho)
+            resized = img if w == ancho else img.resize((w, alto), Image.LANCZOS)
+            for fmt in _formatos():
+                name = f"{base}.{w}w.{fmt}"
+                resized.save(os.path.join(out, name), fmt.upper(), quality=CALIDAD[fmt])
+                variantes.setdefault(fmt, {})[str(w)] = name
+    return ancho, variantes
+
+
+def build(src: str = STATIC_DIR, anchos=ANCHOS) -> dict:
+    out = os.path.join(src, STATIC_DIST)
+    # Se rehace completo: así no quedan versiones viejas sin usar
+    shutil.rmtree(out, ignore_errors=True)
+    manifest = {}
+
+    for rel in _fuentes(src):
+        path = os.path.join(src, rel)
+        stem, ext = os.path.splitext(rel)
+        base = f"{stem}.{_hash(path)}"
+        target = os.path.join(out, base + ext)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(path, target)
+
+        entry = {"file": base + ext, "width": None, "variants": {}}
+        if ext.lower() in COMPRESSIBLE:
+            _precomprimir(target)
+        elif ext.lower() in IMAGE_EXTENSIONS and Image is not None:
+            entry["width"], entry["variants"] = _variantes(path, base, out, anchos)
+        manifest[rel] = entry
+
+    with open(os.path.join(out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def _tamano(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def main(anchos) -> None:
+    if brotli is None:
+        print("⚠️  brotli no está instalado: solo se genera .gz")
+    if Image is None:
+        print("⚠️  Pillow no está instalado: sin variantes WebP/AVIF")
+    elif "avif" not in _formatos():
+        print("⚠️  Este Pillow no soporta AVIF: solo WebP")
+
+    inicio = time.perf_counter()
+    manifest = build(anchos=anchos)
+    out = os.path.join(STATIC_DIR, STATIC_DIST)
+
+    print(f"📦 {len(manifest)} archivos en {out} ({time.perf_counter() - inicio:.1f} s)\n")
+    for rel, entry in manifest.items():
+        original = _tamano(os.path.join(STATIC_DIR, rel))
+        target = os.path.join(out, entry["file"])
+        extras = []
+        for suffix in (".br", ".gz"):
+            if os.path.exists(target + suffix):
+                extras.append(f"{suffix[1:]} {_tamano(target + suffix) / 1024:.1f} KB")
+        for fmt, variantes in entry["variants"].items():
+            mayor = variantes[max(variantes, key=int)]
+            extras.append(f"{fmt} x{len(variantes)} (máx. {_tamano(os.path.join(out, mayor)) / 1024:.1f} KB)")
+        print(f"   {rel:<28} {original / 1024:>8.1f} KB  {', '.join(extras)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versiona y comprime los archivos de static/")
+    parser.add_argument("--anchos", type=int, nargs="+", default=list(ANCHOS))
+    args = parser.parse_args()
+    main(args.anchos)
@@ -0,0 +1,129 @@
+# -------------------------------
+# Consultas del catálogo de productos
+# -------------------------------
+# Filtros combinables, orden por precio/fecha/stock y paginación keyset
+# sobre (columna de orden, id). Cada vista pide solo las columnas que usa.
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+
+from app.database.connection import database
+from app.database.tables import products
+from app.utils.pagination import encode_cursor, decode_cursor
+
+SORT_COLUMNS = {
+    "id": products.c.id,
+    "price": products.c.price,
+    "created_at": products.c.created_at,
+    "stock": products.c.stock,
+}
+
+VIEW_COLUMNS = {
+    # products.html (tienda)
+    "tienda": (
+        products.c.id,
+        products.c.name,
+        products.c.description,
+        products.c.price,
+        products.c.stock,
+        products.c.image_url,
+    ),
+    # admin_products.html (tarjetas del panel)
+    "admin": (
+        products.c.id,
+        products.c.name,
+        products.c.description,
+        products.c.category,
+        products.c.price,
+        products.c.stock,
+        products.c.status,
+        products.c.image_url,
+    ),
+}
+
+MAX_LIMIT = 100
+
+
+def _filters(category, status, min_price, max_price, in_stock) -> list:
+    filtros = []
+    if category:
+        filtros.append(products.c.category == category)
+    if status:
+        filtros.append(products.c.status == status)
+    if min_price is not None:
+        filtros.append(products.c.price >= min_price)
+    if max_price is not None:
+        filtros.append(products.c.price <= max_price)
+    if in_stock:
+        filtros.append(products.c.stock > 0)
+    return filtros
+
+
+def _seek(sort_col, descending: bool, cursor: str):
+    """(col, id) estrictamente después de la última fila de la página anterior."""
+    payload = decode_cursor(cursor)
+    try:
+        last_id = int(payload["id"])
+        value = payload.get("v")
+        if value is not None and sort_col is products.c.created_at:
+            value = datetime.fromisoformat(value)
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if sort_col is products.c.id:
+        return products.c.id < last_id if descending else products.c.id > last_id
+
+    # MySQL ordena los NULL primero en ASC y al final en DESC
+    if value is None:
+        empate = and_(sort_col.is_(None), products.c.id < last_id if descending else products.c.id > last_id)
+        return empate if descending else or_(empate, sort_col.isnot(None))
+    if descending:
+        return or_(sort_col < value, and_(sort_col == value, products.c.id < last_id), sort_col.is_(None))
+    return or_(sort_col > value, and_(sort_col == value, products.c.id > last_id))
+
+
+async def query_catalog(
+    view: str = "tienda",
+    *,
+    category: str | None = None,
+    status: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    in_stock: bool = False,
+    sort: str = "id",
+    order: str = "desc",
+    cursor: str | None = None,
+    limit: int = 24,
+) -> dict:
+    """Devuelve {"items": [...], "next_cursor": str | None}."""
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail="Orden inválido")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Dirección de orden inválida")
+
+    sort_col = SORT_COLUMNS[sort]
+    descending = order == "desc"
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    query = select(*VIEW_COLUMNS[view]).where(
+        *_filters(category, status, min_price, max_price, in_stock)
+    )
+    if sort_col.name not in {c.name for c in VIEW_COLUMNS[view]}:
+        query = query.add_columns(sort_col)  # hace falta para construir el cursor
+    if cursor:
+        query = query.where(_seek(sort_col, descending, cursor))
+
+    # id como desempate para que el orden sea total y el cursor estable
+    orden = [sort_col] if sort_col is products.c.id else [sort_col, products.c.id]
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in orden])
+
+    rows = await database.fetch_all(query.limit(limit + 1))
+    items = [dict(r) for r in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor({"v": last[sort_col.name], "id": last["id"]})
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,23 +1,14 @@
 from fastapi import Request, HTTPException, Depends
 from fastapi.responses import RedirectResponse
-from app.database.connection import database
-from app.database.tables import users
+from app.utils.session import SESSION_COOKIE, read_token
 
 
 # ======================================================
 # OBTENER USUARIO DESDE COOKIES
 # ======================================================
 async def get_current_user(request: Request):
-    """Obtiene el usuario desde la cookie 'user_name'."""
-    username = request.cookies.get("user_name")
-
-    if not username:
-        return None
-
-    query = users.select().where(users.c.usuario == username)
-    user = await database.fetch_one(query)
-
-    return user
+    """Obtiene el usuario desde la cookie de sesión firmada."""
+    return read_token(request.cookies.get(SESSION_COOKIE))
 
 
 # ======================================================
@@ -26,17 +17,10 @@ async def get_current_user(request: Request):
 async def admin_required(request: Request):
     """Lanza error si no es admin (uso interno si quieres usar HTTPException)."""
 
-    username = request.cookies.get("user_name")
-
-    if not username:
-        raise HTTPException(status_code=401, detail="No autenticado")
-
-    user = await database.fetch_one(
-        users.select().where(users.c.usuario == username)
-    )
+    user = read_token(request.cookies.get(SESSION_COOKIE))
 
     if not user:
-        raise HTTPException(status_code=401, detail="Usuario no encontrado")
+        raise HTTPException(status_code=401, detail="No autenticado")
 
     if user["role"] != "admin":
         raise HTTPException(status_code=403, detail="No autorizado (solo admin)")
@@ -51,17 +35,9 @@ async def admin_required(request: Request):
 async def get_current_admin(request: Request):
     """Verifica que el usuario sea admin. Si no, lo redirige al login."""
 
-    username = request.cookies.get("user_name")
-
-    # Si no hay cookie → login
-    if not username:
-        return RedirectResponse(url="/auth/login", status_code=303)
-
-    # Buscar usuario
-    user = await database.fetch_one(
-        users.select().where(users.c.usuario == username)
-    )
+    user = read_token(request.cookies.get(SESSION_COOKIE))
 
+    # Sin sesión válida → login
     if not user:
         return RedirectResponse(url="/auth/login", status_code=303)
 
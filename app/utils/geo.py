@@ -0,0 +1,122 @@
+# -------------------------------
+# Índice espacial de puntos de recolección
+# -------------------------------
+# Rejilla en memoria de celdas de GEO_CELL_DEG grados. Las búsquedas por
+# radio y por rectángulo solo recorren las celdas que tocan el área.
+# Se actualiza en cada alta/edición/baja y, como cada worker tiene su
+# copia, se recarga desde MySQL si pasan GEO_INDEX_TTL s sin refrescar.
+import heapq
+import math
+import os
+import time
+
+from app.database.connection import database
+from app.database.tables import points
+
+GEO_CELL_DEG = float(os.getenv("GEO_CELL_DEG", "0.05"))  # ~5.5 km de latitud
+GEO_INDEX_TTL = float(os.getenv("GEO_INDEX_TTL", "60"))
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class PointIndex:
+    def __init__(self, cell_deg: float = GEO_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells: dict[tuple[int, int], dict[int, dict]] = {}
+        self._cell_of: dict[int, tuple[int, int]] = {}
+        self.loaded_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def upsert(self, point: dict) -> None:
+        self.remove(point["id"])
+        if point.get("lat") is None or point.get("lng") is None:
+            return  # sin coordenadas no aparece en el mapa
+        cell = self._cell(point["lat"], point["lng"])
+        self._cells.setdefault(cell, {})[point["id"]] = dict(point)
+        self._cell_of[point["id"]] = cell
+
+    def remove(self, point_id: int) -> None:
+        cell = self._cell_of.pop(point_id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        bucket.pop(point_id, None)
+        if not bucket:
+            del self._cells[cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._cell_of.clear()
+
+    def _iter_cells(self, min_lat, min_lng, max_lat, max_lng):
+        (cy0, cx0), (cy1, cx1) = self._cell(min_lat, min_lng), self._cell(max_lat, max_lng)
+        # Si el rectángulo abarca más celdas que las ocupadas, recorrer las ocupadas
+        if (cy1 - cy0 + 1) * (cx1 - cx0 + 1) > len(self._cells):
+            for (cy, cx), bucket in self._cells.items():
+                if cy0 <= cy <= cy1 and cx0 <= cx <= cx1:
+                    yield bucket
+            return
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                bucket = self._cells.get((cy, cx))
+                if bucket:
+                    yield bucket
+
+    def nearby(self, lat: float, lng: float, radio_km: float, limit: int) -> list[dict]:
+        dlat = radio_km / KM_PER_DEG_LAT
+        dlng = radio_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+
+        candidates = []
+        for bucket in self._iter_cells(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            for point in bucket.values():
+                distancia = haversine_km(lat, lng, point["lat"], point["lng"])
+                if distancia <= radio_km:
+                    candidates.append((distancia, point["id"], point))
+
+        return [
+            {**point, "distancia_km": round(distancia, 3)}
+            for distancia, _, point in heapq.nsmallest(limit, candidates)
+        ]
+
+    def bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float, limit: int) -> list[dict]:
+        result = []
+        for bucket in self._iter_cells(min_lat, min_lng, max_lat, max_lng):
+            for point in bucket.values():
+                if min_lat <= point["lat"] <= max_lat and min_lng <= point["lng"] <= max_lng:
+                    result.append(point)
+                    if len(result) >= limit:
+                        return result
+        return result
+
+
+point_index = PointIndex()
+
+
+async def load_point_index() -> None:
+    # Se construye aparte y se intercambia, así nadie ve un índice a medias
+    fresh = PointIndex(point_index.cell_deg)
+    async for row in database.iterate(points.select()):
+        fresh.upsert(dict(row))
+    point_index._cells, point_index._cell_of = fresh._cells, fresh._cell_of
+    point_index.loaded_at = time.monotonic()
+
+
+async def get_point_index() -> PointIndex:
+    """Devuelve el índice, recargándolo si es la primera vez o si caducó."""
+    if point_index.loaded_at is None or time.monotonic() - point_index.loaded_at > GEO_INDEX_TTL:
+        await load_point_index()
+    return point_index
@@ -0,0 +1,234 @@
+# -------------------------------
+# Archivo de points_history por meses
+# -------------------------------
+# En MySQL points_history está particionada por mes (pYYYYMM + pmax, ver la
+# migración 2b7d4e9a1c56). Este job, pensado para un cron mensual:
+#
+#   1. prepara las particiones de los próximos meses partiendo pmax (vacía
+#      si el job corre a tiempo, así que no mueve filas);
+#   2. por cada mes más antiguo que HISTORY_HOT_MONTHS:
+#        - resume el mes en points_history_mensual (usuario, mes, motivo),
+#        - intercambia la partición con una tabla points_history_YYYYMM
+#          vacía (EXCHANGE PARTITION: solo metadatos, no copia filas),
+#        - borra la partición ya vacía y comprime la tabla del mes
+#          (ROW_FORMAT=COMPRESSED), o con --exportar la vuelca a
+#          DIR/points_history_YYYYMM.ndjson.gz y la elimina.
+#
+# Así points_history solo guarda los meses activos y "últimos N movimientos"
+# lee N entradas del índice (user_id, fecha DESC) en unas pocas particiones.
+# Las claves de idempotencia no se archivan (points_history_keys): deben
+# seguir valiendo para los meses archivados. ranking.reconciliar() suma el
+# resumen mensual a lo que queda en points_history.
+#
+# Cada paso se puede repetir si el job se corta a medias. Mientras corre no
+# conviene reconciliar el ranking (un mes puede estar a la vez resumido y en
+# su partición).
+#
+#   python -m app.utils.history_archive --simular      # solo muestra el plan
+#   python -m app.utils.history_archive --meses-activos 12 --exportar /backups/puntos
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.database.connection import database
+
+HISTORY_HOT_MONTHS = int(os.getenv("HISTORY_HOT_MONTHS", "12"))       # meses que quedan en points_history
+HISTORY_FUTURE_MONTHS = int(os.getenv("HISTORY_FUTURE_MONTHS", "3"))  # particiones creadas por delante
+ARCHIVE_BATCH_ROWS = int(os.getenv("ARCHIVE_BATCH_ROWS", "5000"))     # filas por fetchmany al exportar
+
+TABLA = "points_history"
+_PARTICION = re.compile(r"^p(\d{4})(\d{2})$")
+
+PARTICIONES = text("""
+    SELECT PARTITION_NAME AS nombre, TABLE_ROWS AS filas
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+""")
+
+TABLA_EXISTE = text("""
+    SELECT COUNT(*) FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla
+""")
+
+# Reemplaza (no suma): repetir el resumen de un mes deja el mismo resultado
+_RESUMIR = """
+    INSERT INTO points_history_mensual (user_id, mes, motivo, veces, ganados, canjeados)
+    SELECT user_id,
+           LAST_DAY(fecha - INTERVAL 1 MONTH) + INTERVAL 1 DAY AS mes,
+           motivo,
+           COUNT(*),
+           SUM(GREATEST(cambio, 0)),
+           SUM(GREATEST(-cambio, 0))
+    FROM points_history PARTITION ({particion})
+    GROUP BY user_id, mes, motivo
+    ON DUPLICATE KEY UPDATE
+        veces = VALUES(veces), ganados = VALUES(ganados), canjeados = VALUES(canjeados)
+"""
+
+
+class ArchivoError(Exception):
+    """El estado de las particiones no permite seguir sin intervención."""
+    pass
+
+
+# -------------------------------
+# Meses y particiones
+# -------------------------------
+def sumar_meses(mes: date, n: int) -> date:
+    total = mes.year * 12 + mes.month - 1 + n
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def mes_de(particion: str) -> date | None:
+    """p202601 → 2026-01-01; pmax (u otro nombre) → None."""
+    m = _PARTICION.match(particion)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def definicion(mes: date) -> str:
+    return f"PARTITION p{mes:%Y%m} VALUES LESS THAN ('{sumar_meses(mes, 1):%Y-%m-%d}')"
+
+
+async def particiones() -> list[dict]:
+    """Particiones de points_history en orden (filas: estimación de InnoDB)."""
+    rows = await database.fetch_all(PARTICIONES, {"tabla": TABLA})
+    return [{"nombre": r["nombre"], "mes": mes_de(r["nombre"]), "filas": r["filas"]} for r in rows]
+
+
+def _este_mes() -> date:
+    return datetime.utcnow().date().replace(day=1)
+
+
+def plan(actuales: list[dict], meses_activos: int, meses_futuros: int) -> dict:
+    """Qué particiones crear (meses) y cuáles archivar (nombres), sin tocar nada."""
+    este_mes = _este_mes()
+    meses = [p["mes"] for p in actuales if p["mes"]]
+    ultimo = max(meses) if meses else sumar_meses(este_mes, -1)
+    crear = []
+    mes = sumar_meses(ultimo, 1)
+    while mes <= sumar_meses(este_mes, meses_futuros):
+        crear.append(mes)
+        mes = sumar_meses(mes, 1)
+
+    corte = sumar_meses(este_mes, -(meses_activos - 1))  # primer mes que se queda
+    archivar = [p["nombre"] for p in actuales if p["mes"] and p["mes"] < corte]
+    return {"crear": crear, "archivar": archivar, "corte": corte}
+
+
+# -------------------------------
+# Pasos
+# -------------------------------
+async def preparar(meses: list[date]) -> None:
+    """Parte pmax en las particiones de `meses` (consecutivos, tras la última)."""
+    if not meses:
+        return
+    nuevas = ", ".join(definicion(m) for m in meses)
+    await database.execute(
+        f"ALTER TABLE {TABLA} REORGANIZE PARTITION pmax INTO "
+        f"({nuevas}, PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+    )
+
+
+async def _tiene_filas(origen: str) -> bool:
+    return bool(await database.fetch_val(f"SELECT 1 FROM {origen} LIMIT 1"))
+
+
+async def _exportar(tabla: str, directorio: str) -> tuple[str, int]:
+    """Vuelca la tabla a NDJSON comprimido (se escribe a .tmp y se renombra al acabar)."""
+    os.makedirs(directorio, exist_ok=True)
+    destino = os.path.join(directorio, f"{tabla}.ndjson.gz")
+    filas = 0
+    with gzip.open(destino + ".tmp", "wt", encoding="utf-8") as f:
+        async for batch in database.iterate_batches(f"SELECT * FROM {tabla} ORDER BY id", size=ARCHIVE_BATCH_ROWS):
+            for row in batch:
+                f.write(json.dumps(dict(row), ensure_ascii=False, default=str) + "\n")
+            filas += len(batch)
+    os.replace(destino + ".tmp", destino)
+    return destino, filas
+
+
+async def archivar(particion: str, exportar: str | None = None) -> dict:
+    """Resume, saca y borra una partición de points_history."""
+    mes = mes_de(particion)
+    tabla = f"{TABLA}_{mes:%Y%m}"
+    origen = f"{TABLA} PARTITION ({particion})"
+
+    await database.execute(_RESUMIR.format(particion=particion))
+
+    if await _tiene_filas(origen):
+        if not await database.fetch_val(TABLA_EXISTE, {"tabla": tabla}):
+            await database.execute(f"CREATE TABLE {tabla} LIKE {TABLA}")
+            await database.execute(f"ALTER TABLE {tabla} REMOVE PARTITIONING")
+        elif await _tiene_filas(tabla):
+            raise ArchivoError(f"{tabla} ya tiene filas y {particion} también: revisar a mano")
+        # Las filas entran en la tabla vacía; la partición recibe 0 filas
+        # (nada que validar)
+        await database.execute(
+            f"ALTER TABLE {TABLA} EXCHANGE PARTITION {particion} WITH TABLE {tabla} WITHOUT VALIDATION"
+        )
+    await database.execute(f"ALTER TABLE {TABLA} DROP PARTITION {particion}")
+
+    hecho = {"particion": particion, "tabla": tabla, "archivo": None, "filas": None}
+    if not await database.fetch_val(TABLA_EXISTE, {"tabla": tabla}):
+        return hecho  # ya exportada en una pasada anterior
+    if exportar:
+        hecho["archivo"], hecho["filas"] = await _exportar(tabla, exportar)
+        await database.execute(f"DROP TABLE {tabla}")
+    else:
+        await database.execute(f"ALTER TABLE {tabla} ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8")
+    return hecho
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+async def _main(meses_activos: int, meses_futuros: int, exportar: str | None, simular: bool) -> int:
+    await database.connect()
+    try:
+        if database.engine.dialect.name != "mysql":
+            print("❌ points_history solo está particionada en MySQL (alembic upgrade head)")
+            return 1
+        actuales = await particiones()
+        if not actuales:
+            print("❌ points_history no está particionada: falta la migración 2b7d4e9a1c56")
+            return 1
+        pasos = plan(actuales, meses_activos, meses_futuros)
+        filas = {p["nombre"]: p["filas"] for p in actuales}
+
+        print(f"🗂️  {len(actuales)} particiones; se quedan los meses desde {pasos['corte']:%Y-%m}")
+        print(f"   crear:    {', '.join(f'p{m:%Y%m}' for m in pasos['crear']) or '-'}")
+        print(f"   archivar: {', '.join(f'{p} (~{filas[p]} filas)' for p in pasos['archivar']) or '-'}")
+        if simular:
+            return 0
+
+        await preparar(pasos["crear"])
+        for particion in pasos["archivar"]:
+            inicio = time.perf_counter()
+            hecho = await archivar(particion, exportar)
+            destino = hecho["archivo"] or f"tabla {hecho['tabla']} (comprimida)"
+            print(f"📦 {particion} → {destino} en {time.perf_counter() - inicio:.1f} s")
+        print("✅ Listo")
+        return 0
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archiva los meses antiguos de points_history")
+    parser.add_argument("--meses-activos", type=int, default=HISTORY_HOT_MONTHS, help="meses que se quedan (incluido el actual)")
+    parser.add_argument("--meses-futuros", type=int, default=HISTORY_FUTURE_MONTHS, help="particiones a crear por delante")
+    parser.add_argument("--exportar", metavar="DIR", help="vuelca cada mes a DIR/*.ndjson.gz y borra su tabla")
+    parser.add_argument("--simular", action="store_true", help="muestra el plan sin tocar nada")
+    args = parser.parse_args()
+    if args.meses_activos < 1:
+        parser.error("--meses-activos debe ser al menos 1")
+    sys.exit(asyncio.run(_main(args.meses_activos, args.meses_futuros, args.exportar, args.simular)))
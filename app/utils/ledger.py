@@ -0,0 +1,250 @@
+# -------------------------------
+# Libro de puntos (ledger)
+# -------------------------------
+# Todo cambio de saldo pasa por aquí: el saldo se modifica con una sola
+# sentencia atómica (balance = balance + :delta) y el movimiento del
+# historial se inserta en la misma transacción.
+#
+# Para muchos movimientos a la vez (cola de premios, operaciones de admin
+# por lotes) apply_batch() hace un solo INSERT multi-fila en el historial
+# y un solo upsert con el delta sumado por usuario.
+#
+# Ambos caminos mantienen también points_summary / points_summary_motivos
+# (ganados, canjeados y veces por motivo) para el ranking: ver ranking.py.
+import os
+from datetime import datetime
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import queries
+from app.database.connection import database
+from app.database.tables import (
+    points_history,
+    points_history_keys,
+    points_summary,
+    points_summary_motivos,
+    user_points,
+)
+from app.utils.prometheus import record_points
+
+ADMIN_BATCH_MAX = int(os.getenv("ADMIN_BATCH_MAX", "500"))  # elementos por operación de admin
+
+
+class SaldoInsuficiente(Exception):
+    """Se lanza cuando un débito dejaría el saldo en negativo."""
+    pass
+
+
+async def apply_change(user_id: int, cambio: int, motivo: str, referencia: str | None = None) -> int:
+    """
+    Aplica `cambio` (positivo = gana, negativo = gasta) y registra el historial
+    en una única transacción. Devuelve el nuevo saldo.
+    Lanza SaldoInsuficiente si un débito dejaría el saldo por debajo de cero.
+    """
+    async with database.transaction():
+        if cambio >= 0:
+            await database.execute(sumar_saldos(
+                [{"user_id": user_id, "balance": cambio, "updated_at": datetime.utcnow()}]
+            ))
+        else:
+            afectadas = await database.execute(
+                queries.SALDO_DEBIT, {"uid": user_id, "costo": -cambio}
+            )
+            if not afectadas:
+                raise SaldoInsuficiente()
+
+        await database.execute(
+            queries.HISTORY_INSERT,
+            {"user_id": user_id, "cambio": cambio, "motivo": motivo, "referencia": referencia},
+        )
+        await actualizar_resumen([{"user_id": user_id, "cambio": cambio, "motivo": motivo}])
+
+        balance = await database.fetch_val(queries.SALDO_BY_USER, {"user_id": user_id})
+
+    record_points(cambio, motivo, referencia)
+    return balance
+
+
+async def debit(user_id: int, costo: int, motivo: str, referencia: str | None = None) -> int:
+    """Descuenta `costo` puntos solo si el saldo alcanza (canjes)."""
+    return await apply_change(user_id, -costo, motivo, referencia)
+
+
+# -------------------------------
+# Movimientos por lotes
+# -------------------------------
+def upsert_sumando(table, clave: list[str], rows: list[dict], sumar: list[str]):
+    """
+    INSERT multi-fila que, si la clave ya existe, suma las columnas `sumar`
+    y reemplaza el resto (SQLite solo como BD de benchmarks).
+    """
+    otras = [c for c in rows[0] if c not in clave and c not in sumar]
+    if database.engine.dialect.name == "sqlite":
+        stmt = sqlite_insert(table).values(rows)
+        nuevo = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c[c] for c in clave],
+            set_={
+                **{c: table.c[c] + nuevo[c] for c in sumar},
+                **{c: nuevo[c] for c in otras},
+            },
+        )
+    stmt = mysql_insert(table).values(rows)
+    nuevo = stmt.inserted
+    return stmt.on_duplicate_key_update({
+        **{c: table.c[c] + nuevo[c] for c in sumar},
+        **{c: nuevo[c] for c in otras},
+    })
+
+
+def sumar_saldos(rows: list[dict]):
+    """Upsert que suma cada delta (user_id, balance, updated_at) al saldo."""
+    return upsert_sumando(user_points, ["user_id"], rows, ["balance"])
+
+
+async def actualizar_resumen(movimientos: list[dict]) -> None:
+    """
+    Suma los movimientos al resumen por usuario y por motivo (2 upserts,
+    filas en orden de clave para que dos lotes bloqueen en el mismo orden).
+    """
+    ahora = datetime.utcnow()
+    usuarios: dict[int, dict] = {}
+    motivos: dict[tuple, dict] = {}
+    for m in movimientos:
+        u = usuarios.setdefault(m["user_id"], {
+            "user_id": m["user_id"], "ganados": 0, "canjeados": 0, "movimientos": 0, "updated_at": ahora,
+        })
+        u["ganados" if m["cambio"] >= 0 else "canjeados"] += abs(m["cambio"])
+        u["movimientos"] += 1
+        k = motivos.setdefault((m["user_id"], m["motivo"]), {
+            "user_id": m["user_id"], "motivo": m["motivo"], "veces": 0, "total": 0,
+        })
+        k["veces"] += 1
+        k["total"] += m["cambio"]
+
+    await database.execute(upsert_sumando(
+        points_summary,
+        ["user_id"],
+        [usuarios[k] for k in sorted(usuarios)],
+        ["ganados", "canjeados", "movimientos"],
+    ))
+    await database.execute(upsert_sumando(
+        points_summary_motivos,
+        ["user_id", "motivo"],
+        [motivos[k] for k in sorted(motivos)],
+        ["veces", "total"],
+    ))
+
+
+async def apply_batch(movimientos: list[dict]) -> list[dict]:
+    """
+    Aplica los movimientos (user_id, cambio, motivo, referencia,
+    idempotency_key[, fecha]) cuya clave aún no está en el historial, en
+    una transacción. No comprueba saldos: los débitos se validan antes.
+    Devuelve los aplicados; las métricas las registra quien llama.
+    """
+    # Sin repetir clave dentro del propio lote
+    unicos = list({m["idempotency_key"] or id(m): m for m in movimientos}.values())
+
+    async with database.transaction():
+        claves = [m["idempotency_key"] for m in unicos if m["idempotency_key"]]
+        aplicadas = set()
+        if claves:
+            rows = await database.fetch_all(queries.HISTORY_KEYS_IN, {"keys": claves})
+            aplicadas = {r["idempotency_key"] for r in rows}
+        nuevos = [m for m in unicos if m["idempotency_key"] not in aplicadas]
+        if not nuevos:
+            return []
+
+        ahora = datetime.utcnow()
+        # La PK de points_history_keys es la que impide aplicar dos veces la
+        # misma clave si dos lotes concurrentes la ven libre a la vez
+        nuevas = sorted(m["idempotency_key"] for m in nuevos if m["idempotency_key"])
+        if nuevas:
+            await database.execute(points_history_keys.insert().values([
+                {"idempotency_key": k, "fecha": ahora} for k in nuevas
+            ]))
+        await database.execute(points_history.insert().values([
+            {
+                "user_id": m["user_id"],
+                "cambio": m["cambio"],
+                "motivo": m["motivo"],
+                "referencia": m["referencia"],
+                "idempotency_key": m["idempotency_key"],
+                "fecha": m.get("fecha") or ahora,
+            }
+            for m in nuevos
+        ]))
+
+        deltas: dict[int, int] = {}
+        for m in nuevos:
+            deltas[m["user_id"]] = deltas.get(m["user_id"], 0) + m["cambio"]
+        await database.execute(sumar_saldos([
+            {"user_id": user_id, "balance": delta, "updated_at": ahora}
+            for user_id, delta in deltas.items()
+        ]))
+        await actualizar_resumen(nuevos)
+    return nuevos
+
+
+def _clave_ajuste(ajuste: dict) -> str:
+    # Por usuario: la misma clave del cliente en dos usuarios son dos ajustes
+    return f"ajuste:{ajuste['user_id']}:{ajuste['idempotency_key']}"
+
+
+async def adjust_batch(ajustes: list[dict], referencia: str = "ajuste_admin") -> list[dict]:
+    """
+    Ajustes de admin (user_id, cambio, motivo[, idempotency_key]) en una
+    sola transacción. Cada uno se valida contra el saldo que dejan los
+    anteriores del lote; el que no procede se informa y no frena al resto.
+    Devuelve un resultado por ajuste, en el mismo orden.
+    """
+    user_ids = sorted({a["user_id"] for a in ajustes})
+    async with database.transaction():
+        existentes = {
+            r["id"] for r in await database.fetch_all(queries.USERS_EXISTENTES, {"ids": user_ids})
+        }
+        # Bloquea los saldos hasta el commit: nadie los cambia mientras se validan
+        saldos = {
+            r["user_id"]: r["balance"]
+            for r in await database.fetch_all(queries.SALDOS_FOR_UPDATE, {"ids": user_ids})
+        }
+        claves = [_clave_ajuste(a) for a in ajustes if a.get("idempotency_key")]
+        vistas = set()
+        if claves:
+            rows = await database.fetch_all(queries.HISTORY_KEYS_IN, {"keys": claves})
+            vistas = {r["idempotency_key"] for r in rows}
+
+        resultados, movimientos = [], []
+        for a in ajustes:
+            user_id, cambio = a["user_id"], a["cambio"]
+            key = _clave_ajuste(a) if a.get("idempotency_key") else None
+            if user_id not in existentes:
+                estado = "usuario_no_encontrado"
+            elif key in vistas:
+                estado = "duplicado"  # ya aplicado antes (o repetido en el lote)
+            elif saldos.get(user_id, 0) + cambio < 0:
+                estado = "saldo_insuficiente"
+            else:
+                estado = "aplicado"
+                saldos[user_id] = saldos.get(user_id, 0) + cambio
+                if key:
+                    vistas.add(key)
+                movimientos.append({
+                    "user_id": user_id,
+                    "cambio": cambio,
+                    "motivo": a["motivo"],
+                    "referencia": referencia,
+                    "idempotency_key": key,
+                })
+            resultados.append({"user_id": user_id, "cambio": cambio, "estado": estado})
+
+        aplicados = await apply_batch(movimientos) if movimientos else []
+
+    for m in aplicados:
+        record_points(m["cambio"], m["motivo"], m["referencia"])
+    for r in resultados:
+        if r["user_id"] in existentes:
+            r["nuevo_balance"] = saldos.get(r["user_id"], 0)
+    return resultados
@@ -0,0 +1,212 @@
+# -------------------------------
+# Métricas por petición
+# -------------------------------
+# Cada petición HTTP lleva un RequestStats en una ContextVar. Los eventos
+# del engine suman ahí cuántas consultas hizo y cuánto tardó la BD; las
+# plantillas suman su tiempo de render. Al empezar la respuesta se añade
+# la cabecera Server-Timing (db, template, total) y los números se acumulan
+# por ruta para /admin/metrics.
+#
+# Las consultas que pasan de SLOW_QUERY_MS se registran con su SQL y ruta.
+# Las métricas viven en cada proceso (cada worker de uvicorn lleva las suyas).
+import logging
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from jinja2 import Template
+from sqlalchemy import event
+
+from app.database.connection import database
+from app.utils.prometheus import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))  # duraciones guardadas por ruta (p95)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    __slots__ = ("route", "queries", "db_time", "template_time")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+# -------------------------------
+# Hooks de BD y plantillas
+# -------------------------------
+@event.listens_for(database.engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(database.engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Consulta lenta (%.1f ms) en %s: %s",
+            elapsed * 1000, stats.route if stats else "-", " ".join(statement.split()),
+        )
+
+
+@event.listens_for(database.engine.sync_engine, "handle_error")
+def _handle_error(exception_context):
+    # Si la consulta falla after_cursor_execute no corre: sacar su inicio de
+    # la pila para que no descuadre la siguiente medición
+    conn = exception_context.connection
+    if conn is None:
+        return
+    inicios = conn.info.get("query_start")
+    if inicios:
+        elapsed = time.perf_counter() - inicios.pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+
+class TimedTemplate(Template):
+    """Plantilla que suma su tiempo de render a la petición en curso."""
+
+    def render(self, *args, **kwargs) -> str:
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.template_time += time.perf_counter() - start
+
+
+def instrument_templates(templates):
+    """Mide el render de un Jinja2Templates (antes de cargar plantillas)."""
+    templates.env.template_class = TimedTemplate
+    return templates
+
+
+# -------------------------------
+# Agregado por ruta
+# -------------------------------
+class RouteMetrics:
+    __slots__ = ("count", "errors", "total_time", "db_time", "queries", "durations")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.durations: deque[float] = deque(maxlen=METRICS_WINDOW)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._routes: dict[str, RouteMetrics] = {}
+
+    def record(self, stats: RequestStats, status: int, elapsed: float) -> None:
+        route = self._routes.get(stats.route)
+        if route is None:
+            route = self._routes[stats.route] = RouteMetrics()
+        route.count += 1
+        route.errors += status >= 500
+        route.total_time += elapsed
+        route.db_time += stats.db_time
+        route.queries += stats.queries
+        route.durations.append(elapsed)
+
+    def table(self) -> list[dict]:
+        """Una fila por ruta, las más lentas (en total) primero."""
+        rows = []
+        for name, route in self._routes.items():
+            durations = sorted(route.durations)
+            rows.append({
+                "route": name,
+                "count": route.count,
+                "errors": route.errors,
+                "mean_ms": round(route.total_time / route.count * 1000, 2),
+                "p95_ms": round(durations[int(0.95 * (len(durations) - 1))] * 1000, 2),
+                "db_mean_ms": round(route.db_time / route.count * 1000, 2),
+                "queries_per_request": round(route.queries / route.count, 2),
+            })
+        rows.sort(key=lambda r: r["mean_ms"] * r["count"], reverse=True)
+        return rows
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+
+metrics = MetricsRegistry()
+
+
+# -------------------------------
+# Middleware ASGI
+# -------------------------------
+def _route_path(scope) -> str:
+    # Plantilla de la ruta (/recompensas/canjear/{reward_id}) para agrupar
+    return getattr(scope.get("route"), "path", None) or "(sin ruta)"
+
+
+def _route_name(scope) -> str:
+    return f"{scope['method']} {_route_path(scope)}"
+
+
+def _server_timing(stats: RequestStats, total: float) -> bytes:
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} consultas", '
+        f"template;dur={stats.template_time * 1000:.1f}, "
+        f"total;dur={total * 1000:.1f}"
+    ).encode()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(f"{scope['method']} {scope['path']}")
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # El router ya resolvió la ruta: agrupar por su plantilla
+                stats.route = _route_name(scope)
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.route = _route_name(scope)
+            self.registry.record(stats, status, elapsed)
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], _route_path(scope), str(status))
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
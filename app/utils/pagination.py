@@ -0,0 +1,22 @@
+# -------------------------------
+# Cursores opacos para paginación keyset
+# -------------------------------
+import base64
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(payload: dict) -> str:
+    """Serializa la posición de la última fila devuelta (p. ej. {"id": 42})."""
+    return base64.urlsafe_b64encode(json.dumps(payload, default=str).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return payload
@@ -0,0 +1,321 @@
+# -------------------------------
+# Métricas en formato Prometheus
+# -------------------------------
+# Contadores, gauges e histogramas mínimos (sin prometheus_client) que se
+# exponen en /metrics con el formato de texto de Prometheus.
+#
+# Todo se actualiza desde el event loop, así que no hay locks: sumar a un
+# dict cuesta lo mismo que antes sumar a un contador (< 1 µs por petición).
+# Lo que se actualiza desde hilos (bcrypt) lo protege quien lo llama.
+#
+# Con varios workers de uvicorn cada proceso lleva sus propios números. Si
+# se define PROMETHEUS_MULTIPROC_DIR, cada worker escribe su snapshot en
+# ese directorio cada METRICS_FLUSH_INTERVAL s (y al cerrar), y el que
+# recibe el scrape suma los de todos. Los contadores de un worker que ya
+# murió se siguen sumando; sus gauges no. El directorio se vacía al
+# desplegar (si no, se arrastran los contadores del despliegue anterior).
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Segundos: de 5 ms a 10 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# -------------------------------
+# Tipos de métrica
+# -------------------------------
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def set(self, *labelvalues, value: float) -> None:
+        """Para totales que ya lleva otro módulo (se copian en cada scrape)."""
+        self.values[labelvalues] = value
+
+    def samples(self, values: dict):
+        for key, value in values.items():
+            yield self.name, _labels(self.labelnames, key), value
+
+    def dump(self) -> dict:
+        return {json.dumps(k): v for k, v in self.values.items()}
+
+    @staticmethod
+    def merge(into: dict, other: dict) -> None:
+        for key, value in other.items():
+            into[key] = into.get(key, 0) + value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self.buckets = tuple(buckets)
+        # Por combinación de etiquetas: [conteo por bucket (+Inf al final), suma]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        entry = self.values.get(labelvalues)
+        if entry is None:
+            entry = self.values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self, values: dict):
+        bounds = [_fmt(b) for b in self.buckets] + ["+Inf"]
+        for key, (counts, total) in values.items():
+            acumulado = 0
+            for bound, count in zip(bounds, counts):
+                acumulado += count
+                yield f"{self.name}_bucket", _labels(self.labelnames, key, f'le="{bound}"'), acumulado
+            yield f"{self.name}_sum", _labels(self.labelnames, key), total
+            yield f"{self.name}_count", _labels(self.labelnames, key), acumulado
+
+    def dump(self) -> dict:
+        return {json.dumps(k): [list(c), s] for k, (c, s) in self.values.items()}
+
+    @staticmethod
+    def merge(into: dict, other: dict) -> None:
+        for key, (counts, total) in other.items():
+            entry = into.get(key)
+            if entry is None:
+                into[key] = [list(counts), total]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+
+
+# -------------------------------
+# Registro
+# -------------------------------
+class Registry:
+    def __init__(self, multiproc_dir: str = PROMETHEUS_MULTIPROC_DIR):
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self.collectors = []
+        self.multiproc_dir = multiproc_dir
+        self._task = None
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collector(self, fn):
+        """Registra una función que actualiza gauges antes de cada scrape o snapshot."""
+        self.collectors.append(fn)
+        return fn
+
+    # ---------- exposición ----------
+
+    def _collect(self) -> None:
+        for fn in self.collectors:
+            try:
+                fn()
+            except Exception:
+                logger.exception("Error en el colector de métricas %s", fn.__name__)
+
+    def render(self) -> str:
+        self._collect()
+        values = self._merged() if self.multiproc_dir else {n: m.values for n, m in self.metrics.items()}
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for sample, labels, value in metric.samples(values.get(name, {})):
+                lines.append(f"{sample}{labels} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    # ---------- varios workers ----------
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f"worker_{pid}.json")
+
+    def write_snapshot(self) -> None:
+        """Escribe los valores de este worker (reemplazo atómico del archivo)."""
+        self._collect()
+        path = self._path(os.getpid())
+        data = {"time": time.time(), "metrics": {n: m.dump() for n, m in self.metrics.items()}}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _merged(self) -> dict:
+        """Valores de este worker (en memoria) + los snapshots de los demás."""
+        merged = {}
+        for name, metric in self.metrics.items():
+            metric.merge(merged.setdefault(name, {}), metric.values)
+
+        own = self._path(os.getpid())
+        for path in glob.glob(os.path.join(self.multiproc_dir, "worker_*.json")):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(int(os.path.basename(path)[7:-5]))
+            for name, dumped in data["metrics"].items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == "gauge" and not alive):
+                    continue
+                metric.merge(merged.setdefault(name, {}), {tuple(json.loads(k)): v for k, v in dumped.items()})
+        return merged
+
+    async def start(self) -> None:
+        if self.multiproc_dir and self._task is None:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.write_snapshot()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.write_snapshot()
+            except OSError:
+                logger.exception("No se pudo escribir el snapshot de métricas")
+            await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+
+# -------------------------------
+# Métricas de la app
+# -------------------------------
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Peticiones HTTP en curso"
+)
+DB_POOL = registry.gauge(
+    "db_pool_connections", "Conexiones del pool de la BD por estado", ("state",)
+)
+DB_POOL_WAIT = registry.counter(
+    "db_pool_wait_seconds_total", "Tiempo total esperando una conexión del pool"
+)
+DB_POOL_ACQUIRED = registry.counter(
+    "db_pool_acquired_total", "Conexiones obtenidas del pool"
+)
+BCRYPT_QUEUE_WAIT = registry.histogram(
+    "bcrypt_queue_wait_seconds", "Espera en la cola del pool de bcrypt",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+BCRYPT_PENDING = registry.gauge(
+    "bcrypt_pending_jobs", "Trabajos de bcrypt en cola o en curso"
+)
+BCRYPT_REJECTED = registry.counter(
+    "bcrypt_rejected_total", "Trabajos de bcrypt rechazados (cola llena)"
+)
+POINTS_AWARDED = registry.counter(
+    "ecomarket_points_awarded_total", "Puntos otorgados", ("motivo",)
+)
+POINTS_REDEEMED = registry.counter(
+    "ecomarket_points_redeemed_total", "Puntos gastados", ("motivo",)
+)
+SOLICITUDES_CREATED = registry.counter(
+    "ecomarket_solicitudes_created_total", "Solicitudes creadas", ("tipo",)
+)
+SOLICITUDES_APPROVED = registry.counter(
+    "ecomarket_solicitudes_approved_total", "Solicitudes aprobadas"
+)
+
+
+# El motivo del historial es texto libre ("Canje de recompensa #12", razones
+# de los ajustes de admin...): la etiqueta usa solo estas categorías
+_CATEGORIAS = (
+    ("Canje de recompensa", "canje"),
+    ("Solicitud aprobada", "solicitud"),
+    ("Creación de solicitud", "solicitud"),
+    ("Login diario", "login"),
+    ("Registro de cuenta", "registro"),
+)
+
+
+def categoria_puntos(motivo: str, referencia: str | None = None) -> str:
+    if referencia == "ajuste_admin":
+        return "ajuste"
+    for prefijo, categoria in _CATEGORIAS:
+        if motivo.startswith(prefijo):
+            return categoria
+    return "otro"
+
+
+def record_points(cambio: int, motivo: str, referencia: str | None = None) -> None:
+    categoria = categoria_puntos(motivo, referencia)
+    if cambio >= 0:
+        POINTS_AWARDED.inc(categoria, amount=cambio)
+    else:
+        POINTS_REDEEMED.inc(categoria, amount=-cambio)
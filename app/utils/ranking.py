@@ -0,0 +1,239 @@
+# -------------------------------
+# Ranking y resumen de puntos por usuario
+# -------------------------------
+# points_summary / points_summary_motivos los mantiene el ledger en la misma
+# transacción que cada movimiento; aquí solo se leen. El puesto es "de
+# competición" por puntos ganados (los canjes no bajan a nadie): 1 + los
+# usuarios con más ganados, un COUNT sobre el índice (ganados, user_id). Los
+# empatados comparten puesto.
+#
+# reconciliar() recalcula todo desde points_history (más el resumen mensual
+# de los meses ya archivados, ver history_archive.py) en una sola pasada y
+# lo compara con el resumen y con user_points.balance. Desde la terminal:
+#
+#   python -m app.utils.ranking                # solo informa
+#   python -m app.utils.ranking --reconstruir  # reescribe el resumen
+#
+# Reconstruir mientras la app escribe puntos puede perder los movimientos
+# que entren durante la pasada: mejor en horario bajo (y volver a reconciliar).
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.database import queries
+from app.database.connection import database
+from app.database.tables import (
+    points_history,
+    points_history_mensual,
+    points_summary,
+    points_summary_motivos,
+    user_points,
+)
+
+RANKING_BATCH_ROWS = int(os.getenv("RANKING_BATCH_ROWS", "5000"))  # filas por fetchmany / INSERT
+
+
+# -------------------------------
+# Lectura
+# -------------------------------
+async def pagina(limit: int, offset: int) -> dict:
+    rows = await database.fetch_all(queries.RANKING_PAGE, {"limit": limit, "offset": offset})
+    items, puesto = [], None
+    for i, row in enumerate(rows):
+        if i == 0:
+            # El primero puede empatar con los de la página anterior
+            puesto = await database.fetch_val(queries.RANKING_PUESTO, {"ganados": row["ganados"]})
+        elif row["ganados"] != rows[i - 1]["ganados"]:
+            puesto = offset + i + 1
+        items.append({
+            "puesto": puesto,
+            "user_id": row["user_id"],
+            "nombre": row["nombre_completo"],
+            "ganados": row["ganados"],
+            "canjeados": row["canjeados"],
+        })
+    total = await database.fetch_val(queries.RANKING_TOTAL)
+    return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+
+async def mi_puesto(user_id: int) -> dict:
+    resumen = await database.fetch_one(queries.RESUMEN_BY_USER, {"user_id": user_id})
+    ganados = resumen["ganados"] if resumen else 0
+    canjeados = resumen["canjeados"] if resumen else 0
+    motivos = await database.fetch_all(queries.RESUMEN_MOTIVOS, {"user_id": user_id})
+    return {
+        "puesto": await database.fetch_val(queries.RANKING_PUESTO, {"ganados": ganados}),
+        "ganados": ganados,
+        "canjeados": canjeados,
+        "balance": ganados - canjeados,
+        "movimientos": resumen["movimientos"] if resumen else 0,
+        "motivos": [dict(m) for m in motivos],
+    }
+
+
+# -------------------------------
+# Reconstrucción / reconciliación
+# -------------------------------
+async def recalcular() -> tuple[dict, dict, int]:
+    """
+    Una pasada por points_history y points_history_mensual: (por usuario,
+    por (usuario, motivo), movimientos contados).
+    """
+    usuarios: dict[int, list[int]] = {}  # user_id → [ganados, canjeados, movimientos]
+    motivos: dict[tuple, list[int]] = {}  # (user_id, motivo) → [veces, total]
+    filas = 0
+
+    # Meses archivados: ya vienen agregados por (usuario, mes, motivo)
+    async for batch in database.iterate_batches(points_history_mensual.select(), size=RANKING_BATCH_ROWS):
+        for row in batch:
+            user_id, veces = row["user_id"], row["veces"]
+            u = usuarios.setdefault(user_id, [0, 0, 0])
+            u[0] += row["ganados"]
+            u[1] += row["canjeados"]
+            u[2] += veces
+            m = motivos.setdefault((user_id, row["motivo"]), [0, 0])
+            m[0] += veces
+            m[1] += row["ganados"] - row["canjeados"]
+            filas += veces
+
+    query = select(points_history.c.user_id, points_history.c.cambio, points_history.c.motivo)
+    async for batch in database.iterate_batches(query, size=RANKING_BATCH_ROWS):
+        for row in batch:
+            user_id, cambio, motivo = row["user_id"], row["cambio"], row["motivo"]
+            u = usuarios.get(user_id)
+            if u is None:
+                u = usuarios[user_id] = [0, 0, 0]
+            if cambio >= 0:
+                u[0] += cambio
+            else:
+                u[1] -= cambio
+            u[2] += 1
+            m = motivos.get((user_id, motivo))
+            if m is None:
+                m = motivos[(user_id, motivo)] = [0, 0]
+            m[0] += 1
+            m[1] += cambio
+        filas += len(batch)
+    return usuarios, motivos, filas
+
+
+async def _leer(query, clave, valores) -> dict:
+    leidos = {}
+    async for batch in database.iterate_batches(query, size=RANKING_BATCH_ROWS):
+        for row in batch:
+            leidos[clave(row)] = valores(row)
+    return leidos
+
+
+def _diferencias(esperado: dict, actual: dict) -> int:
+    return sum(1 for k in esperado.keys() | actual.keys() if esperado.get(k) != actual.get(k))
+
+
+async def reconciliar() -> dict:
+    """Compara el historial con el resumen y con los saldos; no modifica nada."""
+    inicio = time.perf_counter()
+    usuarios, motivos, filas = await recalcular()
+
+    saldos = await _leer(
+        select(user_points.c.user_id, user_points.c.balance),
+        lambda r: r["user_id"], lambda r: r["balance"],
+    )
+    descuadres = []
+    for user_id in sorted(usuarios.keys() | saldos.keys()):
+        historial = usuarios[user_id][0] - usuarios[user_id][1] if user_id in usuarios else 0
+        balance = saldos.get(user_id, 0)
+        if balance != historial:
+            descuadres.append({
+                "user_id": user_id, "balance": balance, "historial": historial,
+                "diferencia": balance - historial,
+            })
+
+    resumen = await _leer(
+        points_summary.select(),
+        lambda r: r["user_id"], lambda r: [r["ganados"], r["canjeados"], r["movimientos"]],
+    )
+    resumen_motivos = await _leer(
+        points_summary_motivos.select(),
+        lambda r: (r["user_id"], r["motivo"]), lambda r: [r["veces"], r["total"]],
+    )
+    return {
+        "movimientos": filas,
+        "usuarios": len(usuarios),
+        "saldos_descuadrados": descuadres,
+        "resumen_descuadrado": _diferencias(usuarios, resumen),
+        "motivos_descuadrados": _diferencias(motivos, resumen_motivos),
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+async def reconstruir() -> dict:
+    """Reescribe el resumen desde el historial en una transacción."""
+    inicio = time.perf_counter()
+    usuarios, motivos, filas = await recalcular()
+    ahora = datetime.utcnow()
+    filas_usuarios = [
+        {"user_id": k, "ganados": g, "canjeados": c, "movimientos": n, "updated_at": ahora}
+        for k, (g, c, n) in usuarios.items()
+    ]
+    filas_motivos = [
+        {"user_id": k[0], "motivo": k[1], "veces": v, "total": t}
+        for k, (v, t) in motivos.items()
+    ]
+    async with database.transaction():
+        await database.execute(points_summary_motivos.delete())
+        await database.execute(points_summary.delete())
+        for tabla, datos in ((points_summary, filas_usuarios), (points_summary_motivos, filas_motivos)):
+            for i in range(0, len(datos), RANKING_BATCH_ROWS):
+                await database.execute(tabla.insert().values(datos[i:i + RANKING_BATCH_ROWS]))
+    return {
+        "movimientos": filas,
+        "usuarios": len(filas_usuarios),
+        "motivos": len(filas_motivos),
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+async def _main(reconstruir_resumen: bool) -> dict:
+    await database.connect()
+    try:
+        if reconstruir_resumen:
+            hecho = await reconstruir()
+            print(
+                f"🔧 Resumen reconstruido: {hecho['usuarios']} usuarios, {hecho['motivos']} motivos "
+                f"desde {hecho['movimientos']} movimientos ({hecho['segundos']:.1f} s)"
+            )
+        return await reconciliar()
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcilia el resumen de puntos con points_history")
+    parser.add_argument("--reconstruir", action="store_true", help="reescribe points_summary antes de reconciliar")
+    args = parser.parse_args()
+
+    informe = asyncio.run(_main(args.reconstruir))
+    print(
+        f"📊 {informe['movimientos']} movimientos de {informe['usuarios']} usuarios "
+        f"leídos en {informe['segundos']:.1f} s"
+    )
+    print(f"   resumen por usuario descuadrado: {informe['resumen_descuadrado']}")
+    print(f"   resumen por motivo descuadrado:  {informe['motivos_descuadrados']}")
+    descuadres = informe["saldos_descuadrados"]
+    print(f"   saldos distintos del historial:  {len(descuadres)}")
+    for d in descuadres[:20]:
+        print(f"     user {d['user_id']}: balance {d['balance']} vs historial {d['historial']} ({d['diferencia']:+})")
+    if len(descuadres) > 20:
+        print(f"     ... y {len(descuadres) - 20} más")
+
+    limpio = not descuadres and not informe["resumen_descuadrado"] and not informe["motivos_descuadrados"]
+    print("✅ Todo cuadra" if limpio else "⚠️  Hay descuadres")
+    sys.exit(0 if limpio else 1)
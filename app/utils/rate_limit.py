@@ -0,0 +1,269 @@
+# -------------------------------
+# Límite de intentos (token bucket)
+# -------------------------------
+# Middleware ASGI para login y registro: cada IP y cada nombre de usuario
+# tiene un cubo de N fichas que se rellena a N/segundos. Si el cubo está
+# vacío la petición se corta con 429 antes de llegar al router, o sea antes
+# de consultar la BD o de calcular bcrypt.
+#
+# El cubo de la IP gasta una ficha por intento. El del usuario la reserva
+# antes de pasar al router (así no hay más bcrypt en paralelo que fichas) y
+# la devuelve si el intento sale bien: solo cuentan los fallidos (si no,
+# cualquiera podría bloquear el login de otro enviando su nombre de usuario).
+#
+# Backends (RATE_LIMIT_BACKEND):
+#   - "memory": cubos en el proceso (cada worker cuenta por su cuenta)
+#   - "mysql":  tabla rate_limit_buckets compartida por todos los workers
+import json
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.database.connection import database
+from app.database.tables import rate_limit_buckets
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" | "mysql"
+RATE_LIMIT_IP = os.getenv("RATE_LIMIT_IP", "10/60")  # 10 intentos, 1 ficha cada 6 s
+RATE_LIMIT_USER = os.getenv("RATE_LIMIT_USER", "5/300")  # 5 intentos, 1 ficha cada 60 s
+RATE_LIMIT_KEYS = int(os.getenv("RATE_LIMIT_KEYS", "100000"))  # cubos en memoria
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+# Rutas POST con bcrypt (users_router también se monta en /auth)
+PROTECTED_PATHS = {"/auth/login", "/auth/register", "/auth/register-form"}
+MAX_FORM_BYTES = 16 * 1024  # formularios mayores no se inspeccionan (solo límite por IP)
+
+
+def parse_limit(value: str) -> tuple[float, float]:
+    """"10/60" → (capacidad 10, ritmo 10/60 fichas por segundo)."""
+    count, _, seconds = value.partition("/")
+    capacity = float(count)
+    return capacity, capacity / float(seconds or 1)
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+class MemoryBucketStore:
+    def __init__(self, maxsize: int = RATE_LIMIT_KEYS):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def _tokens(self, key: str, capacity: float, rate: float, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        return min(capacity, tokens + (now - updated) * rate)
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Gasta una ficha. Devuelve 0 si se permitió o los segundos a esperar."""
+        now = time.monotonic()
+        tokens = self._tokens(key, capacity, rate, now)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)  # el más antiguo ya estaría lleno
+        return wait
+
+    async def refund(self, key: str, capacity: float, rate: float) -> None:
+        """Devuelve una ficha gastada con take()."""
+        if key in self._buckets:
+            tokens, updated = self._buckets[key]
+            self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+
+class MySQLBucketStore:
+    """Cubos en la tabla rate_limit_buckets (compartidos entre workers y máquinas)."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._calls = 0
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.time()
+        async with database.transaction():
+            row = await database.fetch_one(
+                select(rate_limit_buckets.c.tokens, rate_limit_buckets.c.updated_at)
+                .where(rate_limit_buckets.c.bucket_key == key)
+                .with_for_update()
+            )
+            tokens = capacity
+            if row:
+                tokens = min(capacity, row["tokens"] + (now - row["updated_at"]) * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+
+            stmt = mysql_insert(rate_limit_buckets).values(bucket_key=key, tokens=tokens, updated_at=now)
+            await database.execute(
+                stmt.on_duplicate_key_update(tokens=stmt.inserted.tokens, updated_at=stmt.inserted.updated_at)
+            )
+
+        self._calls += 1
+        if self._calls % self.PRUNE_EVERY == 0:
+            await self._prune(now, capacity / rate)
+        return wait
+
+    async def refund(self, key: str, capacity: float, rate: float) -> None:
+        await database.execute(
+            rate_limit_buckets.update()
+            .where(rate_limit_buckets.c.bucket_key == key)
+            .values(tokens=func.least(capacity, rate_limit_buckets.c.tokens + 1))
+        )
+
+    async def _prune(self, now: float, full_after: float) -> None:
+        # Un cubo sin uso durante capacidad/ritmo segundos está lleno: no hace falta guardarlo
+        await database.execute(
+            rate_limit_buckets.delete().where(rate_limit_buckets.c.updated_at < now - full_after)
+        )
+
+
+def _make_store():
+    if RATE_LIMIT_BACKEND == "mysql":
+        return MySQLBucketStore()
+    return MemoryBucketStore()
+
+
+# -------------------------------
+# Limitador
+# -------------------------------
+class RateLimiter:
+    def __init__(self, store=None, ip_limit: str = RATE_LIMIT_IP, user_limit: str = RATE_LIMIT_USER):
+        self.store = store or _make_store()
+        self.ip_limit = parse_limit(ip_limit)
+        self.user_limit = parse_limit(user_limit)
+        self.allowed = 0
+        self.rejected = {"ip": 0, "user": 0}
+        self.rejected_by_path: dict[str, int] = {}
+
+    async def check(self, path: str, ip: str, username: str | None) -> float:
+        """0 si la petición puede seguir; si no, segundos para el siguiente intento."""
+        wait = await self.store.take(f"ip:{ip}", *self.ip_limit)
+        scope = "ip"
+        if not wait and username:
+            # Se reserva ya; succeeded() la devuelve si el intento sale bien
+            wait = await self.store.take(f"user:{username}", *self.user_limit)
+            scope = "user"
+
+        if wait:
+            self.rejected[scope] += 1
+            self.rejected_by_path[path] = self.rejected_by_path.get(path, 0) + 1
+        else:
+            self.allowed += 1
+        return wait
+
+    async def succeeded(self, username: str) -> None:
+        """Intento correcto: devuelve la ficha del usuario reservada en check()."""
+        await self.store.refund(f"user:{username}", *self.user_limit)
+
+    def stats(self) -> dict:
+        return {
+            "backend": RATE_LIMIT_BACKEND,
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+            "rejected_by_path": dict(self.rejected_by_path),
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+# -------------------------------
+# Middleware ASGI
+# -------------------------------
+def _client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "desconocido"
+
+
+async def _read_body(receive) -> tuple[list[dict], bytes | None]:
+    """Lee el cuerpo completo; devuelve los mensajes (para reenviarlos) y los bytes."""
+    messages, body = [], b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            return messages, None
+        body += message.get("body", b"")
+        if len(body) > MAX_FORM_BYTES:
+            return messages, None
+        if not message.get("more_body"):
+            return messages, body
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in PROTECTED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # Leer el formulario para sacar el usuario y luego reenviarlo intacto
+        messages, body = await _read_body(receive)
+        username = None
+        content_type = dict(scope["headers"]).get(b"content-type", b"")
+        if body and content_type.startswith(b"application/x-www-form-urlencoded"):
+            form = parse_qs(body.decode("utf-8", errors="replace"))
+            username = (form.get("username") or [""])[0].strip().lower() or None
+
+        wait = await self.limiter.check(scope["path"], _client_ip(scope), username)
+        if wait:
+            await _reject(send, wait)
+            return
+
+        pending = list(messages)
+        respuesta = {"status": 0, "location": b""}
+
+        async def replay():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                respuesta["status"] = message["status"]
+                respuesta["location"] = dict(message.get("headers") or []).get(b"location", b"")
+            await send(message)
+
+        await self.app(scope, replay, capture)
+        if username and not _fallido(respuesta["status"], respuesta["location"]):
+            await self.limiter.succeeded(username)
+
+
+def _fallido(status: int, location: bytes) -> bool:
+    # El login fallido redirige a /auth/login?error=...; el registro responde
+    # 400. Sin respuesta (excepción) también cuenta como fallido
+    return not status or status >= 400 or b"error=" in location
+
+
+async def _reject(send, wait: float) -> None:
+    body = json.dumps({"detail": "Demasiados intentos, espera unos segundos"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, round(wait + 0.5))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,100 @@
+# -------------------------------
+# Caché versionada de respuestas
+# -------------------------------
+# Cada recurso de solo-lectura frecuente (puntos, recompensas, productos)
+# tiene un contador de versión. Los handlers que lo modifican llaman a
+# bump(); mientras la versión no cambie, el JSON ya serializado se sirve
+# como bytes sin volver a consultar MySQL, con un ETag fuerte para que el
+# navegador pueda recibir 304 Not Modified.
+#
+# Los contadores viven en cada proceso: con varios workers de uvicorn, el
+# que no recibió la escritura converge como máximo en RESPONSE_CACHE_TTL s.
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "5"))
+RESPONSE_CACHE_KEYS = int(os.getenv("RESPONSE_CACHE_KEYS", "256"))  # por recurso
+
+
+class CachedEntry:
+    __slots__ = ("version", "expires", "data", "body", "etag")
+
+    def __init__(self, version: int, data, body: bytes, etag: str):
+        self.version = version
+        self.expires = time.monotonic() + RESPONSE_CACHE_TTL
+        self.data = data
+        self.body = body
+        self.etag = etag
+
+
+class ResponseCache:
+    def __init__(self):
+        self._versions: dict[str, int] = {}
+        self._entries: dict[str, OrderedDict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, resource: str) -> int:
+        return self._versions.get(resource, 0)
+
+    def bump(self, resource: str) -> None:
+        """Invalida todo lo guardado para `resource` (llamar tras escribir)."""
+        self._versions[resource] = self.version(resource) + 1
+        self._entries.pop(resource, None)
+
+    async def get_or_load(self, resource: str, key: str, loader) -> CachedEntry:
+        """Devuelve la entrada vigente o ejecuta `loader()` y la guarda."""
+        entries = self._entries.setdefault(resource, OrderedDict())
+        version = self.version(resource)
+
+        entry = entries.get(key)
+        if entry is not None and entry.version == version and entry.expires > time.monotonic():
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        data = jsonable_encoder(await loader())
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+        entry = CachedEntry(version, data, body, etag)
+        # Si hubo un bump mientras cargábamos, no guardar datos viejos
+        if self.version(resource) == version:
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > RESPONSE_CACHE_KEYS:
+                entries.popitem(last=False)
+        return entry
+
+    async def json_response(self, request: Request, resource: str, key: str, loader) -> Response:
+        entry = await self.get_or_load(resource, key, loader)
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "versions": dict(self._versions),
+            "keys": {r: len(e) for r, e in self._entries.items()},
+        }
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+response_cache = ResponseCache()
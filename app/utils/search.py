@@ -0,0 +1,252 @@
+# -------------------------------
+# Búsqueda de productos
+# -------------------------------
+# Dos backends:
+#   - "mysql":  índice FULLTEXT sobre products(name, description)
+#   - "memory": índice invertido en proceso, con plegado de acentos y un
+#               stemmer ligero para español. Pensado para despliegues sin
+#               FULLTEXT; se mantiene al día desde el CRUD de admin y, como
+#               cada worker tiene su copia, se recarga desde MySQL si pasan
+#               SEARCH_INDEX_TTL s sin refrescar.
+import heapq
+from itertools import groupby
+import math
+import os
+import re
+import time
+import unicodedata
+
+from sqlalchemy import text
+
+from app.database.connection import database
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mysql")  # "mysql" | "memory"
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "60"))
+SEARCH_RELOAD_TRIES = 3  # recargas seguidas si el catálogo cambia mientras se construye
+
+NAME_WEIGHT = 2.0  # una coincidencia en el nombre vale más que en la descripción
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "o", "para", "por", "que", "se", "sin", "su", "un", "una", "y",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9ñ]+")
+
+# Columnas que devuelve la búsqueda (las mismas que la tienda)
+RESULT_FIELDS = ("id", "name", "description", "price", "stock", "image_url")
+
+
+def fold(value: str) -> str:
+    """Minúsculas y sin acentos (conserva la ñ)."""
+    value = value.lower().replace("ñ", "\0")
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return value.replace("\0", "ñ")
+
+
+def stem(word: str) -> str:
+    """Stemmer ligero: quita plurales y la vocal final (botellas → botell)."""
+    if len(word) > 6 and word.endswith("mente"):
+        word = word[:-5]
+    if len(word) > 4 and word.endswith("ces"):
+        word = word[:-3] + "z"
+    elif len(word) > 4 and word.endswith("es"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s"):
+        word = word[:-1]
+    if len(word) > 3 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def tokenize(value: str | None) -> list[str]:
+    if not value:
+        return []
+    return [stem(t) for t in _TOKEN_RE.findall(fold(value)) if t not in STOPWORDS]
+
+
+class ProductIndex:
+    """
+    Índice invertido término → {product_id: peso}.
+    Además agrupa cada lista por peso (término → {peso: ids}) para sacar el
+    top-k sin puntuar todos los candidatos: los pesos distintos por término
+    son pocos, así que se recorren las combinaciones de mayor a menor
+    puntuación y se intersectan conjuntos (en C) hasta llenar la página.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, float]] = {}
+        self._ids: dict[str, set[int]] = {}
+        self._buckets: dict[str, dict[float, set[int]]] = {}
+        self._doc_terms: dict[int, set[str]] = {}
+        self._docs: dict[int, dict] = {}
+        self.version = 0  # sube con cada alta/edición/baja
+        self.loaded_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, product: dict) -> None:
+        product_id = product["id"]
+        self.remove(product_id)
+
+        weights: dict[str, float] = {}
+        for term in tokenize(product.get("name")):
+            weights[term] = weights.get(term, 0.0) + NAME_WEIGHT
+        for term in tokenize(product.get("description")):
+            weights[term] = weights.get(term, 0.0) + 1.0
+
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[product_id] = weight
+            self._ids.setdefault(term, set()).add(product_id)
+            self._buckets.setdefault(term, {}).setdefault(weight, set()).add(product_id)
+        self._doc_terms[product_id] = set(weights)
+        self._docs[product_id] = {k: product.get(k) for k in RESULT_FIELDS}
+        self.version += 1
+
+    def remove(self, product_id: int) -> None:
+        for term in self._doc_terms.pop(product_id, ()):
+            weight = self._postings[term].pop(product_id)
+            self._ids[term].discard(product_id)
+            bucket = self._buckets[term][weight]
+            bucket.discard(product_id)
+            if not bucket:
+                del self._buckets[term][weight]
+            if not self._postings[term]:
+                del self._postings[term], self._ids[term], self._buckets[term]
+        if self._docs.pop(product_id, None) is not None:
+            self.version += 1
+
+    def search(self, q: str, offset: int = 0, limit: int = 20) -> dict:
+        """Todas las palabras deben aparecer; ordena por tf·idf y luego por id desc."""
+        terms = list(dict.fromkeys(tokenize(q)))
+        if not terms or any(t not in self._ids for t in terms):
+            return {"items": [], "total": 0}
+
+        # Total: intersección de conjuntos, empezando por el más pequeño
+        id_sets = sorted((self._ids[t] for t in terms), key=len)
+        total = len(set.intersection(*id_sets)) if len(id_sets) > 1 else len(id_sets[0])
+        if not total:
+            return {"items": [], "total": 0}
+
+        n_docs = len(self._docs)
+        idfs = [math.log(1 + n_docs / len(self._ids[t])) for t in terms]
+
+        # Combinaciones de pesos (una por término) ordenadas por puntuación
+        combos = [((), 0.0)]
+        for term, idf in zip(terms, idfs):
+            combos = [
+                (ws + (w,), score + w * idf)
+                for ws, score in combos
+                for w in self._buckets[term]
+            ]
+        combos.sort(key=lambda c: c[1], reverse=True)
+
+        needed = offset + limit
+        ranked: list[tuple[float, int]] = []
+        # Las combinaciones con la misma puntuación se unen para desempatar por id
+        for score, group in groupby(combos, key=lambda c: c[1]):
+            ids: set[int] = set()
+            for weights, _ in group:
+                sets = sorted((self._buckets[t][w] for t, w in zip(terms, weights)), key=len)
+                ids |= set.intersection(*sets) if len(sets) > 1 else sets[0]
+            if not ids:
+                continue
+            take = needed - len(ranked)
+            ranked.extend((score, pid) for pid in heapq.nlargest(take, ids))
+            if len(ranked) >= needed:
+                break
+
+        items = [
+            {**self._docs[pid], "score": round(score, 4)}
+            for score, pid in ranked[offset:needed]
+        ]
+        return {"items": items, "total": total}
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._ids.clear()
+        self._buckets.clear()
+        self._doc_terms.clear()
+        self._docs.clear()
+
+    def replace_with(self, other: "ProductIndex") -> None:
+        """Adopta el contenido de `other` (construido aparte) de una vez."""
+        self._postings, self._ids, self._buckets = other._postings, other._ids, other._buckets
+        self._doc_terms, self._docs = other._doc_terms, other._docs
+
+
+product_index = ProductIndex()
+
+
+# -------------------------------
+# Mantenimiento del índice en memoria
+# -------------------------------
+async def load_product_index() -> None:
+    """Construye el índice en memoria desde MySQL (solo backend "memory")."""
+    if SEARCH_BACKEND != "memory":
+        return
+    query = f"SELECT {', '.join(RESULT_FIELDS)} FROM products"
+    # Se construye aparte y se intercambia, así nadie ve un índice a medias.
+    # Si mientras tanto este worker indexó un cambio (sube la versión), la
+    # copia puede haberlo leído antes de confirmarse: se repite.
+    for _ in range(SEARCH_RELOAD_TRIES):
+        version = product_index.version
+        fresh = ProductIndex()
+        async for row in database.iterate(query):
+            fresh.upsert(dict(row))
+        if product_index.version == version:
+            break
+    product_index.replace_with(fresh)
+    product_index.loaded_at = time.monotonic()
+
+
+async def get_product_index() -> ProductIndex:
+    """Devuelve el índice, recargándolo si caducó (lo que escribieron otros workers)."""
+    if product_index.loaded_at is None or time.monotonic() - product_index.loaded_at > SEARCH_INDEX_TTL:
+        await load_product_index()
+    return product_index
+
+
+def index_product(product: dict) -> None:
+    if SEARCH_BACKEND == "memory":
+        product_index.upsert(product)
+
+
+def unindex_product(product_id: int) -> None:
+    if SEARCH_BACKEND == "memory":
+        product_index.remove(product_id)
+
+
+# -------------------------------
+# Consulta
+# -------------------------------
+_FULLTEXT_QUERY = text(
+    f"""
+    SELECT {', '.join(RESULT_FIELDS)},
+           MATCH(name, description) AGAINST (:q IN NATURAL LANGUAGE MODE) AS score
+    FROM products
+    WHERE MATCH(name, description) AGAINST (:q IN NATURAL LANGUAGE MODE)
+    ORDER BY score DESC, id DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+_FULLTEXT_COUNT = text(
+    """
+    SELECT COUNT(*) FROM products
+    WHERE MATCH(name, description) AGAINST (:q IN NATURAL LANGUAGE MODE)
+    """
+)
+
+
+async def search_products(q: str, offset: int = 0, limit: int = 20) -> dict:
+    if SEARCH_BACKEND == "memory":
+        return (await get_product_index()).search(q, offset, limit)
+
+    rows = await database.fetch_all(
+        _FULLTEXT_QUERY, values={"q": q, "limit": limit, "offset": offset}
+    )
+    total = await database.fetch_val(_FULLTEXT_COUNT, values={"q": q})
+    return {"items": [dict(r) for r in rows], "total": total}
@@ -1,11 +1,23 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
-from fastapi import Request
+from fastapi import Request, HTTPException
+from app.database import queries
 from app.database.connection import database
-from app.database.tables import users
+from app.utils.prometheus import BCRYPT_QUEUE_WAIT
+from app.utils.session import SESSION_COOKIE, read_token
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 MAX_PASSWORD_LENGTH = 72  # límite de bcrypt en caracteres
 
+# bcrypt libera el GIL, así que un pool de hilos basta para no bloquear el event loop
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", "64"))  # trabajos en cola + en curso
+
 
 def hash_password(password: str) -> str:
     if len(password) > MAX_PASSWORD_LENGTH:
@@ -19,27 +31,120 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# -------------------------------
+# Pool acotado para bcrypt
+# -------------------------------
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_lock = threading.Lock()
+_hash_stats = {
+    "pending": 0,
+    "completed": 0,
+    "failed": 0,     # fn lanzó una excepción
+    "cancelled": 0,  # se canceló antes de empezar (no llegó a correr)
+    "rejected": 0,
+    "queue_wait_total": 0.0,
+    "queue_wait_max": 0.0,
+}
+
+
+def hash_pool_stats() -> dict:
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    stats["workers"] = HASH_WORKERS
+    stats["queue_max"] = HASH_QUEUE_MAX
+    started = stats["completed"] + stats["failed"]
+    stats["queue_wait_avg"] = stats["queue_wait_total"] / started if started else 0.0
+    return stats
+
+
+async def _run_hash_job(fn, *args):
+    """Ejecuta `fn` en el pool; si la cola está llena responde 503 en vez de encolar."""
+    with _hash_lock:
+        if _hash_stats["pending"] >= HASH_QUEUE_MAX:
+            _hash_stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Servidor ocupado, intenta de nuevo")
+        _hash_stats["pending"] += 1
+
+    enqueued = time.perf_counter()
+
+    def job():
+        waited = time.perf_counter() - enqueued
+        with _hash_lock:
+            _hash_stats["queue_wait_total"] += waited
+            _hash_stats["queue_wait_max"] = max(_hash_stats["queue_wait_max"], waited)
+            BCRYPT_QUEUE_WAIT.observe(waited)
+        return fn(*args)
+
+    def done(future):
+        # Corre cuando el hilo termina de verdad: si la petición se cancela
+        # con el trabajo ya en marcha, sigue ocupando un hueco hasta aquí
+        if future.cancelled():
+            result = "cancelled"
+        elif future.exception() is not None:
+            result = "failed"
+        else:
+            result = "completed"
+        with _hash_lock:
+            _hash_stats["pending"] -= 1
+            _hash_stats[result] += 1
+
+    future = _hash_executor.submit(job)
+    future.add_done_callback(done)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash_job(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
 class RequiresLogin(Exception):
     """Se lanza cuando la ruta requiere login y no hay usuario."""
     pass
 
 
 async def get_current_user(request: Request):
-    username = request.cookies.get("user_name")
-
-    if not username or username == "None":
+    """Usuario del token de sesión firmado (sin consultar MySQL)."""
+    token = request.cookies.get(SESSION_COOKIE)
+    if not token:
         return None
 
-    query = users.select().where(users.c.usuario == username)
-    user = await database.fetch_one(query)
+    # Reutilizar el usuario si ya se resolvió en esta misma petición
+    if getattr(request.state, "session_token", None) == token:
+        return request.state.user
+
+    user = read_token(token)
+
+    request.state.session_token = token
+    request.state.user = user
+    return user
+
 
-    return user if user else None
+# Métodos que escriben: ahí el token se confirma contra la BD (un usuario
+# borrado o con token_version nueva no puede seguir modificando datos)
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+async def _sesion_vigente(request: Request, user: dict, role: str | None = None) -> bool:
+    """El usuario sigue existiendo, con el mismo token_version (y rol, si se pide)."""
+    row = getattr(request.state, "session_row", None)
+    if row is None:
+        row = await database.fetch_one(queries.USER_SESSION_CHECK, {"user_id": user["id"]})
+        request.state.session_row = row or {}
+    if not row or row["token_version"] != user["token_version"]:
+        return False
+    return role is None or row["role"] == role
 
 
 async def require_login(request: Request):
     user = await get_current_user(request)
     if not user:
         raise RequiresLogin()
+    if request.method in WRITE_METHODS and not await _sesion_vigente(request, user):
+        raise RequiresLogin()
     return user
 
 
@@ -47,4 +152,18 @@ async def require_admin(request: Request):
     user = await get_current_user(request)
     if not user or user["role"] != "admin":
         raise RequiresLogin()
+    if request.method in WRITE_METHODS and not await _sesion_vigente(request, user, "admin"):
+        raise RequiresLogin()
+    return user
+
+
+async def require_admin_verified(request: Request):
+    """
+    Como require_admin, pero confirma en la BD que el token sigue vigente
+    (mismo token_version y todavía admin) también en lecturas. Para rutas
+    de admin sensibles.
+    """
+    user = await require_admin(request)
+    if not await _sesion_vigente(request, user, "admin"):
+        raise RequiresLogin()
     return user
@@ -0,0 +1,126 @@
+# -------------------------------
+# Tokens de sesión firmados
+# -------------------------------
+# La cookie "session" lleva los datos del usuario firmados con HMAC-SHA256:
+#
+#     <kid>.<payload base64url>.<firma base64url>
+#
+# Verificarla no necesita MySQL, así que cualquier worker autoriza la
+# petición por sí solo. `kid` indica con qué clave se firmó: se firma con
+# la primera de SESSION_KEYS y se aceptan todas, lo que permite rotar
+# claves sin cerrar las sesiones abiertas.
+#
+# El payload incluye `ver` (users.token_version). Las rutas de admin
+# sensibles lo comparan con la BD; subir la versión revoca los tokens viejos.
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+
+SESSION_COOKIE = "session"
+SESSION_TTL = int(os.getenv("SESSION_TTL", "28800"))  # 8 h
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "0") == "1"
+SESSION_DEV_KEY = os.getenv("SESSION_DEV_KEY", "0") == "1"  # clave fija pública: solo desarrollo
+
+logger = logging.getLogger(__name__)
+
+
+def _load_keys() -> dict[str, bytes]:
+    """SESSION_KEYS="kid2:secreto2,kid1:secreto1" (la primera es la activa)."""
+    raw = os.getenv("SESSION_KEYS", "")
+    keys = {}
+    for item in raw.split(","):
+        kid, _, secret = item.strip().partition(":")
+        if kid and secret:
+            keys[kid] = secret.encode()
+    if not keys and SESSION_DEV_KEY:
+        logger.warning("SESSION_DEV_KEY=1: firmando sesiones con la clave de desarrollo (pública)")
+        keys["dev"] = b"ecomarket-dev-session-key"
+    elif not keys:
+        # Nunca una clave conocida: una aleatoria por proceso. Las sesiones no
+        # sobreviven a un reinicio ni valen entre workers: hay que definirla
+        logger.warning("SESSION_KEYS no definido: clave aleatoria para este proceso")
+        keys["tmp"] = secrets.token_bytes(32)
+    return keys
+
+
+SESSION_KEYS = _load_keys()
+ACTIVE_KID = next(iter(SESSION_KEYS))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(kid: str, payload: str) -> str:
+    mac = hmac.new(SESSION_KEYS[kid], f"{kid}.{payload}".encode(), hashlib.sha256)
+    return _b64encode(mac.digest())
+
+
+def create_token(user, ttl: int = SESSION_TTL) -> str:
+    """Firma un token para la fila `user` de la tabla users."""
+    now = int(time.time())
+    payload = {
+        "uid": user["id"],
+        "sub": user["usuario"],
+        "role": user["role"],
+        "name": user["nombre_completo"],
+        "email": user["email"],
+        "ver": user["token_version"] or 0,
+        "iat": now,
+        "exp": now + ttl,
+    }
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return f"{ACTIVE_KID}.{body}.{_sign(ACTIVE_KID, body)}"
+
+
+def read_token(token: str | None) -> dict | None:
+    """Devuelve el usuario del token, o None si falta, está alterado o caducó."""
+    if not token:
+        return None
+    try:
+        kid, body, signature = token.split(".")
+    except ValueError:
+        return None
+    # En bytes: compare_digest con str no ASCII lanza TypeError
+    if kid not in SESSION_KEYS or not hmac.compare_digest(signature.encode(), _sign(kid, body).encode()):
+        return None
+
+    try:
+        payload = json.loads(_b64decode(body))
+    except ValueError:
+        return None
+    if payload.get("exp", 0) < time.time():
+        return None
+
+    return {
+        "id": payload["uid"],
+        "usuario": payload["sub"],
+        "role": payload["role"],
+        "nombre_completo": payload.get("name"),
+        "email": payload.get("email"),
+        "token_version": payload.get("ver", 0),
+    }
+
+
+def set_session_cookie(response, user) -> None:
+    response.set_cookie(
+        key=SESSION_COOKIE,
+        value=create_token(user),
+        max_age=SESSION_TTL,
+        httponly=True,
+        samesite="lax",
+        secure=SESSION_COOKIE_SECURE,
+    )
+
+
+def clear_session_cookie(response) -> None:
+    response.delete_cookie(SESSION_COOKIE)
@@ -0,0 +1,104 @@
+# -------------------------------
+# Plantillas Jinja2 compartidas
+# -------------------------------
+# Un solo Environment para toda la app (antes cada router creaba el suyo y
+# compilaba las mismas plantillas por separado). El bytecode compilado se
+# guarda en TEMPLATES_BYTECODE_DIR, así que un worker nuevo lo lee de disco
+# en vez de volver a compilar; precompile() carga todas al arrancar para
+# que la primera petición no pague la compilación.
+#
+# Las páginas "cáscara" (el HTML solo depende del usuario; los datos llegan
+# luego por fetch) se sirven con render_page(), que guarda el HTML ya
+# renderizado por (plantilla, usuario).
+import os
+import tempfile
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.utils.assets import picture, static_url
+from app.utils.metrics import instrument_templates
+
+TEMPLATES_DIR = os.getenv("TEMPLATES_DIR", "templates")
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "0") == "1"  # solo en desarrollo
+TEMPLATES_BYTECODE_DIR = os.getenv(
+    "TEMPLATES_BYTECODE_DIR", os.path.join(tempfile.gettempdir(), "ecomarket-jinja")
+)  # vacío = sin caché en disco
+PAGE_CACHE_KEYS = int(os.getenv("PAGE_CACHE_KEYS", "2048"))
+
+# Campos del usuario que pueden aparecer en una página cáscara
+PAGE_USER_FIELDS = ("id", "role", "nombre_completo")
+
+
+def _bytecode_cache():
+    if not TEMPLATES_BYTECODE_DIR:
+        return None
+    os.makedirs(TEMPLATES_BYTECODE_DIR, exist_ok=True)
+    return FileSystemBytecodeCache(TEMPLATES_BYTECODE_DIR)
+
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    auto_reload=TEMPLATES_AUTO_RELOAD,
+    bytecode_cache=_bytecode_cache(),
+)
+env.globals.update(static_url=static_url, picture=picture)
+templates = instrument_templates(Jinja2Templates(env=env))
+
+
+def precompile() -> int:
+    """Compila (o carga del bytecode) todas las plantillas .html. Devuelve cuántas."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+# -------------------------------
+# Páginas cáscara ya renderizadas
+# -------------------------------
+class PageCache:
+    def __init__(self, maxsize: int = PAGE_CACHE_KEYS, enabled: bool = not TEMPLATES_AUTO_RELOAD):
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self._pages: OrderedDict[tuple, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, name: str, user: dict | None, context: dict) -> str:
+        key = (name, tuple(user.get(f) for f in PAGE_USER_FIELDS) if user else None)
+        html = self._pages.get(key) if self.enabled else None
+        if html is not None:
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return html
+
+        self.misses += 1
+        html = env.get_template(name).render(context)
+        if self.enabled:
+            self._pages[key] = html
+            while len(self._pages) > self.maxsize:
+                self._pages.popitem(last=False)
+        return html
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+page_cache = PageCache()
+
+
+def render_page(request: Request, name: str, user: dict | None = None, **extra) -> HTMLResponse:
+    """
+    Página que solo depende del usuario. `extra` debe ser constante: no forma
+    parte de la clave de la caché.
+    """
+    context = {"request": request, "user": user, **extra}
+    return HTMLResponse(page_cache.render(name, user, context))
@@ -0,0 +1,83 @@
+# benchmarks/bench_busqueda.py
+# Mide el índice invertido en memoria con un catálogo sintético:
+# tiempo de construcción y latencia p50/p95 por consulta.
+# No necesita MySQL.
+#
+#   python -m benchmarks.bench_busqueda --productos 100000
+import argparse
+import random
+import statistics
+import time
+
+from app.utils.search import ProductIndex
+
+MATERIALES = ["plástico", "vidrio", "papel", "cartón", "metal", "aluminio", "madera", "tela"]
+OBJETOS = ["botella", "caja", "bolsa", "lata", "frasco", "envase", "silla", "mesa", "lámpara", "bandeja"]
+ADJETIVOS = ["reciclado", "reutilizable", "usado", "nuevo", "grande", "pequeño", "ecológico", "resistente"]
+# Vocabulario de cola larga (marcas, modelos, colores...) como en un catálogo real
+COLA_LARGA = [f"ref{n}" for n in range(5000)]
+
+CONSULTAS = [
+    "botella",
+    "botellas de vidrio",
+    "lata aluminio",
+    "caja carton reciclado",
+    "lampara ecologica",
+    "bolsas reutilizables de tela",
+    "mesa madera resistente",
+]
+
+
+def _producto(product_id: int) -> dict:
+    nombre = f"{random.choice(OBJETOS)} de {random.choice(MATERIALES)} {random.choice(ADJETIVOS)}"
+    descripcion = " ".join(
+        random.choice(MATERIALES + OBJETOS + ADJETIVOS) if random.random() < 0.3
+        else random.choice(COLA_LARGA)
+        for _ in range(random.randint(5, 15))
+    )
+    return {
+        "id": product_id,
+        "name": nombre.capitalize(),
+        "description": descripcion,
+        "price": round(random.uniform(5, 500), 2),
+        "stock": random.randint(0, 50),
+        "image_url": None,
+    }
+
+
+def main(productos: int, repeticiones: int) -> None:
+    random.seed(42)
+    index = ProductIndex()
+
+    inicio = time.perf_counter()
+    for product_id in range(1, productos + 1):
+        index.upsert(_producto(product_id))
+    construccion = time.perf_counter() - inicio
+    print(f"📋 {productos} productos indexados en {construccion:.2f} s")
+
+    print(f"{'consulta':<32} {'total':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for q in CONSULTAS:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = index.search(q, offset=0, limit=20)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tiempos.sort()
+        p50 = statistics.median(tiempos)
+        p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+        print(f"{q:<32} {resultado['total']:>7} {p50:>8.3f} {p95:>8.3f}")
+
+    # Actualización incremental (lo que hacen los handlers de admin)
+    inicio = time.perf_counter()
+    for product_id in range(1, 1001):
+        index.upsert(_producto(product_id))
+    print(f"⏱️  1000 upserts incrementales: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia del índice de búsqueda en memoria")
+    parser.add_argument("--productos", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    main(args.productos, args.repeticiones)
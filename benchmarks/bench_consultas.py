@@ -0,0 +1,205 @@
+# benchmarks/bench_consultas.py
+# Coste de CPU de construir y compilar las consultas más frecuentes,
+# comparando la forma anterior (expresión nueva en cada petición) con las
+# consultas precompiladas de app/database/queries.py.
+#
+# Mide tres cosas por consulta:
+#   - construir: crear la expresión de SQLAlchemy Core
+#   - compilar:  pasarla a SQL de MySQL (lo que se hacía en cada petición)
+#   - ejecutar:  contra SQLite en memoria, sin caché / construida + caché
+#                del engine / precompilada + caché
+# No necesita MySQL.
+#
+#   python -m benchmarks.bench_consultas --repeticiones 20000
+import argparse
+import time
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import mysql
+
+from app.database import queries
+from app.database.connection import metadata
+from app.database.tables import (
+    users,
+    products,
+    solicitudes,
+    user_points,
+    points_history,
+    rewards,
+    daily_logins,
+)
+
+# Forma anterior de cada consulta (tal como estaba en los routers) y sus parámetros
+ANTES = {
+    "USER_BY_USERNAME": (
+        lambda: users.select().where(users.c.usuario == "ana"),
+        {"usuario": "ana"},
+    ),
+    "USER_BY_EMAIL": (
+        lambda: users.select().where(users.c.email == "ana@eco.com"),
+        {"email": "ana@eco.com"},
+    ),
+    "USER_BY_ID": (
+        lambda: users.select().where(users.c.id == 1),
+        {"user_id": 1},
+    ),
+    "USER_SESSION_CHECK": (
+        lambda: select(users.c.role, users.c.token_version).where(users.c.id == 1),
+        {"user_id": 1},
+    ),
+    "SALDO_BY_USER": (
+        lambda: select(user_points.c.balance).where(user_points.c.user_id == 1),
+        {"user_id": 1},
+    ),
+    "HISTORIAL_RECIENTE": (
+        lambda: select(
+            points_history.c.id,
+            points_history.c.cambio,
+            points_history.c.motivo,
+            points_history.c.referencia,
+            points_history.c.fecha,
+        )
+        .where(points_history.c.user_id == 1)
+        .order_by(points_history.c.fecha.desc())
+        .limit(20),
+        {"user_id": 1, "limit": 20},
+    ),
+    "HISTORY_INSERT": (
+        lambda: points_history.insert().values(user_id=1, cambio=-5, motivo="Canje", referencia="1"),
+        {"user_id": 1, "cambio": -5, "motivo": "Canje", "referencia": "1"},
+    ),
+    "SALDO_DEBIT": (
+        lambda: user_points.update()
+        .where(user_points.c.user_id == 1, user_points.c.balance >= 5)
+        .values(balance=user_points.c.balance - 5),
+        {"uid": 1, "costo": 5},
+    ),
+    "REWARDS_ACTIVOS": (
+        lambda: rewards.select().where(rewards.c.activo == True).order_by(rewards.c.puntos_necesarios),
+        {},
+    ),
+    "REWARD_ACTIVO_BY_ID": (
+        lambda: rewards.select().where(rewards.c.id == 1, rewards.c.activo == True),
+        {"reward_id": 1},
+    ),
+    "MIS_SOLICITUDES": (
+        lambda: select(
+            solicitudes.c.id, solicitudes.c.producto, solicitudes.c.cantidad,
+            solicitudes.c.descripcion, solicitudes.c.tipo, solicitudes.c.estado,
+        )
+        .where(solicitudes.c.user_id == 1)
+        .order_by(solicitudes.c.id.desc()),
+        {"user_id": 1},
+    ),
+    "SOLICITUD_OWNER_FOR_UPDATE": (
+        lambda: select(solicitudes.c.user_id, users.c.email)
+        .select_from(solicitudes.join(users, users.c.id == solicitudes.c.user_id))
+        .where(solicitudes.c.id == 1)
+        .with_for_update(of=solicitudes),
+        {"solicitud_id": 1},
+    ),
+    "SOLICITUD_SET_ESTADO": (
+        lambda: solicitudes.update()
+        .where(solicitudes.c.id == 1, solicitudes.c.estado != "aprobado")
+        .values(estado="aprobado"),
+        {"solicitud_id": 1, "nuevo_estado": "aprobado"},
+    ),
+    "PRODUCT_BY_ID": (
+        lambda: products.select().where(products.c.id == 1),
+        {"product_id": 1},
+    ),
+    "DAILY_LOGIN_INSERT": (
+        lambda: daily_logins.insert().values(user_id=1, fecha=date(2026, 1, 1)),
+        {"user_id": 1, "fecha": date(2026, 1, 1)},
+    ),
+}
+
+# Consultas por petición en los endpoints más usados
+ENDPOINTS = {
+    "POST /auth/login": ["USER_BY_USERNAME", "DAILY_LOGIN_INSERT"],
+    "GET /recompensas/mis-datos": ["SALDO_BY_USER", "HISTORIAL_RECIENTE", "REWARDS_ACTIVOS"],
+    "POST /recompensas/canjear": ["REWARD_ACTIVO_BY_ID", "SALDO_DEBIT", "HISTORY_INSERT", "SALDO_BY_USER"],
+    "PUT /solicitudes/admin/estado": ["SOLICITUD_OWNER_FOR_UPDATE", "SOLICITUD_SET_ESTADO"],
+    "GET /solicitudes/mis-solicitudes": ["MIS_SOLICITUDES"],
+}
+
+# Solo lectura / escrituras idempotentes en SQLite (sin dialecto MySQL)
+EJECUTABLES = [
+    "USER_BY_USERNAME", "USER_BY_EMAIL", "USER_BY_ID", "USER_SESSION_CHECK",
+    "SALDO_BY_USER", "HISTORIAL_RECIENTE", "SALDO_DEBIT", "REWARDS_ACTIVOS",
+    "REWARD_ACTIVO_BY_ID", "MIS_SOLICITUDES", "SOLICITUD_SET_ESTADO", "PRODUCT_BY_ID",
+]
+
+
+def _us(fn, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def medir_cpu(repeticiones: int) -> dict[str, tuple[float, float]]:
+    """(construir, construir + compilar) en µs con el dialecto de MySQL."""
+    dialect = mysql.dialect()
+    resultados = {}
+    for nombre, (builder, _) in ANTES.items():
+        construir = _us(builder, repeticiones)
+        compilar = _us(lambda: builder().compile(dialect=dialect), max(1, repeticiones // 10))
+        resultados[nombre] = (construir, compilar)
+    return resultados
+
+
+def medir_ejecucion(repeticiones: int) -> dict[str, tuple[float, float, float]]:
+    """(sin caché, construida + caché, precompilada + caché) en µs sobre SQLite."""
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    resultados = {}
+    with engine.connect() as conn:
+        conn.execute(users.insert().values(id=1, nombre_completo="Ana", usuario="ana", email="ana@eco.com", role="user"))
+        conn.execute(user_points.insert().values(user_id=1, balance=10**9, updated_at=datetime.utcnow()))
+        sin_cache = conn.execution_options(compiled_cache=None)
+
+        for nombre in EJECUTABLES:
+            builder, params = ANTES[nombre]
+            stmt = queries.HOT_QUERIES[nombre]
+            resultados[nombre] = (
+                _us(lambda: sin_cache.execute(builder()).fetchall() if _es_select(nombre) else sin_cache.execute(builder()), repeticiones),
+                _us(lambda: conn.execute(builder()).fetchall() if _es_select(nombre) else conn.execute(builder()), repeticiones),
+                _us(lambda: conn.execute(stmt, params).fetchall() if _es_select(nombre) else conn.execute(stmt, params), repeticiones),
+            )
+        conn.rollback()
+    return resultados
+
+
+def _es_select(nombre: str) -> bool:
+    return queries.HOT_QUERIES[nombre].is_select
+
+
+def main(repeticiones: int) -> None:
+    print(f"⏱️  {len(ANTES)} consultas, {repeticiones} repeticiones\n")
+
+    cpu = medir_cpu(repeticiones)
+    print(f"{'consulta':<28} {'construir µs':>13} {'+compilar µs':>13}")
+    for nombre, (construir, compilar) in cpu.items():
+        print(f"{nombre:<28} {construir:>13.1f} {compilar:>13.1f}")
+
+    print(f"\n{'endpoint':<34} {'µs ahorrados por petición':>26}")
+    for endpoint, nombres in ENDPOINTS.items():
+        ahorro = sum(cpu[n][1] for n in nombres)
+        print(f"{endpoint:<34} {ahorro:>26.1f}")
+
+    ejecucion = medir_ejecucion(max(1, repeticiones // 4))
+    print(f"\n{'consulta (SQLite)':<28} {'sin caché':>10} {'construida':>11} {'precompilada':>13}")
+    for nombre, (sin_cache, construida, precompilada) in ejecucion.items():
+        print(f"{nombre:<28} {sin_cache:>10.1f} {construida:>11.1f} {precompilada:>13.1f}")
+    total = [sum(v[i] for v in ejecucion.values()) for i in range(3)]
+    print(f"{'TOTAL µs':<28} {total[0]:>10.1f} {total[1]:>11.1f} {total[2]:>13.1f}")
+    print(f"\n✅ precompilada vs. sin caché: {total[0] / total[2]:.1f}x menos tiempo por consulta")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticiones", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.repeticiones)
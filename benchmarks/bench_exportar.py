@@ -0,0 +1,145 @@
+# benchmarks/bench_exportar.py
+# Exportación de points_history: memoria del proceso mientras se descarga
+# el CSV/NDJSON por streaming, comparada con cargar todo con fetch_all()
+# (lo que hacían los listados de admin).
+#
+# Siembra N filas de historial para un usuario de prueba y las borra al
+# terminar. Con SQLite basta un archivo nuevo en DATABASE_URL.
+#
+#   DATABASE_URL=sqlite+aiosqlite:///export.db python -m benchmarks.bench_exportar --filas 1000000
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.database.connection import database
+from app.database.tables import users, points_history
+from app.utils.session import SESSION_COOKIE, create_token
+
+USUARIO_PRUEBA = "__bench_exportar__"
+LOTE = 5000
+
+
+def _rss_mb() -> float:
+    """RSS actual (Linux); en otros sistemas, el máximo del proceso."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _sembrar(filas: int) -> dict:
+    await _limpiar()
+    user_id = await database.execute(
+        users.insert().values(
+            nombre_completo="Bench exportar", usuario=USUARIO_PRUEBA,
+            email=f"{USUARIO_PRUEBA}@example.invalid", password="x", role="admin",
+        )
+    )
+    inicio = datetime(2026, 1, 1)
+    for i in range(0, filas, LOTE):
+        await database.execute_many(points_history.insert(), [
+            {
+                "user_id": user_id,
+                "cambio": 5,
+                "motivo": "Exportación de prueba",
+                "referencia": str(n),
+                "fecha": inicio + timedelta(seconds=n),
+            }
+            for n in range(i, min(i + LOTE, filas))
+        ])
+    return dict(await database.fetch_one(users.select().where(users.c.id == user_id)))
+
+
+async def _limpiar() -> None:
+    row = await database.fetch_one(users.select().where(users.c.usuario == USUARIO_PRUEBA))
+    if row:
+        await database.execute(points_history.delete().where(points_history.c.user_id == row["id"]))
+        await database.execute(users.delete().where(users.c.id == row["id"]))
+
+
+async def _descargar(app, formato: str, admin: dict) -> tuple[int, float, float]:
+    """(bytes, segundos, crecimiento del RSS en MB) consumiendo el stream."""
+    # Se llama a la app ASGI directamente: httpx.ASGITransport junta todo el
+    # cuerpo en memoria y falsearía la medición
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/admin/export/points_history", "raw_path": b"/admin/export/points_history",
+        "query_string": f"formato={formato}&user_id={admin['id']}".encode(),
+        "headers": [(b"host", b"bench"), (b"cookie", f"{SESSION_COOKIE}={create_token(admin)}".encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80), "root_path": "",
+    }
+    base = pico = _rss_mb()
+    total, status = 0, None
+    pedido, terminado = False, asyncio.Event()
+
+    async def receive():
+        nonlocal pedido
+        if not pedido:
+            pedido = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await terminado.wait()  # el cliente "se desconecta" al terminar la respuesta
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal total, pico, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            total += len(message.get("body", b""))
+            pico = max(pico, _rss_mb())
+            if not message.get("more_body"):
+                terminado.set()
+
+    inicio = time.perf_counter()
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"La exportación respondió {status}")
+    return total, time.perf_counter() - inicio, pico - base
+
+
+async def main(filas: int) -> None:
+    import main as app_main
+
+    await app_main.startup()
+    try:
+        print(f"🌱 Sembrando {filas} filas de historial...")
+        admin = await _sembrar(filas)
+        for formato in ("csv", "ndjson"):
+            total, segundos, crecimiento = await _descargar(app_main.app, formato, admin)
+            print(
+                f"📤 {formato:<7} {total / 1e6:>8.1f} MB en {segundos:>6.1f} s "
+                f"({filas / segundos:>9,.0f} filas/s)  RSS +{crecimiento:.1f} MB"
+            )
+
+        base = _rss_mb()
+        inicio = time.perf_counter()
+        rows = await database.fetch_all(
+            points_history.select().where(points_history.c.user_id == admin["id"])
+        )
+        print(
+            f"🐘 fetch_all {len(rows):>10} filas en {time.perf_counter() - inicio:>6.1f} s"
+            f"{'':>22}RSS +{_rss_mb() - base:.1f} MB"
+        )
+        del rows
+        await _limpiar()
+    finally:
+        await app_main.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria y velocidad de la exportación por streaming")
+    parser.add_argument("--filas", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(main(args.filas))
+    # os._exit: no esperar a hilos del driver de BD que quedan colgados al salir
+    sys.stdout.flush()
+    os._exit(0)
@@ -0,0 +1,123 @@
+# benchmarks/bench_importar.py
+# Importación masiva de productos: filas/s según el tamaño de lote, frente
+# a un INSERT por producto (lo que hace create_product).
+#
+# Genera un catálogo sintético en CSV y NDJSON (con un 1% de filas
+# inválidas), lo importa y borra los productos creados al terminar. Con
+# SQLite basta un archivo nuevo en DATABASE_URL.
+#
+#   DATABASE_URL=sqlite+aiosqlite:///import.db python -m benchmarks.bench_importar --filas 50000
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.database.connection import database
+from app.database.tables import products
+from app.utils.importer import ImportJob, importar
+
+CATEGORIA = "__bench_importar__"
+COLUMNAS = ["name", "description", "category", "price", "stock", "status", "image_url"]
+
+
+def _catalogo(filas: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(filas):
+        row = {
+            "name": f"Producto reciclado {i}",
+            "description": f"Artículo de prueba {rnd.randint(1, 10**6)}",
+            "category": CATEGORIA,
+            "price": round(rnd.uniform(1, 500), 2),
+            "stock": rnd.randint(0, 200),
+            "status": "disponible",
+            "image_url": "",
+        }
+        if i % 100 == 99:
+            row["price"] = "gratis"  # inválida: se reporta y no se guarda
+        rows.append(row)
+    return rows
+
+
+def _escribir(rows: list[dict], formato: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=f".{formato}")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            writer = csv.DictWriter(f, fieldnames=COLUMNAS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return path
+
+
+async def _limpiar() -> None:
+    await database.execute(products.delete().where(products.c.category == CATEGORIA))
+
+
+async def _importar(path: str, formato: str, lote: int) -> ImportJob:
+    await _limpiar()
+    job = ImportJob("products", path, formato, os.path.basename(path), lote)
+    await importar(job)
+    if job.estado != "terminado":
+        raise RuntimeError(job.detalle)
+    return job
+
+
+async def _uno_por_uno(rows: list[dict]) -> float:
+    await _limpiar()
+    query = """
+        INSERT INTO products (name, description, category, price, stock, status, image_url)
+        VALUES (:name, :description, :category, :price, :stock, :status, :image_url)
+    """
+    inicio = time.perf_counter()
+    for row in rows:
+        await database.execute(query, row)
+    return time.perf_counter() - inicio
+
+
+async def main(filas: int, lotes: list[int], individuales: int) -> None:
+    await database.connect()
+    await database.create_all()
+    rows = _catalogo(filas)
+    paths = {formato: _escribir(rows, formato) for formato in ("csv", "json")}
+    try:
+        print(f"📦 {filas} filas ({filas // 100} inválidas)\n")
+        for formato, path in paths.items():
+            for lote in lotes:
+                job = await _importar(path, formato, lote)
+                print(
+                    f"📥 {formato:<5} lote {lote:>5}: {job.guardadas:>8} guardadas, "
+                    f"{job.rechazadas:>5} rechazadas en {job.segundos:>6.2f} s "
+                    f"→ {job.filas / job.segundos:>9,.0f} filas/s"
+                )
+
+        validas = [r for r in rows[:individuales] if not isinstance(r["price"], str)]
+        segundos = await _uno_por_uno(validas)
+        print(
+            f"\n🐢 uno por uno ({len(validas)} filas): {segundos:>6.2f} s "
+            f"→ {len(validas) / segundos:>9,.0f} filas/s"
+        )
+    finally:
+        await _limpiar()
+        for path in paths.values():
+            os.remove(path)
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Velocidad de la importación masiva de productos")
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--individuales", type=int, default=2000, help="filas para la comparación fila a fila")
+    args = parser.parse_args()
+    asyncio.run(main(args.filas, args.lotes, args.individuales))
+    # os._exit: no esperar a hilos del driver de BD que quedan colgados al salir
+    sys.stdout.flush()
+    os._exit(0)
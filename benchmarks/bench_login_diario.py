@@ -0,0 +1,162 @@
+# benchmarks/bench_login_diario.py
+# Compara el coste de "¿ya recibió hoy el premio de login?" con distintos
+# tamaños de historial:
+#   - scan:    la consulta antigua sobre points_history sin índice
+#   - indice:  la misma consulta con el índice (user_id, fecha)
+#   - daily:   INSERT IGNORE sobre daily_logins (lo que hace ahora auth.login)
+#
+# Usa tablas propias (bench_*) en la BD configurada y las borra al terminar.
+# Solo mide la comprobación; bcrypt no entra en el tiempo.
+#
+#   python -m benchmarks.bench_login_diario --filas 10000,1000000,10000000
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from app.database.connection import database
+
+USUARIOS = 10_000
+MUESTRAS = 200
+LOTE_SEMILLA = 10_000
+
+MOTIVOS = ["Login diario", "Creación de solicitud", "Solicitud aprobada", "Canje de recompensa #1"]
+
+
+async def _crear_tablas() -> None:
+    await _borrar_tablas()
+    await database.execute(
+        """
+        CREATE TABLE bench_points_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            cambio INT NOT NULL,
+            motivo VARCHAR(150) NOT NULL,
+            fecha DATETIME
+        )
+        """
+    )
+    await database.execute(
+        """
+        CREATE TABLE bench_daily_logins (
+            user_id INT NOT NULL,
+            fecha DATE NOT NULL,
+            PRIMARY KEY (user_id, fecha)
+        )
+        """
+    )
+
+
+async def _borrar_tablas() -> None:
+    await database.execute("DROP TABLE IF EXISTS bench_points_history")
+    await database.execute("DROP TABLE IF EXISTS bench_daily_logins")
+
+
+async def _sembrar(filas: int) -> None:
+    """Llena el historial hasta `filas` duplicando lo que ya hay (INSERT ... SELECT)."""
+    actuales = await database.fetch_val("SELECT COUNT(*) FROM bench_points_history")
+    if actuales == 0:
+        hoy = datetime.now()
+        await database.execute_many(
+            """
+            INSERT INTO bench_points_history (user_id, cambio, motivo, fecha)
+            VALUES (:user_id, :cambio, :motivo, :fecha)
+            """,
+            [
+                {
+                    "user_id": random.randint(1, USUARIOS),
+                    "cambio": 2,
+                    "motivo": random.choice(MOTIVOS),
+                    "fecha": hoy - timedelta(days=random.randint(1, 365)),
+                }
+                for _ in range(min(filas, LOTE_SEMILLA))
+            ],
+        )
+        actuales = min(filas, LOTE_SEMILLA)
+
+    while actuales < filas:
+        falta = min(actuales, filas - actuales)
+        await database.execute(
+            f"""
+            INSERT INTO bench_points_history (user_id, cambio, motivo, fecha)
+            SELECT FLOOR(1 + RAND() * {USUARIOS}), cambio, motivo,
+                   fecha - INTERVAL FLOOR(RAND() * 30) DAY
+            FROM bench_points_history
+            LIMIT {falta}
+            """
+        )
+        actuales += falta
+
+
+async def _medir(consulta, valores_por_muestra) -> dict:
+    tiempos = []
+    for valores in valores_por_muestra:
+        inicio = time.perf_counter()
+        await consulta(valores)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[int(len(tiempos) * 0.95) - 1], 3),
+    }
+
+
+async def _consulta_historial(valores: dict) -> None:
+    await database.fetch_one(
+        """
+        SELECT id FROM bench_points_history
+        WHERE user_id = :user_id AND motivo = 'Login diario' AND fecha >= :inicio
+        LIMIT 1
+        """,
+        values={"user_id": valores["user_id"], "inicio": valores["inicio"]},
+    )
+
+
+async def _consulta_daily(valores: dict) -> None:
+    await database.execute(
+        "INSERT IGNORE INTO bench_daily_logins (user_id, fecha) VALUES (:user_id, :fecha)",
+        values={"user_id": valores["user_id"], "fecha": valores["fecha"]},
+    )
+
+
+async def main(tamaños: list[int]) -> None:
+    await database.connect()
+    try:
+        await _crear_tablas()
+        hoy = date.today()
+        inicio = datetime.combine(hoy, datetime.min.time())
+
+        print(f"{'filas':>12} {'scan p50/p95':>16} {'indice p50/p95':>16} {'daily p50/p95':>16}   (ms)")
+        for filas in sorted(tamaños):
+            await _sembrar(filas)
+            muestras = [
+                {"user_id": random.randint(1, USUARIOS), "inicio": inicio, "fecha": hoy}
+                for _ in range(MUESTRAS)
+            ]
+
+            scan = await _medir(_consulta_historial, muestras)
+
+            await database.execute(
+                "CREATE INDEX ix_bench_user_fecha ON bench_points_history (user_id, fecha)"
+            )
+            indice = await _medir(_consulta_historial, muestras)
+            await database.execute("DROP INDEX ix_bench_user_fecha ON bench_points_history")
+
+            await database.execute("DELETE FROM bench_daily_logins")
+            daily = await _medir(_consulta_daily, muestras)
+
+            columnas = [f"{m['p50_ms']}/{m['p95_ms']}" for m in (scan, indice, daily)]
+            print(f"{filas:>12} " + " ".join(f"{c:>16}" for c in columnas))
+    finally:
+        await _borrar_tablas()
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coste de la comprobación del login diario")
+    parser.add_argument("--filas", default="10000,1000000,10000000")
+    args = parser.parse_args()
+
+    asyncio.run(main([int(n) for n in args.filas.split(",")]))
@@ -0,0 +1,112 @@
+# benchmarks/bench_plantillas.py
+# Compilación y render de las plantillas Jinja2:
+#   - arranque en frío: compilar todas las plantillas desde el código fuente,
+#     como antes (x5, un Environment por módulo) y ahora (uno compartido),
+#     y cargarlas desde la caché de bytecode en disco
+#   - render por petición: plantilla ya compilada vs. página cáscara servida
+#     desde la caché de HTML (page_cache)
+# No necesita MySQL.
+#
+#   python -m benchmarks.bench_plantillas --repeticiones 2000
+import argparse
+import shutil
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.utils.assets import picture, static_url
+from app.utils.templates import TEMPLATES_DIR, PageCache
+
+# Módulos que antes creaban su propio Jinja2Templates
+MODULOS_ANTES = 5
+
+USUARIO = {"id": 1, "role": "admin", "nombre_completo": "Ana Pérez", "usuario": "ana"}
+CONTEXTO = {
+    "request": None,
+    "user": USUARIO,
+    "puntos_info": {"login": {"nombre": "Login diario", "puntos": 2}},
+    "products": [],
+    "next_url": None,
+}
+
+
+def _env(bytecode_dir: str | None = None) -> Environment:
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None,
+    )
+    env.globals.update(static_url=static_url, picture=picture)
+    return env
+
+
+def _cargar_todas(env: Environment) -> float:
+    inicio = time.perf_counter()
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir_arranque() -> dict[str, float]:
+    """ms para tener todas las plantillas listas."""
+    directorio = tempfile.mkdtemp(prefix="bench-jinja-")
+    try:
+        resultados = {
+            f"antes ({MODULOS_ANTES} Environment)": sum(_cargar_todas(_env()) for _ in range(MODULOS_ANTES)),
+            "compartido, sin bytecode": _cargar_todas(_env()),
+        }
+        _cargar_todas(_env(directorio))  # primer worker: compila y guarda el bytecode
+        resultados["compartido, bytecode en disco"] = _cargar_todas(_env(directorio))
+        return resultados
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def medir_render(repeticiones: int) -> dict[str, tuple[float, float]]:
+    """(render Jinja2, página en caché) en µs por petición."""
+    env = _env()
+    cache = PageCache(enabled=True)
+    resultados = {}
+    for name in env.list_templates(extensions=["html"]):
+        template = env.get_template(name)
+        try:
+            template.render(CONTEXTO)
+        except Exception:
+            continue  # necesita datos que este benchmark no simula
+
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            template.render(CONTEXTO)
+        render = (time.perf_counter() - inicio) / repeticiones * 1e6
+
+        cache.render(name, USUARIO, CONTEXTO)  # primera vez: render y se guarda
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            cache.render(name, USUARIO, CONTEXTO)
+        cacheada = (time.perf_counter() - inicio) / repeticiones * 1e6
+        resultados[name] = (render, cacheada)
+    return resultados
+
+
+def main(repeticiones: int) -> None:
+    print("🧊 Arranque en frío (todas las plantillas)")
+    for nombre, ms in medir_arranque().items():
+        print(f"   {nombre:<34} {ms:>8.1f} ms")
+
+    print(f"\n⏱️  Render por petición ({repeticiones} repeticiones)")
+    print(f"   {'plantilla':<28} {'Jinja2 µs':>10} {'caché µs':>10}")
+    resultados = medir_render(repeticiones)
+    for name, (render, cacheada) in resultados.items():
+        print(f"   {name:<28} {render:>10.1f} {cacheada:>10.2f}")
+
+    total_render = sum(r for r, _ in resultados.values())
+    total_cache = sum(c for _, c in resultados.values())
+    print(f"\n✅ Páginas cáscara: {total_render / total_cache:.0f}x menos CPU por petición desde la caché")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compilación y render de plantillas")
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeticiones)
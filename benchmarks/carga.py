@@ -0,0 +1,288 @@
+# benchmarks/carga.py
+# Prueba de carga de las rutas HTTP más usadas: siembra datos sintéticos
+# (benchmarks/semilla.py), lanza peticiones concurrentes por escenario y
+# reporta p50/p95/p99, peticiones por segundo, errores y consultas SQL por
+# petición.
+#
+# Modos:
+#   - asgi:    la app corre en este proceso (httpx + ASGITransport). Sin red,
+#              y permite contar las consultas SQL de cada escenario.
+#   - uvicorn: arranca `uvicorn main:app` en un subproceso y le pega por HTTP.
+#              Más realista; las consultas por petición no se pueden contar.
+#
+# Con --guardar-baseline se escribe un JSON con los resultados; con
+# --baseline se compara contra uno anterior y el proceso termina con código
+# 1 si algún p95 empeora más de --tolerancia por ciento.
+#
+#   DATABASE_URL=sqlite+aiosqlite:///carga.db python -m benchmarks.carga --peticiones 500 --concurrencia 20
+#   python -m benchmarks.carga --modo uvicorn --baseline carga_base.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# Sin límite de intentos: el login se prueba cientos de veces desde la misma IP
+os.environ.setdefault("RATE_LIMIT_IP", "1000000/1")
+os.environ.setdefault("RATE_LIMIT_USER", "1000000/1")
+
+import httpx
+from sqlalchemy import event
+
+from app.database.connection import database
+from app.utils.session import SESSION_COOKIE, create_token
+from benchmarks import semilla
+
+
+# -------------------------------
+# Escenarios
+# -------------------------------
+# Cada escenario arma una petición a partir de los datos sembrados:
+# (método, ruta, kwargs de httpx, cookie de sesión o None)
+
+def _usuario(datos):
+    return random.choice(datos["usuarios"])
+
+
+def _login(datos):
+    u = _usuario(datos)
+    form = {"username": u["usuario"], "password": datos["password"]}
+    return "POST", "/auth/login", {"data": form}, None
+
+
+def _productos(datos):
+    return "GET", "/products/", {}, None
+
+
+def _mis_datos(datos):
+    return "GET", "/recompensas/mis-datos", {}, _usuario(datos)
+
+
+def _canjear(datos):
+    reward_id = random.choice(datos["recompensas"])
+    return "POST", f"/recompensas/canjear/{reward_id}", {}, _usuario(datos)
+
+
+def _crear_solicitud(datos):
+    body = {"producto": "Botellas", "cantidad": random.randint(1, 10), "tipo": "donar"}
+    return "POST", "/solicitudes/crear", {"json": body}, _usuario(datos)
+
+
+def _solicitudes_admin(datos):
+    return "GET", "/solicitudes/admin/all", {}, datos["admin"]
+
+
+def _puntos(datos):
+    return "GET", "/api/puntos", {}, None
+
+
+ESCENARIOS = {
+    "login": _login,
+    "productos": _productos,
+    "mis-datos": _mis_datos,
+    "canjear": _canjear,
+    "crear-solicitud": _crear_solicitud,
+    "solicitudes-admin": _solicitudes_admin,
+    "puntos": _puntos,
+}
+
+
+# -------------------------------
+# Contador de consultas (modo asgi)
+# -------------------------------
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args):
+        self.total += 1
+
+    def instalar(self):
+        event.listen(database.engine.sync_engine, "before_cursor_execute", self)
+
+    def quitar(self):
+        event.remove(database.engine.sync_engine, "before_cursor_execute", self)
+
+
+# -------------------------------
+# Ejecución
+# -------------------------------
+async def _peticion(client, escenario, datos, tokens) -> tuple[float, bool]:
+    method, path, kwargs, user = escenario(datos)
+    headers = {"cookie": f"{SESSION_COOKIE}={tokens[user['id']]}"} if user else None
+    inicio = time.perf_counter()
+    try:
+        resp = await client.request(method, path, headers=headers, **kwargs)
+        ok = resp.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    return time.perf_counter() - inicio, ok
+
+
+async def correr_escenario(client, nombre, datos, tokens, peticiones, concurrencia, contador=None) -> dict:
+    escenario = ESCENARIOS[nombre]
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una():
+        async with semaforo:
+            return await _peticion(client, escenario, datos, tokens)
+
+    # Calentamiento: cachés, pool y plantillas
+    await asyncio.gather(*[una() for _ in range(min(concurrencia, peticiones))])
+
+    consultas_antes = contador.total if contador else 0
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*[una() for _ in range(peticiones)])
+    duracion = time.perf_counter() - inicio
+
+    tiempos = sorted(t * 1000 for t, _ in resultados)
+    p = statistics.quantiles(tiempos, n=100, method="inclusive")
+    return {
+        "p50": round(p[49], 2),
+        "p95": round(p[94], 2),
+        "p99": round(p[98], 2),
+        "rps": round(peticiones / duracion, 1),
+        "errores": sum(1 for _, ok in resultados if not ok),
+        "consultas": round((contador.total - consultas_antes) / peticiones, 2) if contador else None,
+    }
+
+
+async def _esperar_servidor(url: str, proceso, timeout: float = 30) -> None:
+    limite = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < limite:
+            if proceso.poll() is not None:
+                raise RuntimeError("uvicorn terminó antes de arrancar")
+            try:
+                await client.get("/api/puntos")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn no respondió a tiempo")
+
+
+async def correr(args) -> dict:
+    await database.connect()
+    try:
+        print("🌱 Sembrando datos...")
+        datos = await semilla.sembrar(semilla.escala_de(args))
+    finally:
+        await database.disconnect()
+
+    tokens = {u["id"]: create_token(u) for u in datos["usuarios"] + [datos["admin"]]}
+    nombres = args.escenarios or list(ESCENARIOS)
+    resultados = {}
+    print(f"\n{'escenario':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'errores':>8} {'consultas':>9}")
+
+    if args.modo == "asgi":
+        import main
+
+        await main.startup()
+        contador = ContadorConsultas()
+        contador.instalar()
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://carga") as client:
+                for nombre in nombres:
+                    resultados[nombre] = await correr_escenario(
+                        client, nombre, datos, tokens, args.peticiones, args.concurrencia, contador
+                    )
+                    _imprimir_fila(nombre, resultados[nombre])
+        finally:
+            contador.quitar()
+            await main.shutdown()
+    else:
+        url = f"http://127.0.0.1:{args.puerto}"
+        proceso = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.puerto),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+        try:
+            await _esperar_servidor(url, proceso)
+            limites = httpx.Limits(max_connections=args.concurrencia)
+            async with httpx.AsyncClient(base_url=url, limits=limites, timeout=30) as client:
+                for nombre in nombres:
+                    resultados[nombre] = await correr_escenario(
+                        client, nombre, datos, tokens, args.peticiones, args.concurrencia
+                    )
+                    _imprimir_fila(nombre, resultados[nombre])
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+    return resultados
+
+
+# -------------------------------
+# Reporte y baseline
+# -------------------------------
+def _imprimir_fila(nombre: str, r: dict) -> None:
+    consultas = "n/d" if r["consultas"] is None else f"{r['consultas']:.1f}"
+    print(
+        f"{nombre:<20} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+        f"{r['rps']:>8.1f} {r['errores']:>8} {consultas:>9}"
+    )
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list[str]:
+    """Escenarios cuyo p95 empeoró más de `tolerancia` % respecto al baseline."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = baseline.get(nombre)
+        if not anterior:
+            continue
+        cambio = (actual["p95"] - anterior["p95"]) / anterior["p95"] * 100
+        marca = "🔴" if cambio > tolerancia else "🟢"
+        print(f"{marca} {nombre:<20} p95 {anterior['p95']:.1f} → {actual['p95']:.1f} ms ({cambio:+.1f}%)")
+        if cambio > tolerancia:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main(args) -> int:
+    print(
+        f"⏱️  modo {args.modo}, {args.peticiones} peticiones por escenario, "
+        f"concurrencia {args.concurrencia}"
+    )
+    resultados = asyncio.run(correr(args))
+
+    if args.guardar_baseline:
+        with open(args.guardar_baseline, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\n💾 Baseline guardado en {args.guardar_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n📊 Comparación con {args.baseline} (tolerancia {args.tolerancia:.0f}%)")
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print(f"\n❌ Regresión de latencia en: {', '.join(regresiones)}")
+            return 1
+
+    errores = sum(r["errores"] for r in resultados.values())
+    print(f"\n{'⚠️ ' if errores else '✅'} {errores} peticiones con error")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de las rutas HTTP")
+    parser.add_argument("--modo", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--peticiones", type=int, default=500)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument("--escenarios", nargs="*", choices=list(ESCENARIOS))
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--baseline", help="JSON con resultados anteriores para comparar")
+    parser.add_argument("--guardar-baseline", help="guarda los resultados en este JSON")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="%% de empeoramiento de p95 permitido")
+    semilla.agregar_argumentos(parser)
+    args = parser.parse_args()
+    # os._exit: no esperar a hilos del driver de BD que quedan colgados al salir
+    codigo = main(args)
+    sys.stdout.flush()
+    os._exit(codigo)
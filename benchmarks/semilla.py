@@ -0,0 +1,208 @@
+# benchmarks/semilla.py
+# Datos sintéticos para las pruebas de carga: usuarios, saldos, recompensas,
+# productos, solicitudes, historial de puntos y puntos de recolección.
+#
+# Todo lo que crea va marcado (usuarios "carga_*", categoría "carga",
+# nombres "Carga ...") y se borra al volver a sembrar, así que se puede usar
+# sobre una BD con otros datos. Para SQLite basta con apuntar DATABASE_URL a
+# un archivo nuevo: las tablas se crean si no existen.
+#
+#   DATABASE_URL=sqlite+aiosqlite:///carga.db python -m benchmarks.semilla --usuarios 1000
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.database.connection import database
+from app.database.tables import (
+    users,
+    products,
+    solicitudes,
+    user_points,
+    points_history,
+    points_history_keys,
+    points_history_mensual,
+    points_summary,
+    points_summary_motivos,
+    rewards,
+    points,
+    daily_logins,
+)
+from app.utils.security import hash_password
+
+PREFIJO = "carga_"
+PASSWORD = "carga123"
+ADMIN = f"{PREFIJO}admin"
+CATEGORIA = "carga"
+LOTE = 1000
+
+ESCALA = {
+    "usuarios": 1000,
+    "productos": 5000,
+    "solicitudes": 5000,
+    "historial": 20000,
+    "recompensas": 10,
+    "puntos": 200,
+}
+
+MATERIALES = ["plástico", "vidrio", "papel", "cartón", "metal", "aluminio", "madera", "tela"]
+OBJETOS = ["botella", "caja", "bolsa", "lata", "frasco", "envase", "silla", "mesa"]
+TIPOS = ["donar", "intercambiar", "comprar"]
+ESTADOS = ["pendiente", "aprobado", "rechazado"]
+
+
+async def _insertar(tabla, filas: list[dict]) -> None:
+    for i in range(0, len(filas), LOTE):
+        await database.execute_many(tabla.insert(), filas[i:i + LOTE])
+
+
+async def _ids_usuarios() -> list[int]:
+    rows = await database.fetch_all(
+        select(users.c.id).where(users.c.usuario.like(PREFIJO + "%")).order_by(users.c.id)
+    )
+    return [r["id"] for r in rows]
+
+
+async def limpiar() -> None:
+    ids = await _ids_usuarios()
+    for i in range(0, len(ids), LOTE):
+        lote = ids[i:i + LOTE]
+        # Las claves de idempotencia no llevan user_id: se buscan por el historial
+        await database.execute(points_history_keys.delete().where(
+            points_history_keys.c.idempotency_key.in_(
+                select(points_history.c.idempotency_key).where(points_history.c.user_id.in_(lote))
+            )
+        ))
+        for tabla in (
+            points_history, points_history_mensual, points_summary, points_summary_motivos,
+            user_points, solicitudes, daily_logins,
+        ):
+            await database.execute(tabla.delete().where(tabla.c.user_id.in_(lote)))
+        await database.execute(users.delete().where(users.c.id.in_(lote)))
+    await database.execute(products.delete().where(products.c.category == CATEGORIA))
+    await database.execute(rewards.delete().where(rewards.c.nombre.like("Carga %")))
+    await database.execute(points.delete().where(points.c.nombre.like("Carga %")))
+
+
+async def sembrar(escala: dict) -> dict:
+    """Crea los datos y devuelve lo que necesitan los escenarios de carga."""
+    random.seed(7)
+    await database.create_all()
+    await limpiar()
+
+    # Un solo hash: bcrypt tarda y todos comparten contraseña
+    password = hash_password(PASSWORD)
+    await _insertar(users, [
+        {
+            "nombre_completo": f"Usuario carga {n}",
+            "usuario": f"{PREFIJO}{n}",
+            "email": f"{PREFIJO}{n}@example.invalid",
+            "password": password,
+            "role": "user",
+        }
+        for n in range(escala["usuarios"])
+    ] + [{
+        "nombre_completo": "Admin carga",
+        "usuario": ADMIN,
+        "email": f"{ADMIN}@example.invalid",
+        "password": password,
+        "role": "admin",
+    }])
+    user_ids = await _ids_usuarios()
+
+    ahora = datetime.utcnow()
+    # Saldo alto para que los canjes no se queden sin puntos durante la prueba
+    await _insertar(user_points, [
+        {"user_id": uid, "balance": 1_000_000, "updated_at": ahora} for uid in user_ids
+    ])
+    await _insertar(rewards, [
+        {"nombre": f"Carga recompensa {n}", "descripcion": "", "puntos_necesarios": 1 + n, "activo": True}
+        for n in range(escala["recompensas"])
+    ])
+    await _insertar(products, [
+        {
+            "name": f"{random.choice(OBJETOS).capitalize()} de {random.choice(MATERIALES)} {n}",
+            "description": "Producto sembrado para pruebas de carga",
+            "category": CATEGORIA,
+            "price": round(random.uniform(5, 500), 2),
+            "stock": random.randint(0, 50),
+            "status": "disponible",
+            "created_at": ahora - timedelta(minutes=n),
+        }
+        for n in range(escala["productos"])
+    ])
+    await _insertar(solicitudes, [
+        {
+            "user_id": random.choice(user_ids),
+            "producto": f"Material {n}",
+            "cantidad": random.randint(1, 10),
+            "descripcion": None,
+            "tipo": random.choice(TIPOS),
+            "estado": random.choice(ESTADOS),
+        }
+        for n in range(escala["solicitudes"])
+    ])
+    await _insertar(points_history, [
+        {
+            "user_id": random.choice(user_ids),
+            "cambio": random.choice([2, 5, 10, -3]),
+            "motivo": "Carga",
+            "referencia": None,
+            "fecha": ahora - timedelta(minutes=n),
+        }
+        for n in range(escala["historial"])
+    ])
+    await _insertar(points, [
+        {
+            "nombre": f"Carga punto {n}",
+            "direccion": f"Calle {n}",
+            "lat": 14.0 + random.uniform(-0.5, 0.5),
+            "lng": -87.2 + random.uniform(-0.5, 0.5),
+        }
+        for n in range(escala["puntos"])
+    ])
+
+    reward_rows = await database.fetch_all(
+        select(rewards.c.id).where(rewards.c.nombre.like("Carga %"))
+    )
+    usuarios = await database.fetch_all(
+        users.select().where(users.c.usuario.like(PREFIJO + "%"))
+    )
+    return {
+        "usuarios": [dict(u) for u in usuarios if u["role"] == "user"],
+        "admin": next(dict(u) for u in usuarios if u["role"] == "admin"),
+        "recompensas": [r["id"] for r in reward_rows],
+        "password": PASSWORD,
+    }
+
+
+def agregar_argumentos(parser: argparse.ArgumentParser) -> None:
+    for nombre, valor in ESCALA.items():
+        parser.add_argument(f"--{nombre}", type=int, default=valor)
+
+
+def escala_de(args) -> dict:
+    return {nombre: getattr(args, nombre) for nombre in ESCALA}
+
+
+async def main(escala: dict) -> None:
+    await database.connect()
+    try:
+        inicio = time.perf_counter()
+        datos = await sembrar(escala)
+        print(f"🌱 Sembrado en {time.perf_counter() - inicio:.1f} s: " + ", ".join(
+            f"{n} {k}" for k, n in escala.items()
+        ))
+        print(f"🔑 Usuarios {PREFIJO}0..{len(datos['usuarios']) - 1} y {ADMIN}, contraseña '{PASSWORD}'")
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Siembra datos para pruebas de carga")
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+    asyncio.run(main(escala_de(args)))
@@ -0,0 +1,104 @@
+# benchmarks/stress_canje.py
+# Prueba de estrés del ledger: lanza cientos de canjes simultáneos sobre un
+# mismo usuario y comprueba que el saldo nunca queda en negativo.
+#
+#   python -m benchmarks.stress_canje --canjes 500 --costo 7 --saldo 1000
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.database.connection import database
+from app.database.tables import (
+    users,
+    user_points,
+    points_history,
+    points_history_keys,
+    points_summary,
+    points_summary_motivos,
+)
+from app.utils import ledger
+
+USUARIO_PRUEBA = "__stress_canje__"
+
+
+async def _crear_usuario(saldo: int) -> int:
+    await _borrar_usuario()
+    user_id = await database.execute(
+        users.insert().values(
+            nombre_completo="Stress canje",
+            usuario=USUARIO_PRUEBA,
+            email=f"{USUARIO_PRUEBA}@example.invalid",
+            password="x",
+            role="user",
+        )
+    )
+    await ledger.apply_change(user_id, saldo, "Saldo inicial", "stress")
+    return user_id
+
+
+async def _borrar_usuario() -> None:
+    row = await database.fetch_one(users.select().where(users.c.usuario == USUARIO_PRUEBA))
+    if not row:
+        return
+    await database.execute(points_history_keys.delete().where(
+        points_history_keys.c.idempotency_key.in_(
+            select(points_history.c.idempotency_key).where(points_history.c.user_id == row["id"])
+        )
+    ))
+    for tabla in (points_history, points_summary, points_summary_motivos, user_points):
+        await database.execute(tabla.delete().where(tabla.c.user_id == row["id"]))
+    await database.execute(users.delete().where(users.c.id == row["id"]))
+
+
+async def _canjear(user_id: int, costo: int) -> bool:
+    try:
+        await ledger.debit(user_id, costo, "Canje stress", "stress")
+        return True
+    except ledger.SaldoInsuficiente:
+        return False
+
+
+async def main(canjes: int, costo: int, saldo: int) -> bool:
+    await database.connect()
+    try:
+        user_id = await _crear_usuario(saldo)
+
+        resultados = await asyncio.gather(*[_canjear(user_id, costo) for _ in range(canjes)])
+        exitosos = sum(resultados)
+
+        balance = await database.fetch_val(
+            user_points.select().with_only_columns(user_points.c.balance)
+            .where(user_points.c.user_id == user_id)
+        )
+        movimientos = await database.fetch_val(
+            "SELECT COUNT(*) FROM points_history WHERE user_id = :user_id AND motivo = 'Canje stress'",
+            values={"user_id": user_id},
+        )
+
+        esperados = min(canjes, saldo // costo)
+        ok = (
+            balance >= 0
+            and exitosos == esperados
+            and movimientos == exitosos
+            and balance == saldo - exitosos * costo
+        )
+
+        print(f"📋 {canjes} canjes de {costo} pts sobre saldo {saldo}")
+        print(f"   exitosos={exitosos} (esperados {esperados}) historial={movimientos} saldo_final={balance}")
+        print("✅ Sin sobregiro" if ok else "❌ Inconsistencia detectada")
+        return ok
+    finally:
+        await _borrar_usuario()
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Canjes concurrentes contra el ledger")
+    parser.add_argument("--canjes", type=int, default=500)
+    parser.add_argument("--costo", type=int, default=7)
+    parser.add_argument("--saldo", type=int, default=1000)
+    args = parser.parse_args()
+
+    ok = asyncio.run(main(args.canjes, args.costo, args.saldo))
+    raise SystemExit(0 if ok else 1)
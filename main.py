@@ -1,9 +1,7 @@
 from fastapi import FastAPI, Request, Depends
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 
-from app.database.connection import metadata, engine, database
+from app.database.connection import database
 
 from app.routers.auth import router as auth_router
 from app.routers.users import router as users_router
@@ -12,6 +10,15 @@ from app.routers.admin_productos import router as admin_products_router
 from app.routers import puntos_api
 from app.routers.solicitudes import router as solicitudes_router
 
+from app.utils.assets import StaticAssets
+from app.utils.award_queue import award_queue
+from app.utils.geo import load_point_index
+from app.utils.importer import import_jobs
+from app.utils.metrics import MetricsMiddleware
+from app.utils.prometheus import registry as prometheus_registry
+from app.utils.rate_limit import RateLimitMiddleware
+from app.utils.search import load_product_index
+from app.utils.templates import templates, render_page, precompile as precompile_templates
 from app.utils.security import (
     get_current_user,
     require_login,
@@ -19,24 +26,27 @@ from app.utils.security import (
     RequiresLogin,
 )
 
-metadata.create_all(engine)
-
 app = FastAPI(title="EcoMarket API")
 
+# Corta ráfagas de login/registro antes de tocar la BD o bcrypt
+app.add_middleware(RateLimitMiddleware)
+# Consultas, tiempo de BD/plantillas por petición (Server-Timing y /admin/metrics)
+app.add_middleware(MetricsMiddleware)
+
 
 @app.exception_handler(RequiresLogin)
 async def requires_login_handler(request: Request, exc: RequiresLogin):
     return RedirectResponse(url="/auth/login")
 
 
-templates = Jinja2Templates(directory="templates")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Versionados (static/dist) con caché de un año; .br/.gz según Accept-Encoding
+app.mount("/static", StaticAssets(directory="static"), name="static")
 
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     user = await get_current_user(request)
-    return templates.TemplateResponse("index.html", {"request": request, "user": user})
+    return render_page(request, "index.html", user)
 
 
 @app.get("/productos", response_class=HTMLResponse)
@@ -46,12 +56,12 @@ async def productos_page(request: Request, user=Depends(get_current_user)):
 
 @app.get("/solicitudes", response_class=HTMLResponse)
 async def solicitudes_page(request: Request, user=Depends(require_login)):
-    return templates.TemplateResponse("solicitudes.html", {"request": request, "user": user})
+    return render_page(request, "solicitudes.html", user)
 
 
 @app.get("/puntos-recoleccion", response_class=HTMLResponse)
 async def puntos_usuario_page(request: Request, user=Depends(get_current_user)):
-    return templates.TemplateResponse("puntos_usuario.html", {"request": request, "user": user})
+    return render_page(request, "puntos_usuario.html", user)
 
 
 @app.get("/menu", response_class=HTMLResponse)
@@ -62,45 +72,52 @@ async def admin_menu(request: Request, user=Depends(require_admin)):
         "solicitud": {"nombre": "Crear solicitud", "puntos": 5},
         "aprobado": {"nombre": "Solicitud aprobada", "puntos": 10},
     }
-    return templates.TemplateResponse(
-        "menu.html",
-        {"request": request, "user": user, "puntos_info": puntos_info}
-    )
+    return render_page(request, "menu.html", user, puntos_info=puntos_info)
 
 
 
 @app.get("/admin_productos", response_class=HTMLResponse)
 async def admin_productos_page(request: Request, user=Depends(require_admin)):
-    return templates.TemplateResponse("admin_products.html", {"request": request, "user": user})
+    return render_page(request, "admin_products.html", user)
 
 
 @app.get("/puntos-recoleccion-admin", response_class=HTMLResponse)
 async def puntos_admin_page(request: Request, user=Depends(require_admin)):
-    return templates.TemplateResponse("puntos_recoleccion.html", {"request": request, "user": user})
+    return render_page(request, "puntos_recoleccion.html", user)
 
 
 @app.get("/solicitudes-admin", response_class=HTMLResponse)
 async def solicitudes_admin_page(request: Request, user=Depends(require_admin)):
-    return templates.TemplateResponse("solicitudes_admin.html", {"request": request, "user": user})
+    return render_page(request, "solicitudes_admin.html", user)
 
 
 @app.get("/gestion-usuarios", response_class=HTMLResponse)
 async def gestion_usuarios_page(request: Request, admin: dict = Depends(require_admin)):
-    return templates.TemplateResponse("gestion_usuarios.html", {"request": request, "user": admin})
+    return render_page(request, "gestion_usuarios.html", admin)
 
 @app.get("/admin-recompensas", response_class=HTMLResponse)
 async def admin_recompensas_page(request: Request, user=Depends(require_admin)):
-    return templates.TemplateResponse("admin_recompensas.html", {"request": request, "user": user})
+    return render_page(request, "admin_recompensas.html", user)
 
 
 
 @app.on_event("startup")
 async def startup():
+    precompile_templates()
     await database.connect()
+    await database.create_all()
+    await award_queue.start()
+    await load_product_index()
+    await load_point_index()
+    await prometheus_registry.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    # Volcar los premios pendientes antes de cerrar la conexión
+    await award_queue.drain()
+    await import_jobs.stop()
+    await prometheus_registry.stop()
     await database.disconnect()
 
 
@@ -120,3 +137,15 @@ from app.routers.admin_recompensas import router as admin_recompensas_router
 
 app.include_router(recompensas_router, tags=["Recompensas Usuario"])
 app.include_router(admin_recompensas_router, tags=["Recompensas Admin"])
+
+from app.routers.admin_metricas import router as admin_metricas_router
+
+app.include_router(admin_metricas_router, tags=["Métricas Admin"])
+
+from app.routers.admin_exportar import router as admin_exportar_router
+
+app.include_router(admin_exportar_router, tags=["Exportación Admin"])
+
+from app.routers.admin_importar import router as admin_importar_router
+
+app.include_router(admin_importar_router, tags=["Importación Admin"])